@@ -0,0 +1,67 @@
+"""Conditional GET for deterministic responses.
+
+A chart is a pure function of its input, the calculator version and the
+response encoding once the as-of date is fixed; a profile changes only when
+its row's `updated_at` does. The GET endpoints derive a strong ETag from
+those parts and answer a matching If-None-Match with 304 before running the
+calculator or serializing anything, so browsers and the CDN can skip both
+compute and transfer.
+"""
+
+import datetime
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Response, status
+
+from app.core.config import settings
+
+
+def strong_etag(*parts: Any) -> str:
+    """Quoted strong ETag over `parts`, which must be JSON-serializable (dates allowed)."""
+    text = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return '"' + hashlib.sha256(text.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def chart_cache_control(until_midnight: bool = False) -> str:
+    """
+    Cache-Control for a chart. A chart with its as-of date pinned never
+    changes; one whose current 大運 / 流年 are taken at today's date
+    (`until_midnight`) is only fresh until midnight, server time.
+    """
+    max_age = settings.CHART_CACHE_MAX_AGE_SECONDS
+    if until_midnight:
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        max_age = min(max_age, int((midnight - now).total_seconds()))
+    return f"public, max-age={max_age}"
+
+
+# Profiles belong to a user: never shared by caches, always revalidated
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+
+def not_modified(etag: str, cache_control: str, vary: Optional[str] = None) -> Response:
+    """304 carrying the headers a 200 would have had, per RFC 9110."""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, cache_control, vary)
+    return response
+
+
+def set_validators(response: Response, etag: str, cache_control: str, vary: Optional[str] = None) -> Response:
+    """Add ETag and Cache-Control (and Vary) to `response`."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if vary:
+        response.headers["Vary"] = vary
+    return response
@@ -1,13 +1,15 @@
-"""API Dependencies — DB session, current user, Bazi calculator singleton."""
+"""API Dependencies — DB session, current user, admin token, Bazi calculator singleton."""
 
 import os
+import secrets
 import sys
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.security import TokenError, decode_token
 from app.db.session import get_db
 from app.models.user import User
@@ -28,7 +30,11 @@ _HERE = os.path.dirname(__file__)
 sys.path.insert(0, os.path.join(_HERE, "..", "external", "bazi"))
 sys.path.insert(0, os.path.join(_HERE, ".."))
 
+from bazi.analysis_atlas import open_analysis_atlas  # noqa: E402
 from bazi.bazi_calculator import BaziCalculator  # noqa: E402
+from bazi.natal_cache import NatalCache  # noqa: E402
+from bazi.pillar_table import open_pillar_table  # noqa: E402
+from bazi.reverse_index import open_reverse_index  # noqa: E402
 
 from app.ziwei import ZiweiCalculator  # noqa: E402
 
@@ -43,7 +49,15 @@ def get_calculator() -> BaziCalculator:
     """Return the shared BaziCalculator singleton."""
     global _calculator_instance
     if _calculator_instance is None:
-        _calculator_instance = BaziCalculator()
+        _calculator_instance = BaziCalculator(
+            pillar_table=open_pillar_table(settings.BAZI_PILLAR_TABLE_PATH or None),
+            natal_cache=NatalCache(
+                max_entries=settings.BAZI_CACHE_MAX_ENTRIES,
+                max_bytes=settings.BAZI_CACHE_MAX_MB * 1024 * 1024,
+            ),
+            analysis_atlas=open_analysis_atlas(settings.BAZI_ANALYSIS_ATLAS_PATH or None),
+            reverse_index=open_reverse_index(settings.BAZI_REVERSE_INDEX_PATH or None),
+        )
     return _calculator_instance
 
 
@@ -51,7 +65,9 @@ def get_ziwei_calculator() -> ZiweiCalculator:
     """Return the shared ZiweiCalculator singleton."""
     global _ziwei_calculator_instance
     if _ziwei_calculator_instance is None:
-        _ziwei_calculator_instance = ZiweiCalculator()
+        _ziwei_calculator_instance = ZiweiCalculator(
+            natal_cache=NatalCache(max_entries=settings.ZIWEI_CACHE_MAX_ENTRIES, max_bytes=0),
+        )
     return _ziwei_calculator_instance
 
 
@@ -82,3 +98,11 @@ def get_current_user(
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="user not found")
     return user
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """FastAPI dependency guarding /api/admin/*: X-Admin-Token must match ADMIN_TOKEN."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="admin endpoints disabled")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="invalid admin token")
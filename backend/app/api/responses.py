@@ -0,0 +1,211 @@
+"""Fast response path for chart endpoints.
+
+Returning a model from a route with `response_model` costs two pydantic
+passes: the route builds `BaziResponse(**result)`, then FastAPI dumps it to a
+dict, validates that dict against the response model again and serializes it
+through `jsonable_encoder` and `json.dumps`. A chart with every 大運 and 流年
+is a few thousand nested fields, so that second pass is most of the time spent
+outside the calculator.
+
+`chart_response` validates the calculator's dict once and serializes the
+validated model straight to bytes with pydantic-core's JSON encoder. FastAPI
+passes a returned `Response` through untouched, so routes keep
+`response_model` for the OpenAPI schema only. `scripts/bench_serialize.py`
+compares both paths.
+
+The encoding follows the request's Accept header (`negotiate`):
+
+    application/json                        the response model, as before
+    application/msgpack                     the same document in MessagePack
+    either, with ;layout=columnar           every 大運 / 流年 list turned into
+                                            {field: [value per entry]}
+
+msgpack and columnar payloads are schema CHART_SCHEMA_VERSION, stated in the
+response Content-Type (`application/msgpack; schema=1`). A client may pin it
+with `schema=` in Accept and gets 406 once that version is no longer served.
+Bump the version whenever the encoded shape changes other than by adding
+fields.
+
+A request's `fields` selects part of the response model (`palaces.name`
+reaching into a list of models); the chart is validated and encoded against
+a model with only those fields, built once per selection.
+"""
+
+import copy
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type, get_args
+
+import msgpack
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter, create_model
+from pydantic_core import to_json
+
+from app.schemas import DayunEntry, LiunianEntry
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+# Version of the msgpack / columnar encodings (see module docstring)
+CHART_SCHEMA_VERSION = 1
+
+# Accept media types served, by their canonical type
+_MEDIA_TYPES = {JSON: JSON, MSGPACK: MSGPACK, "application/x-msgpack": MSGPACK}
+
+# OpenAPI `responses` entry for routes using chart_response
+CHART_RESPONSES: Dict[Any, Dict[str, Any]] = {
+    200: {"content": {MSGPACK: {}}, "description": f"JSON, or MessagePack (schema {CHART_SCHEMA_VERSION}) by Accept"},
+}
+
+_DAYUN_FIELDS = tuple(DayunEntry.model_fields)
+_LIUNIAN_FIELDS = tuple(LiunianEntry.model_fields)
+
+
+class ChartEncoding(NamedTuple):
+    """How a chart response is encoded."""
+
+    media_type: str = JSON
+    columnar: bool = False
+
+    @property
+    def content_type(self) -> str:
+        if self.media_type == JSON and not self.columnar:
+            return JSON
+        content_type = f"{self.media_type}; schema={CHART_SCHEMA_VERSION}"
+        return f"{content_type}; layout=columnar" if self.columnar else content_type
+
+
+def negotiate(accept: Optional[str]) -> ChartEncoding:
+    """
+    Pick the encoding for an Accept header.
+
+    The served type with the highest q wins, ties going to the one listed
+    first; `*/*`, `application/*` and types not served fall back to JSON.
+
+    Raises:
+        HTTPException: 406 if the chosen type pins a `schema` other than
+            CHART_SCHEMA_VERSION, or `layout` is not rows / columnar
+    """
+    best, best_q = None, 0.0
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        options = dict(p.partition("=")[::2] for p in params if "=" in p)
+        options = {k.strip().lower(): v.strip().strip('"') for k, v in options.items()}
+        try:
+            q = float(options.pop("q", 1))
+        except ValueError:
+            continue
+        served = _MEDIA_TYPES.get(media_type.lower())
+        if served is not None and q > best_q:
+            best, best_q = (served, options), q
+    if best is None:
+        return ChartEncoding()
+
+    media_type, options = best
+    if options.get("schema", str(CHART_SCHEMA_VERSION)) != str(CHART_SCHEMA_VERSION):
+        raise _not_acceptable(f"Chart schema {options['schema']} is not served; the current one is {CHART_SCHEMA_VERSION}")
+    layout = options.get("layout", "rows")
+    if layout not in ("rows", "columnar"):
+        raise _not_acceptable(f"layout must be rows or columnar, got {layout!r}")
+    return ChartEncoding(media_type, layout == "columnar")
+
+
+def _not_acceptable(message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        detail={"error": "Not acceptable", "message": message},
+    )
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+@lru_cache(maxsize=256)
+def _subset_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    `model` with only `fields`, in `model` order. A dotted `name.field`
+    keeps `field` of the model a list field `name` holds.
+    """
+    nested: Dict[str, List[str]] = {}
+    for path in fields:
+        name, _, rest = path.partition(".")
+        nested.setdefault(name, [])
+        if rest:
+            nested[name].append(rest)
+
+    definitions = {}
+    for name, info in model.model_fields.items():
+        if name not in nested:
+            continue
+        annotation = info.annotation
+        if nested[name]:
+            (item,) = get_args(annotation)
+            annotation = List[_subset_model(item, tuple(nested[name]))]
+        definitions[name] = (annotation, copy.copy(info))
+    return create_model(f"{model.__name__}Subset", __doc__=model.__doc__, **definitions)
+
+
+def _columns(rows: List[Dict[str, Any]], fields: tuple) -> Dict[str, List[Any]]:
+    return {field: [row[field] for row in rows] for field in fields}
+
+
+def to_columnar(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Columnar layout of a dumped chart: `dayun` (also inside each hour_unknown
+    variant) becomes {field: [value per 大運]}, and the 流年 list of each 大運
+    becomes {field: [value per 流年]} in the same way. Other fields, and
+    charts without a 大運 list (紫微斗數), are unchanged.
+    """
+    if "variants" in data:
+        return {**data, "variants": [to_columnar(variant) for variant in data["variants"]]}
+    if "dayun" not in data:
+        return data
+    dayun = [{**entry, "liunian": _columns(entry["liunian"], _LIUNIAN_FIELDS)} for entry in data["dayun"]]
+    return {**data, "dayun": _columns(dayun, _DAYUN_FIELDS)}
+
+
+def encode_chart(
+    model: Type[BaseModel],
+    result: Dict[str, Any],
+    encoding: ChartEncoding = ChartEncoding(),
+    fields: Optional[Sequence[str]] = None,
+) -> bytes:
+    """
+    Validate `result` as `model` and encode it.
+
+    The default JSON matches what FastAPI would send for `model(**result)`
+    under `response_model=model`: aliases applied, unset fields included,
+    non-ASCII text unescaped. Other encodings carry the same values.
+    With `fields` (a request's validated selection) `result` is validated
+    against, and holds, only those fields of `model`.
+
+    Raises:
+        pydantic.ValidationError: If `result` does not fit `model`
+    """
+    if fields is not None:
+        model = _subset_model(model, tuple(fields))
+    adapter = _adapter(model)
+    value = adapter.validate_python(result)
+    if encoding.media_type == JSON and not encoding.columnar:
+        return adapter.dump_json(value, by_alias=True)
+
+    data = adapter.dump_python(value, mode="json", by_alias=True)
+    if encoding.columnar:
+        data = to_columnar(data)
+    if encoding.media_type == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    return to_json(data)
+
+
+def chart_response(
+    model: Type[BaseModel],
+    result: Dict[str, Any],
+    encoding: ChartEncoding = ChartEncoding(),
+    fields: Optional[Sequence[str]] = None,
+) -> Response:
+    """`encode_chart` as a response in the negotiated media type."""
+    return Response(
+        content=encode_chart(model, result, encoding, fields),
+        headers={"Content-Type": encoding.content_type, "Vary": "Accept"},
+    )
@@ -2,13 +2,16 @@
 
 from fastapi import APIRouter
 
-from app.api.routes import ai, auth, bazi, health, profiles, ziwei
+from app.api.routes import admin, ai, auth, bazi, health, live, profiles, rectify, ziwei
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, tags=["Health"])
 api_router.include_router(bazi.router, prefix="/api", tags=["Bazi"])
 api_router.include_router(ziwei.router, prefix="/api", tags=["Ziwei"])
+api_router.include_router(rectify.router, prefix="/api", tags=["Rectify"])
+api_router.include_router(live.router, tags=["Live"])
 api_router.include_router(auth.router, prefix="/api", tags=["Auth"])
 api_router.include_router(profiles.router, prefix="/api", tags=["Profiles"])
 api_router.include_router(ai.router, prefix="/api", tags=["AI"])
+api_router.include_router(admin.router, prefix="/api", tags=["Admin"])
@@ -0,0 +1,27 @@
+"""Operator endpoints. All require the X-Admin-Token header (see ADMIN_TOKEN)."""
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_calculator, get_ziwei_calculator, require_admin
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.delete("/cache/natal")
+def clear_natal_cache() -> dict:
+    """
+    Drop every cached natal chart in this process, e.g. after changing rule
+    data without bumping CALCULATOR_VERSION. Counters are kept.
+
+    With COMPUTE_EXECUTOR=process each worker keeps its own cache, which this
+    does not reach.
+    """
+    cache = get_calculator().natal_cache
+    return {"cleared": cache.clear() if cache is not None else 0}
+
+
+@router.delete("/cache/ziwei")
+def clear_ziwei_cache() -> dict:
+    """Drop every cached 紫微斗數 chart in this process, as /cache/natal does for bazi."""
+    cache = get_ziwei_calculator().natal_cache
+    return {"cleared": cache.clear() if cache is not None else 0}
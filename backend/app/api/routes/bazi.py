@@ -7,16 +7,47 @@ This module provides the main API endpoints for Bazi calculation
 and AI-powered analysis.
 """
 
-from datetime import datetime
+import re
+from datetime import date, datetime
 
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Annotated, Optional, Union
 
-from app.schemas import BaziRequest, BaziResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+
+from app.api.conditional import chart_cache_control, etag_matches, not_modified, set_validators, strong_etag
 from app.api.deps import get_calculator
-from bazi.bazi_calculator import BaziCalculator
+from app.api.responses import CHART_RESPONSES, ChartEncoding, chart_response, negotiate
+from app.core.config import settings
+from app.schemas import (
+    BaziBatchRequest,
+    BaziBatchResponse,
+    BaziHourUnknownResponse,
+    BaziQuery,
+    BaziRequest,
+    BaziResponse,
+    DateSearchRequest,
+    DateSearchResponse,
+    DayunRange,
+    LiunianRequest,
+    LiunianResponse,
+    ReverseLookupRequest,
+    ReverseLookupResponse,
+)
+from app.services import batch_service, compute_service
+# bazi.* resolves through the sys.path entries app.api.deps installs
+from bazi.bazi_calculator import CALCULATOR_VERSION
 
 router = APIRouter()
 
+# Widest year range GET /bazi/liunian expands in one call
+LIUNIAN_MAX_YEARS = 120
+
+# Widest date range POST /bazi/date-search scans in one call
+DATE_SEARCH_MAX_YEARS = 100
+
+# Separators allowed between the pillars of GET /bazi/reverse
+_PILLAR_SEPARATORS = re.compile(r"[\s,，、/|]+")
+
 
 def _is_valid_date(year: int, month: int, day: int) -> bool:
     """
@@ -37,24 +68,70 @@ def _is_valid_date(year: int, month: int, day: int) -> bool:
         return False
 
 
-@router.post("/bazi", response_model=BaziResponse)
-async def calculate_bazi(
-    request: BaziRequest,
-    calculator: BaziCalculator = Depends(get_calculator)
-):
+@router.post("/bazi", response_model=Union[BaziResponse, BaziHourUnknownResponse], responses=CHART_RESPONSES)
+async def calculate_bazi(request: BaziRequest, accept: Annotated[Optional[str], Header()] = None):
     """
     Calculate Bazi (八字) for given date and time.
     
+    The calculation runs on the shared compute executor, not the event loop.
+    The result is validated once and encoded directly (see api/responses.py);
+    `response_model` only documents it.
+    
     Args:
         request: Bazi calculation request with date/time parameters
-        calculator: Bazi calculator instance (injected)
+        accept: Accept header; application/msgpack and ;layout=columnar
+            select the other encodings (see api/responses.py)
         
     Returns:
-        BaziResponse: Complete Bazi calculation result
+        BaziResponse: Complete Bazi calculation result, or
+        BaziHourUnknownResponse with one variant per 時辰 if hour_unknown
         
     Raises:
-        HTTPException: If date is invalid or calculation fails
+        HTTPException: If date is invalid or calculation fails; 406 if
+            Accept pins an unserved chart schema; 503 with Retry-After if the
+            compute executor is saturated
+    """
+    return await _bazi_chart(request, negotiate(accept))
+
+
+@router.get("/bazi", response_model=Union[BaziResponse, BaziHourUnknownResponse], responses=CHART_RESPONSES)
+async def get_bazi(
+    query: Annotated[BaziQuery, Query()],
+    accept: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    POST /api/bazi as a cacheable GET, with dayun_range given as
+    dayun_offset / dayun_limit.
+
+    The response carries a strong ETag over the input, the as-of date (today
+    when as_of is omitted), CALCULATOR_VERSION and the encoding, and a
+    matching If-None-Match is answered with 304 before anything is
+    calculated (see api/conditional.py).
+
+    Raises:
+        HTTPException: As POST /api/bazi
     """
+    encoding = negotiate(accept)
+    request = BaziRequest(
+        **query.model_dump(exclude={"dayun_offset", "dayun_limit"}),
+        dayun_range=(
+            DayunRange(offset=query.dayun_offset, limit=query.dayun_limit)
+            if query.dayun_offset or query.dayun_limit is not None else None
+        ),
+    )
+    # Pin today so the chart and its ETag are taken at the same date
+    request = request.model_copy(update={"as_of": request.as_of or date.today()})
+
+    etag = strong_etag("bazi", CALCULATOR_VERSION, encoding.content_type, request.model_dump(mode="json"))
+    cache_control = chart_cache_control(until_midnight=query.as_of is None)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_control, "Accept")
+    return set_validators(await _bazi_chart(request, encoding), etag, cache_control)
+
+
+async def _bazi_chart(request: BaziRequest, encoding: ChartEncoding) -> Response:
+    """Calculate the chart (or hour_unknown variants) of `request` as a response in `encoding`."""
     try:
         # Validate date
         if not _is_valid_date(request.year, request.month, request.day):
@@ -66,18 +143,94 @@ async def calculate_bazi(
                 }
             )
 
+        options = dict(
+            year=request.year,
+            month=request.month,
+            day=request.day,
+            is_lunar=request.is_lunar,
+            is_leap_month=request.is_leap_month,
+            gender=request.gender,
+            as_of=request.as_of,
+            include_liunian=request.include_liunian,
+            dayun_range=(request.dayun_range.offset, request.dayun_range.limit) if request.dayun_range else None
+        )
+
+        if request.hour_unknown:
+            result = await compute_service.run(compute_service.bazi_chart_hour_unknown, **options)
+            return chart_response(BaziHourUnknownResponse, result, encoding)
+
         # Calculate bazi
-        result = calculator.calculate_bazi(
+        result = await compute_service.run(
+            compute_service.bazi_chart, hour=request.hour, fields=request.fields, **options
+        )
+
+        return chart_response(BaziResponse, result, encoding, request.fields)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Invalid input",
+                "message": str(e)
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Calculation failed",
+                "message": str(e)
+            }
+        )
+
+
+@router.get("/bazi/liunian", response_model=LiunianResponse)
+async def expand_liunian(request: Annotated[LiunianRequest, Query()]):
+    """
+    Expand 流年 (annual pillars) for a birth input over a year range.
+
+    Lets a client request `/api/bazi` with `include_liunian=none` or
+    `current` and fetch the years it actually shows on demand. Years past
+    the chart's last 大運 continue the 大運 sequence.
+
+    Raises:
+        HTTPException: 400 if the date or year range is invalid; 503 with
+            Retry-After if the compute executor is saturated
+    """
+    try:
+        if not _is_valid_date(request.year, request.month, request.day):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid date",
+                    "message": f"Date {request.year}-{request.month}-{request.day} is not valid"
+                }
+            )
+        if not 0 <= request.end_year - request.start_year < LIUNIAN_MAX_YEARS:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid range",
+                    "message": f"end_year must be from start_year to start_year + {LIUNIAN_MAX_YEARS - 1}"
+                }
+            )
+
+        liunian = await compute_service.run(
+            compute_service.bazi_liunian,
             year=request.year,
             month=request.month,
             day=request.day,
             hour=request.hour,
             is_lunar=request.is_lunar,
             is_leap_month=request.is_leap_month,
-            gender=request.gender
+            gender=request.gender,
+            start_year=request.start_year,
+            end_year=request.end_year
         )
 
-        return BaziResponse(**result)
+        return LiunianResponse(start_year=request.start_year, end_year=request.end_year, liunian=liunian)
 
     except ValueError as e:
         raise HTTPException(
@@ -99,3 +252,149 @@ async def calculate_bazi(
         )
 
 
+@router.get("/bazi/reverse", response_model=ReverseLookupResponse)
+async def reverse_lookup(request: Annotated[ReverseLookupRequest, Query()]):
+    """
+    Find the solar dates and hours (1900-2100) whose chart has the given
+    four pillars.
+
+    With the reverse index built (scripts/build_reverse_index.py) this is a
+    memory-mapped lookup answered inline; without it the range is scanned
+    on the compute pool.
+
+    Raises:
+        HTTPException: 400 if `pillars` is not four 甲子 pillars; 503 with
+            Retry-After if the compute executor is saturated
+    """
+    text = _PILLAR_SEPARATORS.sub("", request.pillars)
+    pillars = [text[i:i + 2] for i in range(0, len(text), 2)]
+    try:
+        if len(text) != 8:
+            raise ValueError(f"expected four pillars of two characters each, got {request.pillars!r}")
+
+        calculator = get_calculator()
+        lookup = dict(zip(("year_ganzhi", "month_ganzhi", "day_ganzhi", "hour_ganzhi"), pillars))
+        if calculator.reverse_index is not None:
+            result = calculator.reverse_lookup(**lookup)
+        else:
+            result = await compute_service.run(compute_service.bazi_reverse_lookup, **lookup)
+
+        return ReverseLookupResponse(pillars=pillars, total=len(result["slots"]), **result)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Invalid pillars",
+                "message": str(e)
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Lookup failed",
+                "message": str(e)
+            }
+        )
+
+
+@router.post("/bazi/date-search", response_model=DateSearchResponse)
+async def search_dates(request: DateSearchRequest):
+    """
+    擇日: find days, months or years whose pillar forms the requested
+    relations (三合, 六合, 六沖, 天剋地沖, 天乙貴人) with the natal chart.
+
+    Pillars are computed arithmetically and matched with NumPy over the
+    whole range (see bazi/date_search.py), so decades of days scan in
+    milliseconds.
+
+    Raises:
+        HTTPException: 400 if the birth date or date range is invalid; 503
+            with Retry-After if the compute executor is saturated
+    """
+    try:
+        if not _is_valid_date(request.year, request.month, request.day):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid date",
+                    "message": f"Date {request.year}-{request.month}-{request.day} is not valid"
+                }
+            )
+        if not 0 <= request.end_date.year - request.start_date.year < DATE_SEARCH_MAX_YEARS or request.end_date < request.start_date:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid range",
+                    "message": f"end_date must be on or after start_date and within {DATE_SEARCH_MAX_YEARS} calendar years of it"
+                }
+            )
+
+        total, matches = await compute_service.run(
+            compute_service.bazi_date_search,
+            year=request.year,
+            month=request.month,
+            day=request.day,
+            hour=request.hour,
+            is_lunar=request.is_lunar,
+            is_leap_month=request.is_leap_month,
+            gender=request.gender,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            scope=request.scope,
+            rules=request.rules,
+            targets=request.targets,
+            match=request.match,
+            limit=request.limit
+        )
+
+        return DateSearchResponse(total=total, truncated=total > len(matches), matches=matches)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Invalid input",
+                "message": str(e)
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Calculation failed",
+                "message": str(e)
+            }
+        )
+
+
+@router.post("/bazi/batch", response_model=BaziBatchResponse)
+async def calculate_bazi_batch(request: BaziBatchRequest):
+    """
+    Calculate many Bazi charts in one call.
+
+    Items are spread over the batch process pool (see `BATCH_MAX_WORKERS`,
+    `BATCH_CHUNK_SIZE`). Results come back in input order; an item that
+    fails carries the error body /api/bazi would have returned instead of
+    failing the whole batch.
+
+    Raises:
+        HTTPException: 400 if the batch exceeds `BATCH_MAX_ITEMS`
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Batch too large",
+                "message": f"At most {settings.BATCH_MAX_ITEMS} items per request, got {len(request.items)}"
+            }
+        )
+
+    results = await batch_service.run_batch(batch_service.bazi_chunk, request.items)
+    failed = sum(1 for item in results if item.error is not None)
+    return BaziBatchResponse(results=results, succeeded=len(results) - failed, failed=failed)
@@ -11,7 +11,10 @@ from datetime import datetime
 
 from fastapi import APIRouter
 
+from app.api.deps import get_calculator, get_ziwei_calculator
+from app.core import compression
 from app.core.config import settings
+from app.services import compute_service
 
 router = APIRouter()
 
@@ -30,3 +33,55 @@ async def health_check():
         "version": settings.APP_VERSION,
         "timestamp": datetime.now().isoformat()
     }
+
+
+@router.get("/health/compute")
+async def compute_health():
+    """
+    Compute executor metrics for sizing COMPUTE_MAX_WORKERS / COMPUTE_MAX_QUEUE.
+
+    Returns:
+        dict: Executor kind and limits, current in-flight calls and queue
+        depth, submitted / completed / rejected / timed-out counters, and
+        queue wait in milliseconds (avg, p50 and p95 of recent calls, max).
+    """
+    return compute_service.stats()
+
+
+@router.get("/health/cache")
+async def cache_health():
+    """
+    Natal chart cache metrics for sizing BAZI_CACHE_MAX_ENTRIES / BAZI_CACHE_MAX_MB.
+
+    Returns:
+        dict: Entry count and estimated bytes against their limits, and
+        hit / miss / eviction counters with the hit rate since startup.
+    """
+    cache = get_calculator().natal_cache
+    return cache.stats() if cache is not None else {}
+
+
+@router.get("/health/cache/ziwei")
+async def ziwei_cache_health():
+    """
+    紫微斗數 chart cache metrics for sizing ZIWEI_CACHE_MAX_ENTRIES.
+
+    Returns:
+        dict: As /health/cache; bytes cover the localised fields, not the
+        iztro-py chart objects.
+    """
+    cache = get_ziwei_calculator().natal_cache
+    return cache.stats() if cache is not None else {}
+
+
+@router.get("/health/compression")
+async def compression_health():
+    """
+    Response compression metrics for tuning COMPRESSION_MIN_SIZE and levels.
+
+    Returns:
+        dict: Settings in effect; per algorithm the responses compressed,
+        bytes in / out / saved, ratio and CPU ms spent (also per MB in);
+        and skipped responses by reason (small, event_stream, ...).
+    """
+    return compression.stats()
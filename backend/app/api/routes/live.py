@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live chart endpoint for form editing over WebSocket.
+"""
+
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.schemas import BaziRequest
+from app.services import compute_service, live_chart_service
+
+router = APIRouter()
+
+
+def _error(error: str, message: str) -> dict:
+    return {"type": "error", "error": error, "message": message}
+
+
+@router.websocket("/ws/chart")
+async def live_chart(websocket: WebSocket):
+    """
+    Recompute a Bazi chart as the birth form is edited.
+
+    Each client message is a JSON object of BaziRequest fields; fields not
+    sent keep their previous value. The first valid message is answered
+    with {"type": "chart", "chart"} (a BaziResponse), later ones with
+    {"type": "patch", "scope", "patch"}: JSON Patch operations from the
+    chart last sent, recomputing only what the changed fields reach (see
+    live_chart_service). Invalid messages get {"type": "error", "error",
+    "message"} and leave the state as it was.
+    """
+    await websocket.accept()
+    state = None
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                fields = json.loads(text)
+                if not isinstance(fields, dict):
+                    raise ValueError("Expected a JSON object of /api/bazi fields")
+                request = BaziRequest(**{**(state.request if state else {}), **fields})
+                if request.hour_unknown:
+                    raise ValueError("hour_unknown is not supported on /ws/chart")
+                if request.fields is not None:
+                    raise ValueError("fields is not supported on /ws/chart")
+                if not request.is_lunar:
+                    try:
+                        datetime(request.year, request.month, request.day)
+                    except ValueError:
+                        raise ValueError(f"Date {request.year}-{request.month}-{request.day} is not valid")
+
+                state, message = await compute_service.run(
+                    live_chart_service.live_update, state, request.model_dump()
+                )
+            except ValidationError as e:
+                message = _error("Invalid input", "; ".join(
+                    f"{'.'.join(map(str, err['loc'])) or 'body'}: {err['msg']}" for err in e.errors()
+                ))
+            except ValueError as e:
+                message = _error("Invalid input", str(e))
+            except HTTPException as e:
+                message = {"type": "error", **e.detail}
+            except Exception as e:
+                message = _error("Calculation failed", str(e))
+            await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
@@ -2,9 +2,10 @@
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from app.api.conditional import PROFILE_CACHE_CONTROL, etag_matches, not_modified, set_validators, strong_etag
 from app.api.deps import get_current_user
 from app.db.session import get_db
 from app.models.user import User
@@ -34,12 +35,19 @@ def create_profile(
 @router.get("/{profile_id}", response_model=ProfileRead)
 def get_profile(
     profile_id: UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> ProfileRead:
+    """The profile, with an ETag from its updated_at; 304 when If-None-Match still matches."""
     profile = profile_service.get_for_user(db, current_user.id, profile_id)
     if profile is None:
         raise HTTPException(status_code=404, detail="profile not found")
+    etag = strong_etag("profile", profile.id, profile.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PROFILE_CACHE_CONTROL)
+    set_validators(response, etag, PROFILE_CACHE_CONTROL)
     return profile
 
 
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Birth-time rectification endpoint.
+"""
+
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException
+
+from app.schemas import RectifyRequest, RectifyResponse
+from app.services import compute_service
+
+router = APIRouter()
+
+# Most events one POST /rectify scores
+RECTIFY_MAX_EVENTS = 500
+
+
+@router.post("/rectify", response_model=RectifyResponse)
+async def rectify(request: RectifyRequest):
+    """
+    Rank the candidate 時辰 of a birth date by how well dated life events
+    fit each one's 八字 (流年 / 大運 relations, 交運) and 紫微斗數 (大限 /
+    流年 命宮) chart.
+
+    Candidate charts are cached per birth date and slot, so asking again
+    with other events only reruns the vectorized scoring.
+
+    Raises:
+        HTTPException: 400 on an invalid date, too many events, an empty
+            hour window or an event before the birth year; 503 with
+            Retry-After if the compute executor is saturated
+    """
+    try:
+        if not request.is_lunar:
+            try:
+                datetime(request.year, request.month, request.day)
+            except ValueError:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "error": "Invalid date",
+                        "message": f"Date {request.year}-{request.month}-{request.day} is not valid",
+                    },
+                )
+        if len(request.events) > RECTIFY_MAX_EVENTS:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Too many events",
+                    "message": f"At most {RECTIFY_MAX_EVENTS} events per request, got {len(request.events)}",
+                },
+            )
+
+        result = await compute_service.run(
+            compute_service.rectify,
+            year=request.year,
+            month=request.month,
+            day=request.day,
+            events=[event.model_dump() for event in request.events],
+            is_lunar=request.is_lunar,
+            is_leap_month=request.is_leap_month,
+            gender=request.gender,
+            hour_start=request.hour_start,
+            hour_end=request.hour_end,
+        )
+
+        return RectifyResponse(**result)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid input", "message": str(e)},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Calculation failed", "message": str(e)},
+        )
@@ -5,15 +5,35 @@ Zi Wei Dou Shu (紫微斗數) chart endpoint.
 """
 
 from datetime import datetime
+from typing import Annotated, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 
-from app.api.deps import get_ziwei_calculator
-from app.schemas import ZiweiRequest, ZiweiResponse
-from app.ziwei import ZiweiCalculator
+from app.api.conditional import chart_cache_control, etag_matches, not_modified, set_validators, strong_etag
+from app.api.responses import CHART_RESPONSES, ChartEncoding, chart_response, negotiate
+from app.core.config import settings
+from app.schemas import (
+    ZiweiBatchRequest,
+    ZiweiBatchResponse,
+    ZiweiHoroscopeRequest,
+    ZiweiHoroscopeResponse,
+    ZiweiHourUnknownResponse,
+    ZiweiRequest,
+    ZiweiResponse,
+    ZiweiTimelineRequest,
+    ZiweiTimelineResponse,
+)
+from app.services import batch_service, compute_service
+from app.ziwei.ziwei_calculator import CALCULATOR_VERSION
 
 router = APIRouter()
 
+# Most dates POST /ziwei/horoscope resolves in one call
+HOROSCOPE_MAX_DATES = 366
+
+# Widest range POST /ziwei/timeline covers in one call, in years, per granularity
+TIMELINE_MAX_YEARS = {"decadal": 120, "yearly": 120, "monthly": 20, "daily": 1}
+
 
 def _is_valid_date(year: int, month: int, day: int) -> bool:
     """Return True if the given year/month/day is a real calendar date."""
@@ -24,20 +44,49 @@ def _is_valid_date(year: int, month: int, day: int) -> bool:
         return False
 
 
-@router.post("/ziwei", response_model=ZiweiResponse)
-async def calculate_ziwei(
-    request: ZiweiRequest,
-    calculator: ZiweiCalculator = Depends(get_ziwei_calculator),
-):
+@router.post("/ziwei", response_model=Union[ZiweiResponse, ZiweiHourUnknownResponse], responses=CHART_RESPONSES)
+async def calculate_ziwei(request: ZiweiRequest, accept: Annotated[Optional[str], Header()] = None):
     """
     Calculate a 紫微斗數 chart for the given birth data.
 
     Returns the twelve palaces with their stars, 四化, 大限 and 小限 anchors,
-    plus 運限 for `horoscope_date` when one is supplied.
+    plus 運限 for `horoscope_date` when one is supplied. With `hour_unknown`,
+    returns the chart of every 時辰 side by side instead.
 
     Note that `chinese_date` follows iztro's default 正月初一 year boundary,
     which differs from /api/bazi's 立春 boundary — see `year_divide`.
+
+    Runs on the shared compute executor; 503 with Retry-After when it is
+    saturated. The result is validated once and encoded directly, as JSON or
+    by Accept as MessagePack (see api/responses.py); 406 if Accept pins an
+    unserved chart schema. `fields` returns, and builds, only part of the
+    chart.
+    """
+    return await _ziwei_chart(request, negotiate(accept))
+
+
+@router.get("/ziwei", response_model=Union[ZiweiResponse, ZiweiHourUnknownResponse], responses=CHART_RESPONSES)
+async def get_ziwei(
+    request: Annotated[ZiweiRequest, Query()],
+    accept: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    POST /api/ziwei as a cacheable GET. A 紫微斗數 chart depends on nothing
+    but its input, so the strong ETag covers the input, CALCULATOR_VERSION
+    and the encoding, and a matching If-None-Match gets 304 before anything
+    is calculated (see api/conditional.py).
     """
+    encoding = negotiate(accept)
+    etag = strong_etag("ziwei", CALCULATOR_VERSION, encoding.content_type, request.model_dump(mode="json"))
+    cache_control = chart_cache_control()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_control, "Accept")
+    return set_validators(await _ziwei_chart(request, encoding), etag, cache_control)
+
+
+async def _ziwei_chart(request: ZiweiRequest, encoding: ChartEncoding) -> Response:
+    """Calculate the chart (or hour_unknown variants) of `request` as a response in `encoding`."""
     try:
         # A lunar day-30 in a 29-day month is only detectable downstream, so
         # this guard is for solar input; iztro-py raises ValueError otherwise.
@@ -52,11 +101,10 @@ async def calculate_ziwei(
                 },
             )
 
-        result = calculator.calculate(
+        options = dict(
             year=request.year,
             month=request.month,
             day=request.day,
-            hour=request.hour,
             is_lunar=request.is_lunar,
             is_leap_month=request.is_leap_month,
             gender=request.gender,
@@ -67,7 +115,149 @@ async def calculate_ziwei(
             ),
         )
 
-        return ZiweiResponse(**result)
+        if request.hour_unknown:
+            result = await compute_service.run(compute_service.ziwei_chart_hour_unknown, **options)
+            return chart_response(ZiweiHourUnknownResponse, result, encoding)
+
+        result = await compute_service.run(
+            compute_service.ziwei_chart, hour=request.hour, fields=request.fields, **options
+        )
+
+        return chart_response(ZiweiResponse, result, encoding, request.fields)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid input", "message": str(e)},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Calculation failed", "message": str(e)},
+        )
+
+
+@router.post("/ziwei/horoscope", response_model=ZiweiHoroscopeResponse, responses=CHART_RESPONSES)
+async def calculate_ziwei_horoscope(
+    request: ZiweiHoroscopeRequest, accept: Annotated[Optional[str], Header()] = None
+):
+    """
+    運限 of a chart at one or more dates, without the chart.
+
+    For a client that already has the chart from /api/ziwei and steps its
+    horoscope_date: the chart is built once per birth input, language and
+    fix_leap and kept in the calculator's cache, so each call only resolves
+    the dates. Encoded as /api/ziwei is (see api/responses.py).
+
+    Raises:
+        HTTPException: 400 if the birth date is invalid or more than
+            HOROSCOPE_MAX_DATES dates are given; 503 with Retry-After if the
+            compute executor is saturated
+    """
+    encoding = negotiate(accept)
+    try:
+        if len(request.dates) > HOROSCOPE_MAX_DATES:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Too many dates",
+                    "message": f"At most {HOROSCOPE_MAX_DATES} dates per request, got {len(request.dates)}",
+                },
+            )
+        if not request.is_lunar and not _is_valid_date(request.year, request.month, request.day):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid date",
+                    "message": f"Date {request.year}-{request.month}-{request.day} is not valid",
+                },
+            )
+
+        horoscopes = await compute_service.run(
+            compute_service.ziwei_horoscopes,
+            year=request.year,
+            month=request.month,
+            day=request.day,
+            hour=request.hour,
+            dates=[d.isoformat() for d in request.dates],
+            is_lunar=request.is_lunar,
+            is_leap_month=request.is_leap_month,
+            gender=request.gender,
+            language=request.language,
+            fix_leap=request.fix_leap,
+        )
+        return chart_response(ZiweiHoroscopeResponse, {"horoscopes": horoscopes}, encoding)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid input", "message": str(e)},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "Calculation failed", "message": str(e)},
+        )
+
+
+@router.post("/ziwei/timeline", response_model=ZiweiTimelineResponse, responses=CHART_RESPONSES)
+async def calculate_ziwei_timeline(
+    request: ZiweiTimelineRequest, accept: Annotated[Optional[str], Header()] = None
+):
+    """
+    Every 運限 scope of a chart from `start` to `end`, down to `granularity`.
+
+    One chart build (from the calculator's cache when it is there) serves
+    the whole range. Each scope is listed once per run of consecutive dates
+    sharing it, e.g. one 大限 for a decade, and `entries` refer to scopes by
+    position, one entry per date on which something changes. Encoded as
+    /api/ziwei is (see api/responses.py).
+
+    Raises:
+        HTTPException: 400 if the birth date is invalid or the range is wider
+            than TIMELINE_MAX_YEARS allows for the granularity; 503 with
+            Retry-After if the compute executor is saturated
+    """
+    encoding = negotiate(accept)
+    try:
+        max_years = TIMELINE_MAX_YEARS[request.granularity]
+        if (request.end - request.start).days >= max_years * 366:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Range too wide",
+                    "message": f"At most {max_years} year(s) per {request.granularity} timeline",
+                },
+            )
+        if not request.is_lunar and not _is_valid_date(request.year, request.month, request.day):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid date",
+                    "message": f"Date {request.year}-{request.month}-{request.day} is not valid",
+                },
+            )
+
+        result = await compute_service.run(
+            compute_service.ziwei_timeline,
+            year=request.year,
+            month=request.month,
+            day=request.day,
+            hour=request.hour,
+            start=request.start,
+            end=request.end,
+            granularity=request.granularity,
+            is_lunar=request.is_lunar,
+            is_leap_month=request.is_leap_month,
+            gender=request.gender,
+            language=request.language,
+            fix_leap=request.fix_leap,
+        )
+        return chart_response(ZiweiTimelineResponse, result, encoding)
 
     except ValueError as e:
         raise HTTPException(
@@ -81,3 +271,25 @@ async def calculate_ziwei(
             status_code=500,
             detail={"error": "Calculation failed", "message": str(e)},
         )
+
+
+@router.post("/ziwei/batch", response_model=ZiweiBatchResponse)
+async def calculate_ziwei_batch(request: ZiweiBatchRequest):
+    """
+    Calculate many 紫微斗數 charts in one call.
+
+    Same contract as /api/bazi/batch: input order is kept and each failed
+    item carries the error body /api/ziwei would have returned.
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Batch too large",
+                "message": f"At most {settings.BATCH_MAX_ITEMS} items per request, got {len(request.items)}",
+            },
+        )
+
+    results = await batch_service.run_batch(batch_service.ziwei_chunk, request.items)
+    failed = sum(1 for item in results if item.error is not None)
+    return ZiweiBatchResponse(results=results, succeeded=len(results) - failed, failed=failed)
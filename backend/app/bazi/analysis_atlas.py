@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped analysis atlas.
+
+The chart analysis (wuxing scores, root analysis, strength, ten deity
+distribution, 拱 / 夾, special stars) and the natal 神煞 depend only on the
+four pillars. Month stems follow from year stems and hour stems from day
+stems, so there are only CHARTS = 60 × 12 × 60 × 12 = 518,400 charts
+(see `ganzhi_codes.chart_number`). `scripts/build_analysis_atlas.py`
+computes `analyze_chart` for every one of them and stores the result
+column by column:
+
+    header     magic, version, rules, chart count, layout length
+    layout     JSON: column offsets, byte order, vocabularies
+    columns    one contiguous array per field, `count` values per chart
+
+Small-int fields (scores, ten deity codes, the strength flag) are stored
+as they are. Strings, lists and dicts (root analysis, 拱 / 夾 list, special
+stars, 神煞 lists) are interned: their column holds an index into a
+vocabulary of the distinct values, which the reader freezes once (see
+natal_cache.py) and shares between charts.
+
+Charts outside the atlas (晚子時, or an atlas built with a limit) return
+None from `lookup`; the calculator then calls `analyze_chart` itself.
+
+`rules` is a CRC32 of the sources analyze_chart's output follows from
+(RULE_MODULES: the rule tables and the functions reading them). Editing
+any of them leaves a built atlas stale; `open_analysis_atlas` then ignores
+it and every chart is analysed directly until the atlas is rebuilt.
+"""
+
+import importlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from bazi.bazi_functions import (
+    analyze_special_stars, calculate_ten_deities, calculate_wuxing_scores, check_day_master_strength, get_gen, get_gong,
+)
+from bazi.ganzhi_codes import CHARTS, ZHI, chart_number
+from bazi.natal_cache import freeze
+from bazi.shensha import natal_shensha
+
+MAGIC = b"BZAT"
+VERSION = 2
+
+# Modules besides this one whose tables and code decide analyze_chart's output
+RULE_MODULES = (
+    "external.bazi.datas",
+    "external.bazi.ganzhi",
+    "bazi.bazi_data",
+    "bazi.ganzhi_codes",
+    "bazi.bazi_functions",
+    "bazi.shensha",
+)
+
+# magic, version, rules, number of charts, layout JSON length
+HEADER = struct.Struct("<4sHIII")
+# The leading HEADER fields that say whether an atlas is current
+STAMP = struct.Struct("<4sHI")
+# Columns start on this boundary
+ALIGN = 8
+
+# Small-int columns: (name, array typecode, values per chart)
+NUMERIC_COLUMNS = (
+    ("wuxing_scores", "B", 5),
+    ("gan_scores", "B", 10),
+    ("is_strong", "B", 1),
+    ("gan_gods", "B", 4),
+    ("zhi_gods", "B", 4),
+)
+# Interned columns: (name, values per chart); shensha holds one list per pillar
+VOCABULARY_COLUMNS = (
+    ("root_analysis", 1),
+    ("gong_combinations", 1),
+    ("special_stars", 1),
+    ("shensha", 4),
+)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "analysis_atlas.bin")
+
+
+class ChartAnalysis(NamedTuple):
+    """Everything the natal analysis and 神煞 read from a chart's pillars."""
+
+    # Element scores in ELEMENTS order, stem scores in GAN order
+    wuxing_scores: Tuple[int, ...]
+    gan_scores: Tuple[int, ...]
+    root_analysis: str
+    is_strong: bool
+    # Ten deity codes of the four stems and of each branch's main qi
+    gan_gods: Tuple[int, ...]
+    zhi_gods: Tuple[int, ...]
+    gong_combinations: List[str]
+    special_stars: Dict[str, Dict[str, str]]
+    # {"year": [...], "month": [...], "day": [...], "time": [...]}
+    shensha: Dict[str, List[str]]
+
+
+def analyze_chart(gans, zhis) -> ChartAnalysis:
+    """Compute a chart's ChartAnalysis directly; the atlas stores this for every chart."""
+    day_master = gans[2]
+    scores, stem_scores = calculate_wuxing_scores(gans, zhis)
+    gan_gods, zhi_gods = calculate_ten_deities(gans, zhis, day_master)
+    try:
+        gong_combinations = [ZHI[z] for z in get_gong(zhis)]
+    except Exception:
+        gong_combinations = []
+    return ChartAnalysis(
+        wuxing_scores=tuple(scores),
+        gan_scores=tuple(stem_scores),
+        root_analysis=get_gen(day_master, zhis),
+        is_strong=check_day_master_strength(zhis, day_master),
+        gan_gods=tuple(gan_gods),
+        zhi_gods=tuple(zhi_gods),
+        gong_combinations=gong_combinations,
+        special_stars=analyze_special_stars(gans, zhis, day_master),
+        shensha=natal_shensha(gans, zhis),
+    )
+
+
+def _rules_digest() -> int:
+    """CRC32 of the RULE_MODULES sources and of this file."""
+    crc = 0
+    paths = [importlib.import_module(name).__file__ for name in RULE_MODULES] + [__file__]
+    for path in paths:
+        with open(path, "rb") as f:
+            crc = zlib.crc32(f.read(), crc)
+    return crc
+
+
+RULES = _rules_digest()
+
+
+def _index_typecode(size: int) -> str:
+    return "H" if size <= 0xFFFF else "I"
+
+
+class AnalysisAtlas:
+    """Read-only view over a built analysis atlas file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+        magic, version, _, charts, layout_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or charts > CHARTS:
+            self.close()
+            raise ValueError(f"{path} is not a v{VERSION} analysis atlas")
+        layout = json.loads(bytes(self._mm[HEADER.size:HEADER.size + layout_size]))
+        if layout["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path} was built on a {layout['byteorder']}-endian machine")
+        if len(self._mm) != layout["size"]:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+        self.num_charts = charts
+        self._columns = {}
+        whole = memoryview(self._mm)
+        self._views.append(whole)
+        for name, (typecode, offset, nbytes) in layout["columns"].items():
+            view = whole[offset:offset + nbytes].cast(typecode)
+            self._views.append(view)
+            self._columns[name] = view
+        self._vocabularies = {name: [freeze(value) for value in values] for name, values in layout["vocabularies"].items()}
+
+    def close(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.num_charts
+
+    def column(self, name: str) -> memoryview:
+        """A whole column as a flat memoryview, `count` values per chart."""
+        return self._columns[name]
+
+    def record(self, number: int) -> ChartAnalysis:
+        """ChartAnalysis of a chart number below len(self)."""
+        columns = self._columns
+        vocabularies = self._vocabularies
+        values = {}
+        for name, _, count in NUMERIC_COLUMNS:
+            start = number * count
+            values[name] = tuple(columns[name][start:start + count])
+        for name, count in VOCABULARY_COLUMNS:
+            vocabulary = vocabularies[name]
+            start = number * count
+            values[name] = [vocabulary[i] for i in columns[name][start:start + count]]
+        shensha = values["shensha"]
+        return ChartAnalysis(
+            wuxing_scores=values["wuxing_scores"],
+            gan_scores=values["gan_scores"],
+            root_analysis=values["root_analysis"][0],
+            is_strong=bool(values["is_strong"][0]),
+            gan_gods=values["gan_gods"],
+            zhi_gods=values["zhi_gods"],
+            gong_combinations=values["gong_combinations"][0],
+            special_stars=values["special_stars"][0],
+            shensha={"year": shensha[0], "month": shensha[1], "day": shensha[2], "time": shensha[3]},
+        )
+
+    def lookup(self, gans, zhis) -> Optional[ChartAnalysis]:
+        """ChartAnalysis of a chart, or None when the atlas does not hold it."""
+        number = chart_number(gans, zhis)
+        if number is None or number >= self.num_charts:
+            return None
+        return self.record(number)
+
+
+def write_atlas(path: str, records) -> int:
+    """
+    Write `records` (ChartAnalysis for chart numbers 0, 1, ... in order) to
+    `path`. Returns the number of charts written.
+    """
+    numeric = {name: array(typecode) for name, typecode, _ in NUMERIC_COLUMNS}
+    interned: Dict[str, Dict[str, int]] = {name: {} for name, _ in VOCABULARY_COLUMNS}
+    indices: Dict[str, List[int]] = {name: [] for name, _ in VOCABULARY_COLUMNS}
+
+    charts = 0
+    for record in records:
+        charts += 1
+        numeric["wuxing_scores"].extend(record.wuxing_scores)
+        numeric["gan_scores"].extend(record.gan_scores)
+        numeric["is_strong"].append(int(record.is_strong))
+        numeric["gan_gods"].extend(record.gan_gods)
+        numeric["zhi_gods"].extend(record.zhi_gods)
+        for name, values in (
+            ("root_analysis", [record.root_analysis]),
+            ("gong_combinations", [record.gong_combinations]),
+            ("special_stars", [record.special_stars]),
+            ("shensha", [record.shensha[p] for p in ("year", "month", "day", "time")]),
+        ):
+            vocabulary = interned[name]
+            for value in values:
+                key = json.dumps(value, ensure_ascii=False)
+                indices[name].append(vocabulary.setdefault(key, len(vocabulary)))
+
+    arrays = dict(numeric)
+    for name, _ in VOCABULARY_COLUMNS:
+        arrays[name] = array(_index_typecode(len(interned[name])), indices[name])
+    vocabularies = {name: [json.loads(key) for key in interned[name]] for name, _ in VOCABULARY_COLUMNS}
+
+    # The layout records column offsets, which depend on the layout's own
+    # length; lay it out until that length stops changing.
+    layout_size = 0
+    while True:
+        offset = HEADER.size + layout_size
+        columns = {}
+        for name, data in arrays.items():
+            offset += -offset % ALIGN
+            nbytes = len(data) * data.itemsize
+            columns[name] = (data.typecode, offset, nbytes)
+            offset += nbytes
+        layout = json.dumps(
+            {"byteorder": sys.byteorder, "size": offset, "columns": columns, "vocabularies": vocabularies},
+            ensure_ascii=False,
+        ).encode()
+        if len(layout) == layout_size:
+            break
+        layout_size = len(layout)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RULES, charts, layout_size))
+        f.write(layout)
+        for name, data in arrays.items():
+            _, column_offset, _ = columns[name]
+            f.write(b"\0" * (column_offset - f.tell()))
+            data.tofile(f)
+    os.replace(tmp, path)
+    return charts
+
+
+def open_analysis_atlas(path: Optional[str] = None) -> Optional[AnalysisAtlas]:
+    """
+    Open the atlas at `path` (default: DEFAULT_PATH).
+
+    Returns None if the file has not been built, or was built from other
+    rules or in another format version (see RULES); the calculator then
+    analyses every chart directly, with identical output.
+    """
+    path = path or DEFAULT_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        stamp = f.read(STAMP.size)
+    if len(stamp) == STAMP.size:
+        magic, version, rules = STAMP.unpack(stamp)
+        if magic == MAGIC and (version, rules) != (VERSION, RULES):
+            return None
+    return AnalysisAtlas(path)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorized wuxing / ten deity scoring over batches of charts.
+
+`calculate_wuxing_scores`, `calculate_ten_deities` and
+`check_day_master_strength` in bazi_functions.py score one chart at a
+time. Bulk analytics and re-scoring jobs run them over millions of charts,
+so this module does the same arithmetic with NumPy on an (N, 8) array of
+codes, one chart per row:
+
+    year stem, month stem, day stem, hour stem,
+    year branch, month branch, day branch, hour branch
+
+(that is `(*gans, *zhis)`), using weight matrices compiled from the same
+ganzhi_codes tables (zhi5 hidden stem weights, gan5 elements) the scalar
+functions read. Results are integers and match the scalar functions
+exactly; tests/test_batch_scoring.py checks them against each other.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from bazi.bazi_functions import STRONG_STAGES
+from bazi.ganzhi_codes import (
+    BRANCH_LIFE_STAGE, GAN_ELEMENT, HIDDEN_STEMS, HIDDEN_WEIGHTS, HOUR_STEM, MAIN_STEM, MONTH_STEM, STEM_TEN_GOD,
+)
+
+# Every stem is worth 5 to its own score
+STEM_WEIGHTS = np.eye(10, dtype=np.int16) * 5
+# [branch, stem] → weight of the stem among the branch's 藏干
+BRANCH_WEIGHTS = np.zeros((12, 10), dtype=np.int16)
+for _zhi in range(12):
+    for _gan, _weight in zip(HIDDEN_STEMS[_zhi], HIDDEN_WEIGHTS[_zhi]):
+        BRANCH_WEIGHTS[_zhi, _gan] += _weight
+# [stem, element] → 1 where the stem belongs to the element
+STEM_ELEMENTS = np.zeros((10, 5), dtype=np.int16)
+STEM_ELEMENTS[np.arange(10), GAN_ELEMENT] = 1
+
+# [day master, stem] → 十神 code
+TEN_GODS = np.array(STEM_TEN_GOD, dtype=np.int8).reshape(10, 10)
+BRANCH_MAIN_STEM = np.array(MAIN_STEM, dtype=np.int8)
+# [day master, branch] → branch puts the day master at 長生, 臨官 or 帝旺
+STRONG_BRANCH = np.isin(np.array(BRANCH_LIFE_STAGE).reshape(10, 12), STRONG_STAGES)
+
+_MONTH_STEMS = np.array(MONTH_STEM, dtype=np.int8).reshape(10, 12)
+_HOUR_STEMS = np.array(HOUR_STEM, dtype=np.int8).reshape(10, 12)
+
+# Rows scored at a time, bounding the (rows, 4, 10) temporaries
+BLOCK_ROWS = 1 << 16
+
+
+class BatchScores(NamedTuple):
+    """Scores of N charts, row i for chart i."""
+
+    # (N, 5) element scores in ELEMENTS order, as calculate_wuxing_scores
+    wuxing_scores: np.ndarray
+    # (N, 10) stem scores in GAN order, as calculate_wuxing_scores
+    gan_scores: np.ndarray
+    # (N, 4) 十神 codes of the stems / of each branch's main qi, as calculate_ten_deities
+    gan_gods: np.ndarray
+    zhi_gods: np.ndarray
+    # (N, 10) occurrences of each 十神 code among the seven non-day-master
+    # positions: the analysis' deity_counts, by code
+    deity_counts: np.ndarray
+    # (N,) check_day_master_strength
+    is_strong: np.ndarray
+
+
+def score_charts(charts) -> BatchScores:
+    """
+    Score a batch of charts.
+
+    Args:
+        charts: (N, 8) integer array, or anything np.asarray turns into
+            one; columns as in the module docstring
+
+    Returns:
+        BatchScores
+    """
+    charts = np.asarray(charts)
+    if charts.ndim != 2 or charts.shape[1] != 8:
+        raise ValueError(f"expected an (N, 8) array of stem / branch codes, got shape {charts.shape}")
+    n = len(charts)
+    scores = BatchScores(
+        wuxing_scores=np.empty((n, 5), dtype=np.int16),
+        gan_scores=np.empty((n, 10), dtype=np.int16),
+        gan_gods=np.empty((n, 4), dtype=np.int8),
+        zhi_gods=np.empty((n, 4), dtype=np.int8),
+        deity_counts=np.empty((n, 10), dtype=np.int8),
+        is_strong=np.empty(n, dtype=bool),
+    )
+    for start in range(0, n, BLOCK_ROWS):
+        block = slice(start, start + BLOCK_ROWS)
+        _score_block(charts[block], *(out[block] for out in scores))
+    return scores
+
+
+def _score_block(charts, wuxing_scores, gan_scores, gan_gods, zhi_gods, deity_counts, is_strong) -> None:
+    gans = charts[:, :4].astype(np.intp)
+    zhis = charts[:, 4:].astype(np.intp)
+    day_master = gans[:, 2:3]
+
+    # The month branch counts twice, as in calculate_wuxing_scores
+    gan_scores[:] = (
+        STEM_WEIGHTS[gans].sum(axis=1, dtype=np.int16)
+        + BRANCH_WEIGHTS[zhis].sum(axis=1, dtype=np.int16)
+        + BRANCH_WEIGHTS[zhis[:, 1]]
+    )
+    np.matmul(gan_scores, STEM_ELEMENTS, out=wuxing_scores)
+
+    gan_gods[:] = TEN_GODS[day_master, gans]
+    zhi_gods[:] = TEN_GODS[day_master, BRANCH_MAIN_STEM[zhis]]
+    # Every position but the day master's own stem, counted per row
+    others = np.concatenate((gan_gods[:, [0, 1, 3]], zhi_gods), axis=1).astype(np.intp)
+    others += np.arange(len(charts))[:, None] * 10
+    deity_counts[:] = np.bincount(others.ravel(), minlength=len(charts) * 10).reshape(-1, 10)
+
+    is_strong[:] = STRONG_BRANCH[day_master, zhis].any(axis=1)
+
+
+def charts_from_numbers(numbers) -> np.ndarray:
+    """(N, 8) chart array for chart numbers (see ganzhi_codes.chart_number)."""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    rest, hour_zhi = np.divmod(numbers, 12)
+    rest, day = np.divmod(rest, 60)
+    year, month_zhi = np.divmod(rest, 12)
+    year_gan, day_gan = year % 10, day % 10
+    return np.stack(
+        (
+            year_gan, _MONTH_STEMS[year_gan, month_zhi], day_gan, _HOUR_STEMS[day_gan, hour_zhi],
+            year % 12, month_zhi, day % 12, hour_zhi,
+        ),
+        axis=1,
+    ).astype(np.int8)
@@ -3,14 +3,16 @@
 
 import os
 import sys
-from typing import Dict, Any, Optional, List, Tuple
-from datetime import datetime
+from typing import Dict, Any, Optional, List, Sequence, Tuple, Collection, FrozenSet
+from datetime import date
+from functools import partial
 import collections
 
 # Add the external bazi directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'external', 'bazi'))
 
 from lunar_python import Lunar, Solar
+from lunar_python.util import LunarUtil
 
 # Import from the bazi library and our safe wrapper
 try:
@@ -19,26 +21,105 @@ try:
     from external.bazi.ganzhi import *
     # Import from our safe wrapper instead of directly from bazi.py
     from bazi.bazi_functions import (
-        get_gen, gan_zhi_he, get_gong, is_ku, zhi_ku, gan_ke, jin_jiao,
-        calculate_wuxing_scores, calculate_ten_deities, check_day_master_strength,
-        get_nayin_for_ganzhi, get_empty_positions, analyze_special_stars, get_ten_deity, get_nayin, apply_shensha_rules, apply_shensha_other_rules, apply_xiao_er_guan_sha_rules,
-        apply_shensha_rules_with_certain_pillar,
+        get_nayin_for_ganzhi, get_empty_positions,
     )
+    from bazi.ganzhi_codes import (
+        ELEMENTS, GAN, GAN_CODE, GAN_ELEMENT,
+        JIAZI, JIAZI_CODE, TEN_GOD_NAME, ZHI, ZHI_CODE, jiazi,
+    )
+    from bazi.analysis_atlas import AnalysisAtlas, ChartAnalysis, analyze_chart
+    from bazi.date_search import search_dates
+    from bazi.dayun import dayun_period, dayun_skeleton
+    from bazi.natal_cache import FrozenDict, FrozenList, NatalCache
+    from bazi.pillar_details import PILLAR_DETAILS
+    from bazi.pillar_table import PillarSlot, PillarTable, hour_to_slot, slot_hours
+    from bazi.reverse_index import FIRST_YEAR, LAST_YEAR, ReverseIndex, scan
+    from bazi.shensha import HOUR_FREE_SHENSHA, child_shensha, pillar_shensha
 except ImportError as e:
     print(f"Error importing bazi modules: {e}")
     print("Make sure the bazi library is properly installed in external/bazi/")
     raise
 
+# Part of every natal cache key. Bump when calculate_natal output changes so
+# a chart computed by an older calculator is never served as current.
+CALCULATOR_VERSION = 1
+
+# include_liunian values accepted by apply_as_of
+LIUNIAN_MODES = ("all", "current", "none")
+
+# Natal pillar keys of a chart, year to hour
+PILLAR_KEYS = ("year_pillar", "month_pillar", "day_pillar", "hour_pillar")
+
+# Clock hour each 時辰 variant of calculate_bazi_hour_unknown is taken at:
+# 0 for 早子時, then the first hour of 丑 .. 亥
+HOUR_UNKNOWN_HOURS = tuple(slot_hours(slot)[0] for slot in range(12))
+# calculate_bazi fields every hour_unknown variant carries
+HOUR_VARIANT_KEYS = (
+    "hour_pillar", "dayun", "dayun_pillar", "liunian_pillar", "nayin", "empty_positions", "analysis",
+)
+
+# calculate_bazi fields, in BaziResponse order; `fields` selects among them
+CHART_FIELDS = PILLAR_KEYS + (
+    "dayun", "dayun_pillar", "liunian_pillar", "lunar_date", "solar_date", "nayin", "empty_positions", "analysis",
+)
+# calculate_natal fields, in order
+NATAL_KEYS = PILLAR_KEYS + ("dayun", "lunar_date", "solar_date", "nayin", "empty_positions", "analysis")
+# Chart fields read from the natal 大運 list
+DAYUN_FIELDS = frozenset(("dayun", "dayun_pillar", "liunian_pillar"))
+
+# Number of 大運 periods lunar_python's Yun.getDaYun() yields by default.
+DAYUN_COUNT = 10
+
+
+def check_fields(fields: Collection[str]) -> FrozenSet[str]:
+    """
+    `fields` as a frozenset of CHART_FIELDS.
+
+    Raises:
+        ValueError: If a field is not one of CHART_FIELDS, or none is given
+    """
+    unknown = [name for name in fields if name not in CHART_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown chart fields {', '.join(map(repr, unknown))}; choose from {', '.join(CHART_FIELDS)}")
+    if not fields:
+        raise ValueError("fields must name at least one chart field")
+    return frozenset(fields)
+
+
 class BaziCalculator:
     """
     Wrapper class for the bazi calculation library using safe functions from bazi_functions.py
     """
     
-    def __init__(self):
-        """Initialize the calculator"""
+    def __init__(
+        self,
+        pillar_table: Optional[PillarTable] = None,
+        natal_cache: Optional[NatalCache] = None,
+        analysis_atlas: Optional[AnalysisAtlas] = None,
+        reverse_index: Optional[ReverseIndex] = None,
+    ):
+        """
+        Initialize the calculator
+
+        Args:
+            pillar_table: Precomputed pillar table (see pillar_table.py). Solar
+                inputs it covers skip the lunar_python conversion; without
+                one every chart goes through lunar_python.
+            natal_cache: Cache for calculate_natal results (see
+                natal_cache.py); without one every call recomputes.
+            analysis_atlas: Precomputed analysis and 神煞 for every chart
+                (see analysis_atlas.py); without one they are computed
+                per chart.
+            reverse_index: Four pillars → birth slots index (see
+                reverse_index.py); without one reverse_lookup scans.
+        """
         # Define namedtuples for consistency (same as bazi.py)
         self.Gans = collections.namedtuple("Gans", "year month day time")
         self.Zhis = collections.namedtuple("Zhis", "year month day time")
+        self.pillar_table = pillar_table
+        self.natal_cache = natal_cache
+        self.analysis_atlas = analysis_atlas
+        self.reverse_index = reverse_index
     
     def calculate_bazi(
         self,
@@ -48,7 +129,11 @@ class BaziCalculator:
         hour: int,
         is_lunar: bool = False,
         is_leap_month: bool = False,
-        gender: str = "male"
+        gender: str = "male",
+        as_of: Optional[date] = None,
+        include_liunian: str = "all",
+        dayun_range: Optional[Tuple[int, Optional[int]]] = None,
+        fields: Optional[Collection[str]] = None
     ) -> Dict[str, Any]:
         """
         Calculate Bazi for given date and time using enhanced bazi functions
@@ -61,175 +146,488 @@ class BaziCalculator:
             is_lunar: Whether the input date is lunar calendar
             is_leap_month: Whether it's a leap month (only for lunar)
             gender: "male" or "female"
+            as_of: Date the current 大運 / 流年 and 小兒關煞 are taken at
+                (default: today)
+            include_liunian, dayun_range: How much of the 大運 list to
+                return; see apply_as_of
+            fields: CHART_FIELDS to return; None for all. Parts of the
+                chart only other fields need are not computed: without
+                DAYUN_FIELDS no 大運 list (nor lunar_python's Yun), without
+                analysis / nayin / empty_positions not those. A cached natal
+                chart is used when there is one; a partial one is not cached.
             
         Returns:
-            Dictionary containing complete bazi calculation results
+            Dictionary containing complete bazi calculation results, or
+            only `fields` of them
+
+        Raises:
+            ValueError: If the input is invalid or `fields` names an unknown field
         """
-        try:
-            
-            # Convert between solar and lunar calendar (same logic as bazi.py)
-            if is_lunar:
-                # Input is lunar, convert to solar
-                month_adj = month * -1 if is_leap_month else month
-                lunar = Lunar.fromYmdHms(year, month_adj, day, hour, 0, 0)
-                solar = lunar.getSolar()
-                lunar_date_str = f"{year}年{abs(month_adj)}月{day}日"
-                solar_date_str = f"{solar.getYear()}年{solar.getMonth()}月{solar.getDay()}日"
-            else:
-                # Input is solar, convert to lunar (same as bazi.py)
-                solar = Solar.fromYmdHms(year, month, day, hour, 0, 0)
-                lunar = solar.getLunar()
-                solar_date_str = f"{year}年{month}月{day}日"
-                lunar_date_str = f"{lunar.getYear()}年{lunar.getMonth()}月{lunar.getDay()}日"
-            
-            # Get eight characters (bazi) - same as bazi.py
-            ba = lunar.getEightChar()
-            
-            # Extract gan and zhi using same structure as bazi.py
-            gans = self.Gans(
-                year=ba.getYearGan(),
-                month=ba.getMonthGan(),
-                day=ba.getDayGan(),
-                time=ba.getTimeGan()
+        if fields is not None:
+            fields = check_fields(fields)
+        natal = self._natal(year, month, day, hour, is_lunar, is_leap_month, gender, fields=fields)
+        return self.apply_as_of(natal, year, as_of, include_liunian, dayun_range, fields)
+
+    def calculate_bazi_hour_unknown(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male",
+        as_of: Optional[date] = None,
+        include_liunian: str = "all",
+        dayun_range: Optional[Tuple[int, Optional[int]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Charts for a birth date whose hour is unknown: one variant per 時辰,
+        side by side, plus a three-pillar (三柱) analysis.
+
+        Each variant is the calculate_bazi result at HOUR_UNKNOWN_HOURS[i]
+        (早子時 for 子; 晚子時 takes the next day's hour stem and is left
+        out). Unless a 節 falls on the day, the date is converted once and
+        the hour pillars follow from the day stem (see
+        _hour_unknown_births); the 大運 periods are built once per 起運
+        year. The year / month / day pillars, their details and 神煞 are
+        built once and shared by every variant, and each variant's natal
+        chart goes through the natal cache, so a later calculate_bazi for
+        the real hour is a hit.
+
+        Args:
+            Same as calculate_bazi, without hour
+
+        Returns:
+            {"year_pillar", "month_pillar", "day_pillar", "lunar_date",
+            "solar_date", "three_pillar_analysis", "variants"}. The shared
+            pillars are the 子時 variant's; a variant repeats a pillar only
+            where it differs (a 節 during the birth day, or 小兒關煞 that
+            read the hour). Each variant holds "zhi", "hours" and the
+            calculate_bazi fields that depend on the hour.
+        """
+        shared_pillars: Dict[tuple, Dict[str, Any]] = {}
+        births = self._hour_unknown_births(year, month, day, is_lunar, is_leap_month, gender)
+        charts = [
+            self.apply_as_of(
+                self._natal(
+                    year, month, day, hour, is_lunar, is_leap_month, gender, shared_pillars,
+                    birth=None if births is None else births[slot]
+                ),
+                year, as_of, include_liunian, dayun_range
             )
-            
-            zhis = self.Zhis(
-                year=ba.getYearZhi(),
-                month=ba.getMonthZhi(),
-                day=ba.getDayZhi(),
-                time=ba.getTimeZhi()
+            for slot, hour in enumerate(HOUR_UNKNOWN_HOURS)
+        ]
+
+        first = charts[0]
+        shared = {key: first[key] for key in PILLAR_KEYS[:3]}
+        variants = []
+        for slot, chart in enumerate(charts):
+            variant = {"zhi": ZHI[slot], "hours": list(slot_hours(slot))}
+            variant.update((key, chart[key]) for key in PILLAR_KEYS[:3] if chart[key] != shared[key])
+            for key in HOUR_VARIANT_KEYS:
+                variant[key] = chart[key]
+            variants.append(variant)
+
+        gans, zhis = self._natal_codes(first)
+        return {
+            **shared,
+            "lunar_date": first["lunar_date"],
+            "solar_date": first["solar_date"],
+            "three_pillar_analysis": self._generate_comprehensive_analysis(
+                gans[:3], zhis[:3], gans.day, gender, analyze_chart(gans[:3], zhis[:3])
+            ),
+            "variants": variants,
+        }
+
+    def calculate_liunian(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male",
+        start_year: int = 0,
+        end_year: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        流年 entries for a birth input over an arbitrary year range, without
+        building the rest of the chart response.
+
+        Args:
+            year..gender: Same as calculate_bazi
+            start_year, end_year: Inclusive calendar year range
+
+        Returns:
+            See expand_liunian
+        """
+        natal = self.calculate_natal(year, month, day, hour, is_lunar, is_leap_month, gender)
+        return self.expand_liunian(natal, start_year, end_year)
+
+    def search_dates(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male",
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        scope: str = "day",
+        rules: Sequence[str] = ("liuchong",),
+        targets: Sequence[str] = ("day",),
+        match: str = "any",
+        limit: int = 500
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        擇日: days, months or years in a date range whose pillar meets
+        `rules` against this birth input's natal pillars.
+
+        Args:
+            year..gender: Same as calculate_bazi
+            start_date, end_date, scope, rules, targets, match, limit: See
+                date_search.search_dates
+
+        Returns:
+            (number of matches, the first `limit` of them)
+        """
+        natal = self.calculate_natal(year, month, day, hour, is_lunar, is_leap_month, gender)
+        gans, zhis = self._natal_codes(natal)
+        return search_dates(gans, zhis, start_date, end_date, scope, rules, targets, match, limit)
+
+    def reverse_lookup(
+        self,
+        year_ganzhi: str,
+        month_ganzhi: str,
+        day_ganzhi: str,
+        hour_ganzhi: str
+    ) -> Dict[str, Any]:
+        """
+        Solar dates and clock hours whose chart has the given four pillars.
+
+        Args:
+            year_ganzhi..hour_ganzhi: Pillars as in analyze_bazi (e.g. "甲子")
+
+        Returns:
+            {"first_year", "last_year", "slots": [{"solar_date", "hours"}]},
+            slots in date order; empty when the stems break 五虎遁 / 五鼠遁
+
+        Raises:
+            ValueError: A pillar is not one of the sixty 甲子
+        """
+        codes = []
+        for ganzhi in (year_ganzhi, month_ganzhi, day_ganzhi, hour_ganzhi):
+            if ganzhi not in JIAZI_CODE:
+                raise ValueError(f"{ganzhi!r} is not a 甲子 pillar")
+            codes.append(JIAZI_CODE[ganzhi])
+        gans = self.Gans(*(c % 10 for c in codes))
+        zhis = self.Zhis(*(c % 12 for c in codes))
+
+        if self.reverse_index is not None:
+            first_year, last_year = self.reverse_index.first_year, self.reverse_index.last_year
+            slots = self.reverse_index.lookup(gans, zhis)
+        else:
+            first_year, last_year = FIRST_YEAR, LAST_YEAR
+            slots = scan(gans, zhis, first_year, last_year)
+        return {
+            "first_year": first_year,
+            "last_year": last_year,
+            "slots": [{"solar_date": slot.date, "hours": list(slot.hours)} for slot in slots],
+        }
+
+    def calculate_natal(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male",
+        shared_pillars: Optional[Dict[tuple, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        The part of the chart fixed at birth: pillars, 大運 list, nayin,
+        空亡 and analysis. Nothing in it depends on the current date, so it
+        can be computed once per birth input and reused; `apply_as_of` adds
+        the date-dependent fields.
+
+        Pillar shensha here are the adult ones; 小兒關煞 are added by
+        `apply_as_of` while the person is under 11.
+
+        Args:
+            Same as calculate_bazi, without as_of
+            shared_pillars: Dict kept by the caller across calls for the same
+                birth date; year / month / day pillars are built once for
+                all hours (see _calculate_natal)
+
+        Returns:
+            The calculate_bazi result without dayun_pillar / liunian_pillar.
+            With a natal cache it is frozen (see natal_cache.py) and shared
+            with other callers.
+        """
+        return self._natal(year, month, day, hour, is_lunar, is_leap_month, gender, shared_pillars)
+
+    def calculate_natal_for_gender(
+        self,
+        natal: Dict[str, Any],
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male"
+    ) -> Dict[str, Any]:
+        """
+        calculate_natal for the birth `natal` was calculated for, with
+        `gender`. Gender only decides the direction of the 大運, so the
+        pillars, nayin, 空亡 and analysis are taken from `natal` and only
+        the 大運 list is rebuilt.
+
+        Args:
+            natal: calculate_natal result for the same birth input, either gender
+            Others: Same as calculate_natal
+
+        Returns:
+            Same as calculate_natal
+        """
+        key = None
+        if self.natal_cache is not None:
+            key = self._natal_key(year, month, day, hour, is_lunar, is_leap_month, gender)
+            cached = self.natal_cache.get(key)
+            if cached is not None:
+                return cached
+
+        gans, zhis = self._natal_codes(natal)
+        result = dict(natal)
+        result["dayun"] = self._get_dayun(
+            self._birth_periods(year, month, day, hour, is_lunar, is_leap_month, gender), gans, zhis, gans.day
+        )
+        result["analysis"] = {**natal["analysis"], "gender": gender}
+        return result if key is None else self.natal_cache.put(key, result)
+
+    def _natal(self, year, month, day, hour, is_lunar, is_leap_month, gender, shared_pillars=None, fields=None, birth=None) -> Dict[str, Any]:
+        """
+        calculate_natal, passing `shared_pillars` and `birth` on to
+        _calculate_natal on a cache miss. With `fields`, a miss builds only
+        the parts they need and leaves the cache alone.
+        """
+        if self.natal_cache is None:
+            return self._calculate_natal(
+                year, month, day, hour, is_lunar, is_leap_month, gender, shared_pillars, fields, birth
             )
+
+        key = self._natal_key(year, month, day, hour, is_lunar, is_leap_month, gender)
+        natal = self.natal_cache.get(key)
+        if natal is None and fields is not None:
+            return self._calculate_natal(
+                year, month, day, hour, is_lunar, is_leap_month, gender, shared_pillars, fields, birth
+            )
+        if natal is None:
+            natal = self.natal_cache.put(
+                key, self._calculate_natal(
+                    year, month, day, hour, is_lunar, is_leap_month, gender, shared_pillars, birth=birth
+                )
+            )
+        return natal
+
+    def _natal_key(self, year, month, day, hour, is_lunar, is_leap_month, gender) -> tuple:
+        """
+        Natal cache key: inputs that give the same natal chart share a key.
+
+        Solar hours are reduced to their 時辰 slot when the pillar table
+        covers the date; the table already serves every hour of a slot the
+        same record. Slots a 節 splits, and inputs off the table, keep the
+        clock hour. Lunar inputs keep their own key because their lunar_date
+        string is rendered from the input rather than from the conversion.
+        """
+        if is_lunar:
+            return (CALCULATOR_VERSION, "lunar", year, month, bool(is_leap_month), day, hour, gender)
+        if self.pillar_table is not None and self.pillar_table.lookup(year, month, day, hour) is not None:
+            return (CALCULATOR_VERSION, "solar", year, month, day, "slot", hour_to_slot(hour), gender)
+        return (CALCULATOR_VERSION, "solar", year, month, day, "hour", hour, gender)
+
+    def _calculate_natal(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        is_lunar: bool,
+        is_leap_month: bool,
+        gender: str,
+        shared_pillars: Optional[Dict[tuple, Dict[str, Any]]] = None,
+        fields: Optional[FrozenSet[str]] = None,
+        birth: Optional[tuple] = None
+    ) -> Dict[str, Any]:
+        """
+        calculate_natal without the cache.
+
+        `shared_pillars` collects year / month / day pillar dicts across
+        calls for the same birth date (calculate_bazi_hour_unknown), so each
+        is built once; their 神煞 never read the hour pillar.
+
+        `birth` is a (gans, zhis, lunar_date, solar_date, periods) tuple
+        from _hour_unknown_births; with it the pillars and 大運 periods are
+        taken as given instead of looked up or converted.
+
+        With `fields` (see calculate_bazi) the 大運 list, nayin, 空亡 and
+        analysis are left out unless a field needs them. The four pillars
+        and the dates are always there; apply_as_of reads the pillars.
+        """
+        wanted = frozenset(CHART_FIELDS) if fields is None else fields
+        try:
+
+            slot = None
+            if birth is None and not is_lunar and self.pillar_table is not None:
+                slot = self.pillar_table.lookup(year, month, day, hour)
+
+            if birth is not None:
+                gans, zhis, lunar_date_str, solar_date_str, periods = birth
+            elif slot is not None:
+                # Table hit: pillars, lunar date and 起運 year without lunar_python
+                solar_date_str = f"{year}年{month}月{day}日"
+                lunar_date_str = f"{slot.lunar_year}年{slot.lunar_month}月{slot.lunar_day}日"
+                pillars = (slot.year, slot.month, slot.day, slot.time)
+                gans = self.Gans(*(p % 10 for p in pillars))
+                zhis = self.Zhis(*(p % 12 for p in pillars))
+                periods = lambda: self._periods_from_slot(slot, year, gender)
+            else:
+                # Convert between solar and lunar calendar (same logic as bazi.py)
+                if is_lunar:
+                    # Input is lunar, convert to solar
+                    month_adj = month * -1 if is_leap_month else month
+                    lunar = Lunar.fromYmdHms(year, month_adj, day, hour, 0, 0)
+                    solar = lunar.getSolar()
+                    lunar_date_str = f"{year}年{abs(month_adj)}月{day}日"
+                    solar_date_str = f"{solar.getYear()}年{solar.getMonth()}月{solar.getDay()}日"
+                else:
+                    # Input is solar, convert to lunar (same as bazi.py)
+                    solar = Solar.fromYmdHms(year, month, day, hour, 0, 0)
+                    lunar = solar.getLunar()
+                    solar_date_str = f"{year}年{month}月{day}日"
+                    lunar_date_str = f"{lunar.getYear()}年{lunar.getMonth()}月{lunar.getDay()}日"
+
+                # Get eight characters (bazi) - same as bazi.py
+                ba = lunar.getEightChar()
+
+                # Extract gan and zhi using same structure as bazi.py
+                gans = self.Gans(
+                    year=GAN_CODE[ba.getYearGan()],
+                    month=GAN_CODE[ba.getMonthGan()],
+                    day=GAN_CODE[ba.getDayGan()],
+                    time=GAN_CODE[ba.getTimeGan()]
+                )
+
+                zhis = self.Zhis(
+                    year=ZHI_CODE[ba.getYearZhi()],
+                    month=ZHI_CODE[ba.getMonthZhi()],
+                    day=ZHI_CODE[ba.getDayZhi()],
+                    time=ZHI_CODE[ba.getTimeZhi()]
+                )
+                periods = lambda: self._periods_from_yun(ba.getYun(gender == "male"))
             
             # Day master (日主) - same as bazi.py
             day_master = gans.day
             # Calculate detailed information for each pillar using enhanced methods
 
-            year_pillar = self._get_pillar_details(gans.year, zhis.year, day_master, gans, zhis)
-            month_pillar = self._get_pillar_details(gans.month, zhis.month, day_master, gans, zhis)
-            day_pillar = self._get_pillar_details(gans.day, zhis.day, day_master, gans, zhis, True)
-            hour_pillar = self._get_pillar_details(gans.time, zhis.time, day_master, gans, zhis)
+            # Analysis and shensha (神煞) depend only on the pillars
+            chart = self._chart_analysis(gans, zhis)
+            shensha = chart.shensha
 
-            # Calculate shensha (神煞)
-            shensha = self._get_shansha({"gan": gans._asdict(), "zhi": zhis._asdict()}, year)
-            year_pillar["shensha"] = shensha["year"]
-            month_pillar["shensha"] = shensha["month"]
-            day_pillar["shensha"] = shensha["day"]
-            hour_pillar["shensha"] = shensha["time"]
-            # print(shensha)
+            year_pillar = self._natal_pillar(0, gans, zhis, shensha["year"], shared_pillars)
+            month_pillar = self._natal_pillar(1, gans, zhis, shensha["month"], shared_pillars)
+            day_pillar = self._natal_pillar(2, gans, zhis, shensha["day"], shared_pillars)
+            hour_pillar = self._natal_pillar(3, gans, zhis, shensha["time"])
 
-            # Calculate dayun (大運)
-            yun = ba.getYun(gender == "male")
-            dayun = self._get_dayun(yun, gans, zhis, day_master)
-            
+            result = {
+                "year_pillar": year_pillar,
+                "month_pillar": month_pillar,
+                "day_pillar": day_pillar,
+                "hour_pillar": hour_pillar,
+                "lunar_date": lunar_date_str,
+                "solar_date": solar_date_str,
+            }
 
-            # Add dayun pillar and liunian pillar
-            dayun_pillar = self._get_dayun_pillar(dayun, gans, zhis, day_master, year)
-            liunian_pillar = self._get_liunian_pillar(dayun, gans, zhis, day_master, year)
+            # Calculate dayun (大運)
+            if wanted & DAYUN_FIELDS:
+                result["dayun"] = self._get_dayun(periods(), gans, zhis, day_master)
 
-            
             # Calculate nayin (納音)
-            nayin_info = {
-                "year": get_nayin_for_ganzhi(gans.year, zhis.year),
-                "month": get_nayin_for_ganzhi(gans.month, zhis.month),
-                "day": get_nayin_for_ganzhi(gans.day, zhis.day),
-                "hour": get_nayin_for_ganzhi(gans.time, zhis.time)
-            }
+            if "nayin" in wanted:
+                result["nayin"] = {
+                    "year": get_nayin_for_ganzhi(jiazi(gans.year, zhis.year)),
+                    "month": get_nayin_for_ganzhi(jiazi(gans.month, zhis.month)),
+                    "day": get_nayin_for_ganzhi(jiazi(gans.day, zhis.day)),
+                    "hour": get_nayin_for_ganzhi(jiazi(gans.time, zhis.time))
+                }
             
             # Calculate empty positions (空亡)
-            empty_positions = get_empty_positions(gans.day, zhis.day, list(zhis))
+            if "empty_positions" in wanted:
+                result["empty_positions"] = get_empty_positions(jiazi(gans.day, zhis.day), zhis)
             
             # Generate comprehensive analysis using bazi functions
-            analysis = self._generate_comprehensive_analysis(gans, zhis, day_master, gender)
+            if "analysis" in wanted:
+                result["analysis"] = self._generate_comprehensive_analysis(gans, zhis, day_master, gender, chart)
             
-            return {
-                "year_pillar": year_pillar,
-                "month_pillar": month_pillar,
-                "day_pillar": day_pillar,
-                "hour_pillar": hour_pillar,
-                "dayun": dayun,
-                "dayun_pillar": dayun_pillar,
-                "liunian_pillar": liunian_pillar,
-                "lunar_date": lunar_date_str,
-                "solar_date": solar_date_str,
-                "nayin": nayin_info,
-                "empty_positions": empty_positions,
-                "analysis": analysis
-            }
+            # Same key order as a full chart
+            return {key: result[key] for key in NATAL_KEYS if key in result}
             
         except Exception as e:
             raise ValueError(f"Failed to calculate bazi: {str(e)}")
     
-    def _get_pillar_details(self, gan: str, zhi: str, day_master: str, gans, zhis, is_day_master = False) -> Dict[str, Any]:
-        """Get detailed information for a pillar using enhanced bazi logic"""
-        try:
-            # Get ten deities relationship (same as bazi.py)
-            ten_deity = get_ten_deity(day_master, gan) if not is_day_master else "日主"
-            zhi_ten_deity = get_ten_deity(day_master, zhi)
-            # Get five elements
-            gan_wuxing = gan5.get(gan, "unknown")
-            zhi_wuxing = zhi5.get(zhi, {})
-            # Get zhi hidden stems (藏干) with enhanced information
-            hidden_stems = []
-            if zhi in zhi5_list:
-                for hidden_gan in zhi5_list[zhi]:
-                    hidden_stems.append({
-                        "gan": hidden_gan,
-                        "wuxing": gan5.get(hidden_gan, "unknown"),
-                        "ten_deity": get_ten_deity(day_master, hidden_gan)
-                    })
-            # Get Nayin
-            nayin = get_nayin(gan, zhi)
-            
-            # Check for gan-zhi harmony using our function
-            harmony = gan_zhi_he((gan, zhi))
-            
-            
-            # Check if this is a treasury position using our function
-            is_treasury = is_ku(zhi)
-            return {
-                "ganzhi": f"{gan}{zhi}",
-                "gan": gan,
-                "zhi": zhi,
-                "gan_wuxing": gan_wuxing,
-                "zhi_wuxing": gan5.get(list(zhi_wuxing.keys())[0], "unknown") if zhi_wuxing else "unknown",
-                "ten_deity": ten_deity,
-                "zhi_ten_deity": zhi_ten_deity,
-                "hidden_stems": hidden_stems,
-                "nayin": nayin,
-                "harmony": harmony,
-                "is_treasury": is_treasury
-            }
-        except Exception:
-            # Fallback for missing data
-            return {
-                "ganzhi": f"{gan}{zhi}",
-                "gan": gan,
-                "zhi": zhi,
-                "gan_wuxing": "unknown",
-                "zhi_wuxing": "unknown",
-                "ten_deity": "unknown",
-                "zhi_ten_deity": "unknown",
-                "hidden_stems": [],
-                "nayin": "unknown",
-                "harmony": "",
-                "is_treasury": False
-            }
+    def _natal_pillar(self, position: int, gans, zhis, shensha: List[str], shared=None) -> Dict[str, Any]:
+        """
+        Pillar details plus natal shensha for one of the four pillars. With
+        `shared`, a year / month / day pillar already built for the same
+        year, month and day pillars is reused.
+        """
+        key = (position, *(jiazi(g, z) for g, z in zip(gans[:3], zhis[:3])))
+        if shared is not None and HOUR_FREE_SHENSHA and key in shared:
+            return shared[key]
+        pillar = self._get_pillar_details(gans[position], zhis[position], gans.day, gans, zhis, position == 2)
+        pillar["shensha"] = shensha
+        if shared is not None:
+            shared[key] = pillar
+        return pillar
+
+    def _get_pillar_details(self, gan: int, zhi: int, day_master: int, gans, zhis, is_day_master = False) -> Dict[str, Any]:
+        """Get detailed information for a pillar from the precomputed detail table"""
+        details = PILLAR_DETAILS[day_master * 60 + jiazi(gan, zhi)].pillar
+        # Copied, since calculate_natal adds the pillar's shensha
+        if is_day_master:
+            return dict(details, ten_deity="日主")
+        return dict(details)
     
-    def _generate_comprehensive_analysis(self, gans, zhis, day_master: str, gender: str) -> Dict[str, Any]:
-        """Generate comprehensive analysis using enhanced bazi functions"""
+    def _chart_analysis(self, gans, zhis) -> ChartAnalysis:
+        """The chart's ChartAnalysis from the atlas, or computed when the atlas lacks it"""
+        if self.analysis_atlas is not None:
+            chart = self.analysis_atlas.lookup(gans, zhis)
+            if chart is not None:
+                return chart
+        return analyze_chart(gans, zhis)
+
+    def _generate_comprehensive_analysis(self, gans, zhis, day_master: int, gender: str, chart: ChartAnalysis) -> Dict[str, Any]:
+        """Generate comprehensive analysis from the chart's precomputed or freshly computed ChartAnalysis"""
         try:
-            # Calculate five element scores using our enhanced function
-            wuxing_scores, gan_scores = calculate_wuxing_scores(gans, zhis)
+            # Five element scores
+            scores = chart.wuxing_scores
+            wuxing_scores = dict(zip(ELEMENTS, scores))
+            gan_scores = dict(zip(GAN, chart.gan_scores))
             
             # Find strongest and weakest elements
             strongest = max(wuxing_scores, key=wuxing_scores.get)
             weakest = min(wuxing_scores, key=wuxing_scores.get)
             
-            # Get root analysis using our function
-            root_analysis = get_gen(day_master, zhis)
+            root_analysis = chart.root_analysis
             
-            # Calculate ten deities distribution using our function
-            gan_shens, zhi_shens = calculate_ten_deities(gans, zhis, day_master)
+            # Ten deities distribution
+            gan_shens = ['日主' if seq == 2 else TEN_GOD_NAME[god] for seq, god in enumerate(chart.gan_gods)]
+            zhi_shens = [TEN_GOD_NAME[god] for god in chart.zhi_gods]
             
             # Calculate deity distribution
             all_shens = gan_shens + zhi_shens
@@ -238,32 +636,17 @@ class BaziCalculator:
                 if shen != '日主':
                     deity_counts[shen] = deity_counts.get(shen, 0) + 1
             
-            # Check day master strength using our function
-            is_strong = check_day_master_strength(gans, zhis, day_master)
-            
-            # Get special combinations
-            try:
-                gong_combinations = get_gong(zhis)
-            except:
-                gong_combinations = []
-            
-            # Check for special patterns
-            gan_list = list(gans)
-            zhi_list = list(zhis)
+            is_strong = chart.is_strong
+            gong_combinations = chart.gong_combinations
             
             # Count repeated elements
-            gan_counts = {gan: gan_list.count(gan) for gan in set(gan_list)}
-            zhi_counts = {zhi: zhi_list.count(zhi) for zhi in set(zhi_list)}
+            repeated_gans = {GAN[gan]: gans.count(gan) for gan in set(gans) if gans.count(gan) > 1}
+            repeated_zhis = {ZHI[zhi]: zhis.count(zhi) for zhi in set(zhis) if zhis.count(zhi) > 1}
             
-            # Find patterns
-            repeated_gans = {gan: count for gan, count in gan_counts.items() if count > 1}
-            repeated_zhis = {zhi: count for zhi, count in zhi_counts.items() if count > 1}
-            
-            # Analyze special stars
-            special_stars = analyze_special_stars(gans, zhis, day_master)
+            special_stars = chart.special_stars
             
             # Check for yang/yin nature of day master
-            is_yang_day = (Gan.index(day_master) % 2 == 0)
+            is_yang_day = (day_master % 2 == 0)
             
             return {
                 "wuxing_analysis": {
@@ -271,7 +654,7 @@ class BaziCalculator:
                     "gan_scores": gan_scores,
                     "strongest_element": strongest,
                     "weakest_element": weakest,
-                    "total_score": sum(wuxing_scores.values())
+                    "total_score": sum(scores)
                 },
                 "root_analysis": root_analysis,
                 "day_master_strength": {
@@ -289,9 +672,9 @@ class BaziCalculator:
                     "deity_counts": deity_counts
                 },
                 "day_master_nature": {
-                    "gan": day_master,
+                    "gan": GAN[day_master],
                     "is_yang": is_yang_day,
-                    "element": gan5.get(day_master, "unknown")
+                    "element": ELEMENTS[GAN_ELEMENT[day_master]]
                 },
                 "special_stars": special_stars,
                 "gender": gender,
@@ -309,20 +692,181 @@ class BaziCalculator:
                 "day_master_strength": {"is_strong": False, "description": "unknown"},
                 "combinations": {},
                 "deity_distribution": {},
-                "day_master_nature": {"gan": day_master},
+                "day_master_nature": {"gan": GAN[day_master]},
                 "special_stars": {},
                 "gender": gender,
                 "recommendations": {}
             }
-    def _get_dayun(self, yun, gans, zhis, day_master):
+
+    def _hour_unknown_births(self, year, month, day, is_lunar, is_leap_month, gender) -> Optional[List[tuple]]:
+        """
+        `birth` tuples (see _calculate_natal) for HOUR_UNKNOWN_HOURS, from
+        one pillar table read per slot or one lunar_python conversion.
+
+        Away from a 節 the year, month and day pillars hold all day (晚子時
+        is not among the hours), each hour stem follows from the day stem
+        (五鼠遁), and lunar-python's 起運 (Yun, sect 1) only needs the
+        birth 時辰 against the surrounding 節, which is worked out here the
+        same way. 大運 periods are built once per 起運 year.
+
+        Returns:
+            None when a 節 falls on the day; each hour is then converted
+            on its own.
+        """
+        male = gender == "male"
+        built: Dict[tuple, list] = {}
+
+        def periods(*args):
+            # A 節 between two table slots changes the month pillar, so
+            # periods are shared by everything _periods reads
+            if args not in built:
+                built[args] = self._periods(*args)
+            return built[args]
+
+        slots = None
+        if not is_lunar and self.pillar_table is not None:
+            slots = [self.pillar_table.lookup(year, month, day, hour) for hour in HOUR_UNKNOWN_HOURS]
+        if slots is not None and None not in slots:
+            births = []
+            for slot in slots:
+                forward = (slot.year % 2 == 0) == male
+                start_year = year + (slot.forward_start_offset if forward else slot.backward_start_offset)
+                pillars = (slot.year, slot.month, slot.day, slot.time)
+                births.append((
+                    self.Gans(*(p % 10 for p in pillars)),
+                    self.Zhis(*(p % 12 for p in pillars)),
+                    f"{slot.lunar_year}年{slot.lunar_month}月{slot.lunar_day}日",
+                    f"{year}年{month}月{day}日",
+                    partial(periods, slot.month, forward, year, start_year),
+                ))
+            return births
+
+        try:
+            if is_lunar:
+                lunar = Lunar.fromYmdHms(year, month * -1 if is_leap_month else month, day, 0, 0, 0)
+                solar = lunar.getSolar()
+            else:
+                solar = Solar.fromYmdHms(year, month, day, 0, 0, 0)
+                lunar = solar.getLunar()
+            prev_jie, next_jie = lunar.getPrevJie().getSolar(), lunar.getNextJie().getSolar()
+            if solar.toYmd() in (prev_jie.toYmd(), next_jie.toYmd()):
+                return None
+
+            ba = lunar.getEightChar()
+            year_gan, month_gan, day_gan = GAN_CODE[ba.getYearGan()], GAN_CODE[ba.getMonthGan()], GAN_CODE[ba.getDayGan()]
+            year_zhi, month_zhi, day_zhi = ZHI_CODE[ba.getYearZhi()], ZHI_CODE[ba.getMonthZhi()], ZHI_CODE[ba.getDayZhi()]
+            month_pillar = jiazi(month_gan, month_zhi)
+            forward = (year_gan % 2 == 0) == male
+            lunar_date_str = (
+                f"{year}年{month}月{day}日" if is_lunar
+                else f"{lunar.getYear()}年{lunar.getMonth()}月{lunar.getDay()}日"
+            )
+            solar_date_str = f"{solar.getYear()}年{solar.getMonth()}月{solar.getDay()}日"
+
+            # 起運 counts 3 days per year, 4 months per day and 10 days per
+            # 時辰 from birth to the next 節 (forward) or from the previous
+            # 節 to birth (backward); see lunar_python's Yun.__compute_start
+            jie = next_jie if forward else prev_jie
+            jie_zhi = 11 if jie.getHour() == 23 else LunarUtil.getTimeZhiIndex(jie.toYmdHms()[11:16])
+            jie_days = jie.subtract(solar) if forward else solar.subtract(jie)
+
+            births = []
+            for zhi in range(12):
+                hour_diff = jie_zhi - zhi if forward else zhi - jie_zhi
+                day_diff = jie_days
+                if hour_diff < 0:
+                    hour_diff += 12
+                    day_diff -= 1
+                month_diff = hour_diff * 10 // 30
+                months = day_diff * 4 + month_diff
+                days = hour_diff * 10 - month_diff * 30
+                start_year = solar.nextYear(months // 12).nextMonth(months % 12).next(days).getYear()
+                births.append((
+                    self.Gans(year_gan, month_gan, day_gan, (day_gan % 5 * 2 + zhi) % 10),
+                    self.Zhis(year_zhi, month_zhi, day_zhi, zhi),
+                    lunar_date_str,
+                    solar_date_str,
+                    partial(periods, month_pillar, forward, solar.getYear(), start_year),
+                ))
+            return births
+        except Exception as e:
+            raise ValueError(f"Failed to calculate bazi: {str(e)}")
+
+    def _birth_periods(self, year, month, day, hour, is_lunar, is_leap_month, gender):
+        """大運 periods of a birth input, as _calculate_natal derives them"""
+        slot = None
+        if not is_lunar and self.pillar_table is not None:
+            slot = self.pillar_table.lookup(year, month, day, hour)
+        if slot is not None:
+            return self._periods_from_slot(slot, year, gender)
+        if is_lunar:
+            lunar = Lunar.fromYmdHms(year, month * -1 if is_leap_month else month, day, hour, 0, 0)
+        else:
+            lunar = Solar.fromYmdHms(year, month, day, hour, 0, 0).getLunar()
+        return self._periods_from_yun(lunar.getEightChar().getYun(gender == "male"))
+
+    def _periods_from_yun(self, yun) -> List[Tuple[int, Optional[int], List[Tuple[int, int, int]]]]:
+        """
+        Flatten lunar-python's Yun into (start_age, jiazi, liunian) per 大運,
+        where liunian is a list of (year, age, jiazi) and the period before
+        起運 has jiazi None.
+        """
+        return [
+            (
+                item.getStartAge(),
+                JIAZI_CODE.get(item.getGanZhi()),
+                [(ln.getYear(), ln.getAge(), JIAZI_CODE[ln.getGanZhi()]) for ln in item.getLiuNian()],
+            )
+            for item in yun.getDaYun()
+        ]
+
+    def _periods_from_slot(self, slot: PillarSlot, birth_year: int, gender: str) -> List[Tuple[int, Optional[int], List[Tuple[int, int, int]]]]:
+        """
+        Same layout as `_periods_from_yun`, rebuilt from a pillar table record
+        the way lunar-python's DaYun / LiuNian derive it.
+        """
+        # Yang-year male and yin-year female run forward
+        forward = (slot.year % 2 == 0) == (gender == "male")
+        start_year = birth_year + (slot.forward_start_offset if forward else slot.backward_start_offset)
+        return self._periods(slot.month, forward, birth_year, start_year)
+
+    def _periods(self, month_pillar: int, forward: bool, birth_year: int, start_year: int) -> List[Tuple[int, Optional[int], List[Tuple[int, int, int]]]]:
+        """
+        Same layout as `_periods_from_yun`, from the month pillar, direction,
+        solar birth year and the calendar year of 起運.
+        """
+        step = 1 if forward else -1
+        periods = []
+        for index in range(DAYUN_COUNT):
+            if index == 0:
+                # Period before 起運: no 干支 of its own
+                period_start, period_age, years = birth_year, 1, start_year - birth_year
+                pillar = None
+            else:
+                period_start = start_year + (index - 1) * 10
+                period_age = period_start - birth_year + 1
+                years = 10
+                pillar = (month_pillar + step * index) % 60
+            liunian = [
+                # lunar-python counts on from the 干支 at 立春 of the birth
+                # calendar year, so each 流年 carries its own calendar year's
+                # 干支 (1984 甲子), also for births before 立春
+                (period_start + i, period_age + i, (period_start + i - 4) % 60)
+                for i in range(years)
+            ]
+            periods.append((period_age, pillar, liunian))
+        return periods
+
+    def _get_dayun(self, periods, gans, zhis, day_master):
         """
         Get detailed dayun (大運) analysis based on bazi.py implementation
         
         Args:
-            yun: Yun object from lunar-python
-            gans: Four pillars heavenly stems
-            zhis: Four pillars earthly branches  
-            day_master: Day master (day gan)
+            periods: (start_age, jiazi, liunian) per 大運, from
+                `_periods_from_yun` or `_periods_from_slot`
+            gans: Four pillars heavenly stem codes
+            zhis: Four pillars earthly branch codes
+            day_master: Day master (day gan) code
             
         Returns:
             List of detailed dayun periods with comprehensive analysis
@@ -330,248 +874,172 @@ class BaziCalculator:
         dayun_list = []
         
         try:
-            # Get original chart pillars for reference
-            zhus = [(gans[i], zhis[i]) for i in range(4)]
-            day_zhu = (gans[2], zhis[2])  # Day pillar
+            # The 大運 sequence and its annotations come from the memoized
+            # skeleton; only start ages and 流年 years are this birth's own
+            forward = periods[1][1] == (jiazi(gans.month, zhis.month) + 1) % 60
+            skeleton = dayun_skeleton(tuple(gans), tuple(zhis), forward)
             
             # Skip first item as it's the starting period, analyze from second onwards
-            for idx, dayun_item in enumerate(yun.getDaYun()):
+            for idx, (start_age, _, liunians) in enumerate(periods):
                 if idx == 0:
-                    if yun.getDaYun()[1].getStartAge() == 1:
+                    if periods[1][0] == 1:
                         continue
-                    gan_ = yun.getDaYun()[1].getGanZhi()[0]
-                    zhi_ = yun.getDaYun()[1].getGanZhi()[1]
+                    period = skeleton[0]
                 else:
-                    gan_ = dayun_item.getGanZhi()[0]
-                    zhi_ = dayun_item.getGanZhi()[1]
-                start_age = dayun_item.getStartAge()
+                    period = skeleton[idx - 1]
                 
-                # Check if this dayun gan-zhi appears in original chart
-                is_repeated = (gan_, zhi_) in zhus
-                
-                
-                
-                # Get hidden stems (藏干) for dayun zhi
-                hidden_stems = []
-                if zhi_ in zhi5_list:
-                    for hidden_gan in zhi5_list[zhi_]:
-                        hidden_stems.append({
-                            "gan": hidden_gan,
-                            "ten_deity": get_ten_deity(day_master, hidden_gan),
-                            "strength": zhi5[zhi_].get(hidden_gan, 0)
-                        })
-                
-                # Calculate ten deities for dayun gan and zhi
-                gan_ten_deity = get_ten_deity(day_master, gan_)
-                zhi_ten_deity = hidden_stems[0]["ten_deity"]
-                
-                # Check relationships with original chart zhis
-                zhi_relationships = set()
-                for orig_zhi in zhis:
-                    # Check all relationship types for this zhi
-                    if zhi_ in zhi_atts and orig_zhi in zhi_atts[zhi_]:
-                        for rel_type in zhi_atts[zhi_]:
-                            if orig_zhi in zhi_atts[zhi_][rel_type] and rel_type != '破':  # Skip '破' as in original
-                                zhi_relationships.add(f"{rel_type}:{orig_zhi}")
-                
-                # Check for empty positions (空亡)
-                is_empty = zhi_ in empties.get(day_zhu, ())
-                
-                # Get nayin for this dayun
-                nayin = get_nayin(gan_, zhi_)
-                
-                # Check for special combinations (夾、拱)
-                special_combinations = []
-                
-                # Check for 夾 (sandwiching) relationships
-                if gan_ in gans:
-                    for i in range(4):
-                        if gan_ == gans[i]:
-                            orig_zhi = zhis[i] 
-                            zhi_diff = abs(Zhi.index(zhi_) - Zhi.index(orig_zhi))
-                            if zhi_diff == 2:
-                                jia_zhi = Zhi[(Zhi.index(zhi_) + Zhi.index(orig_zhi)) // 2]
-                                special_combinations.append(f"夾:{jia_zhi}")
-                            elif zhi_diff == 10:
-                                jia_zhi = Zhi[(Zhi.index(zhi_) + Zhi.index(orig_zhi)) % 12]
-                                special_combinations.append(f"夾:{jia_zhi}")
-                            
-                            # Check for 拱 (arching) relationships
-                            combined_key = orig_zhi + zhi_
-                            if combined_key in gong_he and gong_he[combined_key] not in zhis:
-                                special_combinations.append(f"拱:{gong_he[combined_key]}")
-                
-                # Get yin/yang nature
-                gan_yinyang = "陽" if Gan.index(gan_) % 2 == 0 else "陰"
-                zhi_yinyang = "陽" if Zhi.index(zhi_) % 2 == 0 else "陰"
-                
-                # Analyze flow years (流年) for this dayun period
-                liunian_list = []
-                zhis_extended = list(zhis) + [zhi_]  # Add dayun zhi to original zhis
-                gans_extended = list(gans) + [gan_]  # Add dayun gan to original gans
-                
-                for liunian in dayun_item.getLiuNian():
-                    gan2_ = liunian.getGanZhi()[0]
-                    zhi2_ = liunian.getGanZhi()[1]
-                    year = liunian.getYear()
-                    age = liunian.getAge()
-                    
-                    # Check if this liunian gan-zhi appears in original chart
-                    is_ln_repeated = (gan2_, zhi2_) in zhus
-                    
-                    # Calculate ten deities for liunian
-                    ln_gan_ten_deity = get_ten_deity(day_master, gan2_)
-                    ln_zhi_ten_deity = get_ten_deity(day_master, zhi2_)
-                    
-                    # Get hidden stems for liunian zhi
-                    ln_hidden_stems = []
-                    if zhi2_ in zhi5_list:
-                        for hidden_gan in zhi5_list[zhi2_]:
-                            ln_hidden_stems.append({
-                                "gan": hidden_gan,
-                                "ten_deity": get_ten_deity(day_master, hidden_gan)
-                            })
-                    
-                    # Check relationships with extended zhis (original + dayun)
-                    ln_zhi_relationships = set()
-                    for ext_zhi in zhis_extended:
-                        if zhi2_ in zhi_atts and ext_zhi in zhi_atts[zhi2_]:
-                            for rel_type in zhi_atts[zhi2_]:
-                                if rel_type != '破' and ext_zhi in zhi_atts[zhi2_][rel_type]:
-                                    ln_zhi_relationships.add(f"{rel_type}:{ext_zhi}")
-                    
-                    # Check for empty positions
-                    ln_is_empty = zhi2_ in empties.get(day_zhu, ())
-                    
-                    # Get nayin for liunian
-                    ln_nayin = get_nayin(gan2_, zhi2_)
-                    
-                    # Check for special combinations in liunian
-                    ln_special_combinations = []
-                    if gan2_ in gans_extended:
-                        for i in range(5):  # Now 5 elements including dayun
-                            if gan2_ == gans_extended[i]:
-                                base_zhi = zhis_extended[i]
-                                zhi_diff = abs(Zhi.index(zhi2_) - Zhi.index(base_zhi))
-                                if zhi_diff == 2:
-                                    jia_zhi = Zhi[(Zhi.index(zhi2_) + Zhi.index(base_zhi)) // 2]
-                                    ln_special_combinations.append(f"夾:{jia_zhi}")
-                                elif zhi_diff == 10:
-                                    jia_zhi = Zhi[(Zhi.index(zhi2_) + Zhi.index(base_zhi)) % 12]
-                                    ln_special_combinations.append(f"夾:{jia_zhi}")
-                                
-                                # Check for arching
-                                combined_key = base_zhi + zhi2_
-                                if combined_key in gong_he and gong_he[combined_key] not in zhis:
-                                    ln_special_combinations.append(f"拱:{gong_he[combined_key]}")
-                    
-                    # Check for special patterns (天羅地網, 四生, 四敗, 四庫)
-                    all_zhis_set = set(zhis_extended) | {zhi2_}
-                    ln_special_patterns = []
-                    
-                    if {'戌', '亥', '辰', '巳'}.issubset(all_zhis_set):
-                        ln_special_patterns.append("天羅地網:戌亥辰巳")
-                    if {'寅', '申', '巳', '亥'}.issubset(all_zhis_set) and len({'寅', '申', '巳', '亥'} & set(zhis)) == 2:
-                        ln_special_patterns.append("四生:寅申巳亥")
-                    if {'子', '午', '卯', '酉'}.issubset(all_zhis_set) and len({'子', '午', '卯', '酉'} & set(zhis)) == 2:
-                        ln_special_patterns.append("四敗:子午卯酉")
-                    if {'辰', '戌', '丑', '未'}.issubset(all_zhis_set) and len({'辰', '戌', '丑', '未'} & set(zhis)) == 2:
-                        ln_special_patterns.append("四庫:辰戌丑未")
-                    
-                    liunian_list.append({
-                        "year": year,
-                        "age": age,
-                        "ganzhi": f"{gan2_}{zhi2_}",
-                        "gan": gan2_,
-                        "zhi": zhi2_,
-                        "gan_ten_deity": ln_gan_ten_deity,
-                        "zhi_ten_deity": ln_hidden_stems[0]["ten_deity"],
-                        "hidden_stems": ln_hidden_stems,
-                        "zhi_relationships": list(ln_zhi_relationships),
-                        "is_empty": ln_is_empty,
-                        "is_repeated": is_ln_repeated,
-                        "nayin": ln_nayin,
-                        "special_combinations": ln_special_combinations,
-                        "special_patterns": ln_special_patterns
-                    })
-                
-                # Compile dayun period information
-                dayun_period = {
+                # Frozen like the annotations they share, so the natal cache
+                # stores them without copying
+                dayun_list.append(FrozenDict({
                     "start_age": start_age,
-                    "ganzhi": f"{gan_}{zhi_}",
-                    "gan": gan_,
-                    "zhi": zhi_,
-                    "gan_ten_deity": gan_ten_deity,
-                    "zhi_ten_deity": zhi_ten_deity,
-                    "gan_yinyang": gan_yinyang,
-                    "zhi_yinyang": zhi_yinyang,
-                    "hidden_stems": hidden_stems,
-                    "zhi_relationships": list(zhi_relationships),
-                    "is_empty": is_empty,
-                    "is_repeated": is_repeated,
-                    "nayin": nayin,
-                    "special_combinations": special_combinations,
-                    "liunian": liunian_list
-                }
-                
-                dayun_list.append(dayun_period)
+                    **period.annotation,
+                    "liunian": FrozenList([
+                        FrozenDict({"year": year, "age": age, **period.liunian(ln_pillar)})
+                        for year, age, ln_pillar in liunians
+                    ])
+                }))
             
-            return dayun_list
+            return FrozenList(dayun_list)
             
         except Exception as e:
             # Fallback to simple version if detailed analysis fails
             simple_dayun = []
-            for item in yun.getDaYun():
+            for start_age, pillar, _ in periods:
                 simple_dayun.append({
-                    "start_age": getattr(item, 'getStartAge', lambda: 0)(),
-                    "ganzhi": item.getGanZhi(),
+                    "start_age": start_age,
+                    "ganzhi": JIAZI[pillar] if pillar is not None else "",
                     "error": f"Detailed analysis failed: {str(e)}"
                 })
             return simple_dayun
-    def _get_shansha(self, data, year):
+
+    def apply_as_of(
+        self,
+        natal: Dict[str, Any],
+        birth_year: int,
+        as_of: Optional[date] = None,
+        include_liunian: str = "all",
+        dayun_range: Optional[Tuple[int, Optional[int]]] = None,
+        fields: Optional[Collection[str]] = None
+    ) -> Dict[str, Any]:
         """
-        Calculate 神煞 (special stars) for the bazi chart
-        
+        Complete a calculate_natal result for a given date.
+
+        Adds the current 大運 and 流年 pillars, and 小兒關煞 on the natal
+        pillars while the person is under 11. `natal` is not modified, so one
+        natal result can be shared across requests and dates.
+
         Args:
-            data: Dictionary containing gan and zhi information
-            year: Birth year to determine if person is a child
-            
+            natal: calculate_natal result
+            birth_year: The year passed to calculate_natal
+            as_of: Date to evaluate at (default: today)
+            include_liunian: 流年 kept inside each 大運 entry: "all", "current"
+                (only as_of's year) or "none"
+            dayun_range: (offset, limit) page of the 大運 list to return;
+                limit None runs to the end. The current pillars are still
+                taken from the full list.
+            fields: CHART_FIELDS to return (see calculate_bazi); None for
+                all. `natal` must hold the natal parts they need.
+
         Returns:
-            Dictionary with shensha information for each pillar
+            Dictionary containing complete bazi calculation results
         """
+        if include_liunian not in LIUNIAN_MODES:
+            raise ValueError(f"include_liunian must be one of {', '.join(LIUNIAN_MODES)}, got {include_liunian!r}")
+        if as_of is None:
+            as_of = date.today()
+        wanted = CHART_FIELDS if fields is None else fields
+        gans, zhis = self._natal_codes(natal)
+        day_master = gans.day
+
+        result = {key: dict(natal[key]) for key in PILLAR_KEYS if key in wanted}
         # age of this person < 11 years old
-        is_child = (datetime.datetime.now().year - year) < 11
-        
-        # Initialize result structure
-        shensha = {
-            "year": [],
-            "month": [],
-            "day": [],
-            "time": []
-        }
+        if result and as_of.year - birth_year < 11:
+            for key, names in zip(PILLAR_KEYS, child_shensha(gans, zhis).values()):
+                if key in result:
+                    result[key]["shensha"] = list(dict.fromkeys(result[key]["shensha"] + names))
 
-        # Apply different rules based on age
-        try:
-            shensha = apply_shensha_rules(shensha, data)
-            shensha = apply_shensha_other_rules(shensha, data)
-        except Exception as e:
-            print(e)
-            shensha = []
-        
-        if is_child:
-            # Apply children-specific rules (小兒關煞)
-            shensha = apply_xiao_er_guan_sha_rules(shensha, data)
-            
-        
-        return {
-            "year": list(dict.fromkeys(shensha["year"])),
-            "month": list(dict.fromkeys(shensha["month"])), 
-            "day": list(dict.fromkeys(shensha["day"])),
-            "time": list(dict.fromkeys(shensha["time"]))
-        }
+        dayun = natal.get("dayun")
+        if "dayun" in wanted:
+            result["dayun"] = self._select_dayun(dayun, as_of.year, include_liunian, dayun_range)
+        if "dayun_pillar" in wanted:
+            result["dayun_pillar"] = self._get_dayun_pillar(dayun, gans, zhis, day_master, birth_year, as_of.year)
+        if "liunian_pillar" in wanted:
+            result["liunian_pillar"] = self._get_liunian_pillar(dayun, gans, zhis, day_master, as_of.year)
+        for key in ("lunar_date", "solar_date", "nayin", "empty_positions", "analysis"):
+            if key in wanted:
+                result[key] = natal[key]
+        return result
+
+    def _natal_codes(self, natal: Dict[str, Any]):
+        """Stem / branch codes of a calculate_natal result's four pillars"""
+        pillars = [natal[key] for key in PILLAR_KEYS]
+        gans = self.Gans(*(GAN_CODE[p["gan"]] for p in pillars))
+        zhis = self.Zhis(*(ZHI_CODE[p["zhi"]] for p in pillars))
+        return gans, zhis
 
-    def _get_dayun_pillar(self, dayun_list: List[Dict[str, Any]], gans, zhis, day_master: str, birth_year: int) -> Optional[Dict[str, Any]]:
-        """Compute the current Dayun pillar and its shensha.
+    def _select_dayun(self, dayun_list, current_year: int, include_liunian: str, dayun_range) -> List[Dict[str, Any]]:
+        """The requested page of 大運 entries, with their 流年 trimmed to `include_liunian`"""
+        if dayun_range is not None:
+            offset, limit = dayun_range
+            dayun_list = dayun_list[offset:None if limit is None else offset + limit]
+        if include_liunian == "all":
+            return dayun_list
+
+        selected = []
+        for du in dayun_list:
+            if "liunian" in du:
+                du = dict(du)
+                du["liunian"] = [
+                    ln for ln in du["liunian"] if include_liunian == "current" and ln["year"] == current_year
+                ]
+            selected.append(du)
+        return selected
+
+    def expand_liunian(self, natal: Dict[str, Any], start_year: int, end_year: int) -> List[Dict[str, Any]]:
+        """
+        流年 entries for calendar years start_year..end_year (inclusive).
+
+        Years inside the chart's 大運 list are taken from it; years after its
+        last period continue the 大運 sequence ten years at a time. Years
+        before the chart starts are skipped.
+
+        Args:
+            natal: calculate_natal result
+            start_year, end_year: Inclusive calendar year range
+
+        Returns:
+            List of liunian entries in year order, same shape as dayun[i]["liunian"]
+        """
+        dayun = [du for du in natal["dayun"] if du.get("liunian")]
+        if not dayun or end_year < start_year:
+            return []
+        known = {ln["year"]: ln for du in dayun for ln in du["liunian"]}
+        first_year = dayun[0]["liunian"][0]["year"]
+        last = dayun[-1]
+        last_year = last["liunian"][-1]["year"]
+
+        entries = [known[y] for y in range(max(start_year, first_year), min(end_year, last_year) + 1) if y in known]
+        if end_year <= last_year:
+            return entries
+
+        # Past the computed periods: each further 大運 steps one jiazi in the
+        # direction the list already runs, and lasts ten years
+        gans, zhis = self._natal_codes(natal)
+        pillar = JIAZI_CODE[last["ganzhi"]]
+        step = 1 if len(dayun) < 2 or (pillar - JIAZI_CODE[dayun[-2]["ganzhi"]]) % 60 == 1 else -1
+        age_offset = last["liunian"][-1]["age"] - last_year
+
+        period_start = last_year + 1
+        while period_start <= end_year:
+            pillar = (pillar + step) % 60
+            period = dayun_period(tuple(gans), tuple(zhis), pillar)
+            for year in range(max(period_start, start_year), min(period_start + 10, end_year + 1)):
+                entries.append({"year": year, "age": year + age_offset, **period.liunian((year - 4) % 60)})
+            period_start += 10
+        return entries
+
+    def _get_dayun_pillar(self, dayun_list: List[Dict[str, Any]], gans, zhis, day_master: int, birth_year: int, current_year: int) -> Optional[Dict[str, Any]]:
+        """Compute the Dayun pillar for `current_year` and its shensha.
 
         Returns a structure similar to the frontend's Dayun cell with extra shensha list.
         """
@@ -579,10 +1047,7 @@ class BaziCalculator:
             return None
 
         # East Asian age reckoning consistent with frontend: current year - birth year + 1
-        current_year = datetime.datetime.now().year
         current_age = current_year - birth_year + 1
-        # Build natal data map for shensha rules
-        base_data = {"gan": gans._asdict(), "zhi": zhis._asdict()}
 
         # Determine current dayun by age
         selected_idx = 0
@@ -594,48 +1059,13 @@ class BaziCalculator:
                 break
 
         current_dayun = dayun_list[selected_idx]
-        gan_ = current_dayun.get("gan")
-        zhi_ = current_dayun.get("zhi")
-
-        # Hidden stems
-        hidden_stems = []
-        try:
-            from external.bazi.datas import zhi5_list, zhi5
-        except Exception:
-            pass
-        if 'zhi5_list' in globals() and zhi_ in zhi5_list:
-            for hidden_gan in zhi5_list[zhi_]:
-                hidden_stems.append({
-                    "gan": hidden_gan,
-                    "ten_deity": get_ten_deity(day_master, hidden_gan)
-                })
-
-        pillar = {
-            "ganzhi": f"{gan_}{zhi_}",
-            "gan": gan_,
-            "zhi": zhi_,
-            "gan_ten_deity": get_ten_deity(day_master, gan_),
-            "zhi_ten_deity": hidden_stems[0]["ten_deity"] if hidden_stems else get_ten_deity(day_master, zhi_),
-            "hidden_stems": hidden_stems,
-            "nayin": get_nayin(gan_, zhi_),
-        }
-
-        # Compute shensha for this specific pillar
-        try:
-            pillar["shensha"] = apply_shensha_rules_with_certain_pillar(base_data, {"gan": gan_, "zhi": zhi_})
-        except Exception:
-            pillar["shensha"] = []
+        return self._current_pillar_cell(JIAZI_CODE[current_dayun["ganzhi"]], gans, zhis, day_master)
 
-        return pillar
-
-    def _get_liunian_pillar(self, dayun_list: List[Dict[str, Any]], gans, zhis, day_master: str, birth_year: int) -> Optional[Dict[str, Any]]:
-        """Compute the current Liunian pillar (for the current year) and its shensha."""
+    def _get_liunian_pillar(self, dayun_list: List[Dict[str, Any]], gans, zhis, day_master: int, current_year: int) -> Optional[Dict[str, Any]]:
+        """Compute the Liunian pillar for `current_year` and its shensha."""
         if not dayun_list:
             return None
 
-        current_year = datetime.datetime.now().year
-        base_data = {"gan": gans._asdict(), "zhi": zhis._asdict()}
-
         current_dayun = None
         current_liunian = None
 
@@ -657,39 +1087,26 @@ class BaziCalculator:
                 return None
             current_liunian = ln_list[0]
 
-        gan_ = current_liunian.get("gan")
-        zhi_ = current_liunian.get("zhi")
-
-        hidden_stems = []
-        try:
-            from external.bazi.datas import zhi5_list
-        except Exception:
-            pass
-        if 'zhi5_list' in globals() and zhi_ in zhi5_list:
-            for hidden_gan in zhi5_list[zhi_]:
-                hidden_stems.append({
-                    "gan": hidden_gan,
-                    "ten_deity": get_ten_deity(day_master, hidden_gan)
-                })
-
         pillar = {
             "year": current_liunian.get("year"),
             "age": current_liunian.get("age"),
-            "ganzhi": f"{gan_}{zhi_}",
-            "gan": gan_,
-            "zhi": zhi_,
-            "gan_ten_deity": get_ten_deity(day_master, gan_),
-            "zhi_ten_deity": hidden_stems[0]["ten_deity"] if hidden_stems else get_ten_deity(day_master, zhi_),
-            "hidden_stems": hidden_stems,
-            "nayin": get_nayin(gan_, zhi_),
         }
+        pillar.update(self._current_pillar_cell(JIAZI_CODE[current_liunian["ganzhi"]], gans, zhis, day_master))
+        return pillar
+
+    def _current_pillar_cell(self, pillar: int, gans, zhis, day_master: int) -> Dict[str, Any]:
+        """Dayun / liunian cell for the current period, with its shensha against the natal chart"""
+        gan_ = pillar % 10
+        zhi_ = pillar % 12
+        cell = dict(PILLAR_DETAILS[day_master * 60 + pillar].cell)
 
+        # Compute shensha for this specific pillar
         try:
-            pillar["shensha"] = apply_shensha_rules_with_certain_pillar(base_data, {"gan": gan_, "zhi": zhi_})
+            cell["shensha"] = pillar_shensha(gans, zhis, gan_, zhi_)
         except Exception:
-            pillar["shensha"] = []
+            cell["shensha"] = []
 
-        return pillar
+        return cell
     
     def analyze_bazi(
         self,
@@ -718,17 +1135,17 @@ class BaziCalculator:
             hour_gan, hour_zhi = hour_ganzhi[0], hour_ganzhi[1]
             
             # Create the tuples for analysis
-            gans = self.Gans(year=year_gan, month=month_gan, day=day_gan, time=hour_gan)
-            zhis = self.Zhis(year=year_zhi, month=month_zhi, day=day_zhi, time=hour_zhi)
-            
-            day_master = day_gan
+            gans = self.Gans(*(GAN_CODE[g] for g in (year_gan, month_gan, day_gan, hour_gan)))
+            zhis = self.Zhis(*(ZHI_CODE[z] for z in (year_zhi, month_zhi, day_zhi, hour_zhi)))
             
             # Get comprehensive analysis
-            analysis = self._generate_comprehensive_analysis(gans, zhis, day_master, "male")
+            analysis = self._generate_comprehensive_analysis(
+                gans, zhis, gans.day, "male", self._chart_analysis(gans, zhis)
+            )
             
             # Format the analysis into a readable string
             result = f"八字分析: {year_ganzhi} {month_ganzhi} {day_ganzhi} {hour_ganzhi}\n"
-            result += f"日主: {day_master} ({analysis.get('day_master_nature', {}).get('element', 'unknown')})\n"
+            result += f"日主: {day_gan} ({analysis.get('day_master_nature', {}).get('element', 'unknown')})\n"
             result += f"身強弱: {analysis.get('day_master_strength', {}).get('description', 'unknown')}\n"
             result += f"五行分析: {analysis.get('wuxing_analysis', {}).get('wuxing_scores', {})}\n"
             result += f"根系分析: {analysis.get('root_analysis', 'unknown')}\n"
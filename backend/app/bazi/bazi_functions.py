@@ -7,7 +7,7 @@ Safe wrapper to import only the functions from bazi.py without executing the mai
 import os
 import sys
 import collections
-from typing import List, Dict, Any, Tuple
+from typing import Dict, Any, Tuple
 
 # Add the external bazi directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'external', 'bazi'))
@@ -16,183 +16,144 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'external', 'bazi'))
 from external.bazi.datas import *
 from external.bazi.common import *
 from external.bazi.ganzhi import *
-from bazi.bazi_data import ten_deities_map, nayins_map, shensha_rules, shensha_other_rules, xiao_er_guan_sha_rules
+from bazi.bazi_data import shensha_rules, shensha_other_rules, xiao_er_guan_sha_rules
+from bazi.ganzhi_codes import *
 
+# 長生, 臨官, 帝旺
+STRONG_STAGES = (LIFE_STAGE_CODE['长'], LIFE_STAGE_CODE['建'], LIFE_STAGE_CODE['帝'])
 
-# Define the functions directly here (copied from bazi.py) to avoid importing the script
+
+# Define the functions directly here (copied from bazi.py) to avoid importing the script.
+# Stems, branches and pillars are the integer codes from ganzhi_codes; only the
+# get_* name helpers and get_empty_positions hand back display strings.
 def get_gen(gan, zhis):
     """Calculate root strength analysis"""
-    zhus = []
-    zhongs = []
-    weis = []
-    result = ""
-    for item in zhis:
-        zhu = zhi5_list[item][0]
-        if ten_deities[gan]['本'] == ten_deities[zhu]['本']:
-            zhus.append(item)
-
-    for item in zhis:
-        if len(zhi5_list[item]) == 1:
-            continue
-        zhong = zhi5_list[item][1]
-        if ten_deities[gan]['本'] == ten_deities[zhong]['本']:
-            zhongs.append(item)
-
-    for item in zhis:
-        if len(zhi5_list[item]) < 3:
-            continue
-        zhong = zhi5_list[item][2]
-        if ten_deities[gan]['本'] == ten_deities[zhong]['本']:
-            weis.append(item)
+    element = GAN_ELEMENT[gan]
+    zhus = [z for z in zhis if GAN_ELEMENT[HIDDEN_STEMS[z][0]] == element]
+    zhongs = [z for z in zhis if len(HIDDEN_STEMS[z]) > 1 and GAN_ELEMENT[HIDDEN_STEMS[z][1]] == element]
+    weis = [z for z in zhis if len(HIDDEN_STEMS[z]) > 2 and GAN_ELEMENT[HIDDEN_STEMS[z][2]] == element]
 
     if not (zhus or zhongs or weis):
         return "無根"
-    else:
-        result = result + "強：{}{}".format(''.join(zhus), chr(12288)) if zhus else result
-        result = result + "中：{}{}".format(''.join(zhongs), chr(12288)) if zhongs else result
-        result = result + "弱：{}".format(''.join(weis)) if weis else result
-        return result
+    result = ""
+    result = result + "強：{}{}".format(''.join(ZHI[z] for z in zhus), chr(12288)) if zhus else result
+    result = result + "中：{}{}".format(''.join(ZHI[z] for z in zhongs), chr(12288)) if zhongs else result
+    result = result + "弱：{}".format(''.join(ZHI[z] for z in weis)) if weis else result
+    return result
 
 
-def gan_zhi_he(zhu):
+def gan_zhi_he(gan, zhi):
     """Check for gan-zhi harmony"""
-    gan, zhi = zhu
-    if ten_deities[gan]['合'] in zhi5[zhi]:
-        return "|"
-    return ""
+    return "|" if GAN_ZHI_HE[gan * 12 + zhi] else ""
 
 
 def get_gong(zhis):
-    """Get special gong combinations"""
+    """Get special gong combinations (branch codes) between adjacent pillars"""
     result = []
-    gans_list = list(zhis)  # This needs to be passed differently in real usage
-    
-    for i in range(3):
-        # Note: This function in original bazi.py references global 'gans' 
-        # We'll need to modify this to work properly
+    mask = zhi_mask(zhis)
+    for i in range(len(zhis) - 1):
         zhi1 = zhis[i]
-        zhi2 = zhis[i+1]
-        if abs(Zhi.index(zhi1) - Zhi.index(zhi2)) == 2:
-            value = Zhi[(Zhi.index(zhi1) + Zhi.index(zhi2))//2]
-            result.append(value)
-        if (zhi1 + zhi2 in gong_he) and (gong_he[zhi1 + zhi2] not in zhis):
-            result.append(gong_he[zhi1 + zhi2])
-            
+        zhi2 = zhis[i + 1]
+        # Only the direct 夾; bazi.py never wrapped round from 亥 to 子 here
+        if abs(zhi1 - zhi2) == 2:
+            result.append(JIA[zhi1 * 12 + zhi2])
+        gong = GONG_HE[zhi1 * 12 + zhi2]
+        if gong >= 0 and not mask >> gong & 1:
+            result.append(gong)
     return result
 
 
 def is_ku(zhi):
     """Check if a zhi is a treasury position"""
-    return True if zhi in "辰戌丑未" else False
+    return IS_KU[zhi]
 
 
 def zhi_ku(zhi, items):
     """Check if zhi is treasury and contains items"""
-    return True if is_ku(zhi) and min(zhi5[zhi], key=zhi5[zhi].get) in items else False
+    return IS_KU[zhi] and WEAKEST_STEM[zhi] in items
 
 
 def gan_ke(gan1, gan2):
     """Check if two gans have a restraining relationship"""
-    return True if ten_deities[gan1]['克'] == ten_deities[gan2]['本'] or ten_deities[gan2]['克'] == ten_deities[gan1]['本'] else False
+    return GAN_CONTROLS[gan1] == GAN_ELEMENT[gan2] or GAN_CONTROLS[gan2] == GAN_ELEMENT[gan1]
 
 
 def jin_jiao(first, second):
     """Check for adjacent positions"""
-    return True if Zhi.index(second) - Zhi.index(first) == 1 else False
+    return second - first == 1
 
 
 def calculate_wuxing_scores(gans, zhis):
-    """Calculate five element scores using the original bazi.py algorithm"""
-    scores = {"金": 0, "木": 0, "水": 0, "火": 0, "土": 0}
-    gan_scores = {"甲": 0, "乙": 0, "丙": 0, "丁": 0, "戊": 0, "己": 0, "庚": 0, "辛": 0, "壬": 0, "癸": 0}
-    
-    # Calculate scores same as bazi.py
+    """
+    Calculate five element scores using the original bazi.py algorithm.
+
+    Returns (element scores in ELEMENTS order, stem scores in Gan order).
+    """
+    scores = [0] * 5
+    gan_scores = [0] * 10
+
     for item in gans:
-        scores[gan5[item]] += 5
+        scores[GAN_ELEMENT[item]] += 5
         gan_scores[item] += 5
-    
-    zhis_list = list(zhis)
-    for item in zhis_list + [zhis_list[1]]:  # Include month zhi twice as in original
-        for gan in zhi5[item]:
-            scores[gan5[gan]] += zhi5[item][gan]
-            gan_scores[gan] += zhi5[item][gan]
-    
+
+    for item in list(zhis) + [zhis[1]]:  # Include month zhi twice as in original
+        for gan, weight in zip(HIDDEN_STEMS[item], HIDDEN_WEIGHTS[item]):
+            scores[GAN_ELEMENT[gan]] += weight
+            gan_scores[gan] += weight
+
     return scores, gan_scores
 
 
 def calculate_ten_deities(gans, zhis, day_master):
-    """Calculate ten deities distribution as in bazi.py"""
-    gan_shens = []
-    for seq, item in enumerate(gans):    
-        if seq == 2:  # Day master position
-            gan_shens.append('日主')
-        else:
-            gan_shens.append(get_ten_deity(day_master, item))
-
-    zhi_shens = []  # Main qi of earthly branches
-    for item in zhis:
-        d = zhi5[item]
-        zhi_shens.append(get_ten_deity(day_master, max(d, key=d.get)))
-    
+    """Ten deity codes of the stems and of each branch's main qi, as in bazi.py"""
+    gan_shens = [ten_god(day_master, item) for item in gans]
+    zhi_shens = [ten_god(day_master, MAIN_STEM[item]) for item in zhis]
     return gan_shens, zhi_shens
 
 
-def check_day_master_strength(gans, zhis, day_master):
-    """Check day master strength using original algorithm"""
-    me_status = []
-    weak = True
-    
-    for item in zhis:
-        me_status.append(ten_deities[day_master][item])
-        if ten_deities[day_master][item] in ('长', '帝', '建'):
-            weak = False
-    
-    # Additional check from original code
-    gan_shens, zhi_shens = calculate_ten_deities(gans, zhis, day_master)
-    shens = gan_shens + zhi_shens
-    
-    if weak:
-        if shens.count('比') + me_status.count('库') > 2:
-            weak = False
-    
-    return not weak  # Return True for strong, False for weak
+def check_day_master_strength(zhis, day_master):
+    """
+    Strong when some branch puts the day master at 長生, 臨官 or 帝旺.
+
+    bazi.py would also call a chart strong on 比肩 / 库 counts, but the port
+    compared display names against the abbreviations so that never applied.
+    """
+    return any(life_stage(day_master, z) in STRONG_STAGES for z in zhis)
 
 
-def get_nayin_for_ganzhi(gan: str, zhi: str) -> str:
-    """Get nayin for a gan-zhi pair"""
-    try:
-        return nayins.get((gan, zhi), "unknown")
-    except:
-        return "unknown"
+def get_nayin_for_ganzhi(pillar: int) -> str:
+    """Get nayin for a pillar, in the vendored (simplified) spelling"""
+    return NAYIN[pillar]
 
 
-def get_empty_positions(day_gan: str, day_zhi: str, all_zhis: List[str]) -> Dict[str, Any]:
+def get_empty_positions(day_pillar: int, all_zhis) -> Dict[str, Any]:
     """Calculate empty positions (空亡)"""
-    try:
-        empty_pair = empties.get((day_gan, day_zhi), ())
-        empty_in_chart = [zhi for zhi in all_zhis if zhi in empty_pair]
-        
-        return {
-            "empty_pair": list(empty_pair),
-            "empty_in_chart": empty_in_chart,
-            "count": len(empty_in_chart)
-        }
-    except:
-        return {
-            "empty_pair": [],
-            "empty_in_chart": [],
-            "count": 0
-        }
-def get_ten_deity(key, value):
-    """Get ten deity for a gan-zhi pair"""
-    original_value = ten_deities[key].get(value, "unknown")
-    return ten_deities_map.get(original_value, original_value)
-def get_nayin(gan, zhi):
-    """Get nayin for a gan-zhi pair"""
-    original_value = nayins.get((gan, zhi), "unknown")
-    return nayins_map.get(original_value, original_value)
+    empty_zhis = EMPTY_ZHIS[day_pillar]
+    empty_in_chart = [ZHI[z] for z in all_zhis if z in empty_zhis]
+    return {
+        "empty_pair": list(EMPTY_PAIR[day_pillar]),
+        "empty_in_chart": empty_in_chart,
+        "count": len(empty_in_chart)
+    }
 
 
+def get_ten_deity(day_master, gan):
+    """Display name of a stem's ten deity"""
+    return TEN_GOD_NAME[ten_god(day_master, gan)]
+
+
+def get_life_stage(day_master, zhi):
+    """Display name of the day master's life stage at a branch"""
+    return LIFE_STAGE_NAME[life_stage(day_master, zhi)]
+
+
+def get_nayin(pillar):
+    """Display name of a pillar's nayin"""
+    return NAYIN_NAME[pillar]
+
+
+# The shensha interpreters below read characters, not codes. BaziCalculator uses
+# the compiled tables in shensha.py; these stay as the reference they are tested against.
 def apply_shensha_rules(shansha, data):
     """Apply general shensha rules"""
     for rule in shensha_rules:
@@ -291,55 +252,47 @@ def apply_xiao_er_guan_sha_rules(shansha, data):
                         break
     
     return shansha
+# 羊刃: the branch where the day master is 帝旺 (yang) or 冠帶 (yin)
+YANG_BLADE = tuple(
+    BRANCH_LIFE_STAGE.index(LIFE_STAGE_CODE['帝' if dm % 2 == 0 else '冠'], dm * 12, dm * 12 + 12) - dm * 12
+    for dm in range(10)
+)
+# 將星 / 華蓋 per 三合 group; a branch's group is its code mod 4
+# (申子辰, 丑巳酉, 寅午戌, 亥卯未)
+JIANG_XING = (ZHI_CODE["子"], ZHI_CODE["酉"], ZHI_CODE["午"], ZHI_CODE["卯"])
+HUA_GAI = (ZHI_CODE["辰"], ZHI_CODE["丑"], ZHI_CODE["戌"], ZHI_CODE["未"])
+
+
 def analyze_special_stars(gans, zhis, day_master):
     """Analyze special stars and patterns"""
     analysis = {}
-    
+
     # Day master zodiac and characteristics
     day_zhi = zhis[2] if len(zhis) > 2 else zhis[0]
-    
+
     # Check for Yang Blade (羊刃)
-    key = '帝' if Gan.index(day_master) % 2 == 0 else '冠'
-    if ten_deities[day_master].inverse[key] in zhis:
+    if YANG_BLADE[day_master] in zhis:
         analysis['yang_blade'] = {
-            "position": ten_deities[day_master].inverse[key],
-            "description": "羊刃重重又見祿，富貴饒金玉" if ten_deities[day_master].inverse['冠'] else "勞累命"
+            "position": ZHI[YANG_BLADE[day_master]],
+            "description": "羊刃重重又見祿，富貴饒金玉"
         }
-    
+
     # Check for Jiang Xing (将星)
-    other_zhis = list(zhis[:2]) + list(zhis[3:]) if len(zhis) > 3 else list(zhis)
-    jiang_xing = None
-    
-    if day_zhi in ("申", "子", "辰") and "子" in other_zhis:
-        jiang_xing = "子"
-    elif day_zhi in ("丑", "巳", "酉") and "酉" in other_zhis:
-        jiang_xing = "酉"
-    elif day_zhi in ("寅", "午", "戌") and "午" in other_zhis:
-        jiang_xing = "午"
-    elif day_zhi in ("亥", "卯", "未") and "卯" in other_zhis:
-        jiang_xing = "卯"
-    
-    if jiang_xing:
+    other_zhis = list(zhis[:2]) + list(zhis[3:]) if len(zhis) > 2 else list(zhis)
+
+    jiang_xing = JIANG_XING[day_zhi % 4]
+    if jiang_xing in other_zhis:
         analysis['jiang_xing'] = {
-            "star": jiang_xing,
+            "star": ZHI[jiang_xing],
             "description": "將星: 常欲吉星相扶，貴煞加臨乃為吉慶"
         }
-    
+
     # Check for Hua Gai (华盖)
-    hua_gai = None
-    if day_zhi in ("申", "子", "辰") and "辰" in other_zhis:
-        hua_gai = "辰"
-    elif day_zhi in ("丑", "巳", "酉") and "丑" in other_zhis:
-        hua_gai = "丑"
-    elif day_zhi in ("寅", "午", "戌") and "戌" in other_zhis:
-        hua_gai = "戌"
-    elif day_zhi in ("亥", "卯", "未") and "未" in other_zhis:
-        hua_gai = "未"
-    
-    if hua_gai:
+    hua_gai = HUA_GAI[day_zhi % 4]
+    if hua_gai in other_zhis:
         analysis['hua_gai'] = {
-            "star": hua_gai,
+            "star": ZHI[hua_gai],
             "description": "華蓋: 多主孤寡，總貴亦不免孤獨，作僧道藝術論"
         }
-    
-    return analysis 
\ No newline at end of file
+
+    return analysis
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorized 擇日 scan: days, months or years whose pillar stands in a given
+relation to a natal chart.
+
+Going through lunar_python once per day is far too slow for multi-year
+scans, and none of it is needed for pillars:
+
+    day pillar     (date ordinal + DAY_OFFSET) % 60
+    month pillar   branch from the last 節 on or before the date, stem by 五虎遁
+    year pillar    (year - 4) % 60, the year changing at 立春
+
+Only the twelve 節 dates of each solar year come from lunar_python, once per
+year (`jie_days`). A 節 day belongs to the month it starts, as in
+lunar_python's getMonthInGanZhi / getYearInGanZhiByLiChun; the scan is per
+day, not per hour.
+
+Every candidate pillar is tested against the chosen natal pillars with the
+RULES below as NumPy table lookups over the whole range at once, so a scan
+of decades of days takes milliseconds.
+"""
+
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from lunar_python import Lunar
+
+from bazi.bazi_data import shensha_rules
+from bazi.ganzhi_codes import (
+    GAN_CODE, GAN_CONTROLS, GAN_ELEMENT, JIAZI, JIAZI_CODE, MONTH_STEM, ZHI_CODE, ZHI_RELATION, ZHI_RELATION_BIT,
+)
+
+# Day pillar of date ordinal 0: 1900-01-01 was a 甲戌 day
+DAY_OFFSET = (JIAZI_CODE["甲戌"] - date(1900, 1, 1).toordinal()) % 60
+
+# The twelve 節 in calendar order (lunar_python names), each starting the
+# month branch after the previous one: 小寒 starts 丑, 立春 starts 寅, ...
+JIE = ("小寒", "立春", "惊蛰", "清明", "立夏", "芒种", "小暑", "立秋", "白露", "寒露", "立冬", "大雪")
+LI_CHUN = 1
+
+SCOPES = ("day", "month", "year")
+PILLAR_TARGETS = ("year", "month", "day", "hour")
+
+RULES = (
+    "sanhe",           # 三合: the branches belong to one 三合 frame
+    "liuhe",           # 六合
+    "liuchong",        # 六沖
+    "tianke_dichong",  # 天剋地沖: stems 相剋 (as gan_ke) and branches 六沖
+    "guiren",          # 天乙貴人: the branch is the natal stem's 貴人
+)
+
+
+def _relation_table(kind: str) -> np.ndarray:
+    """[candidate branch, natal branch] → zhi_atts lists the pair under `kind`"""
+    bit = ZHI_RELATION_BIT[kind]
+    return (np.array(ZHI_RELATION).reshape(12, 12) & bit) != 0
+
+
+SANHE = _relation_table("合")
+LIUHE = _relation_table("六")
+LIUCHONG = _relation_table("冲")
+# [candidate stem, natal stem] → either stem controls the other (gan_ke)
+GAN_KE = np.array([
+    [GAN_CONTROLS[a] == GAN_ELEMENT[b] or GAN_CONTROLS[b] == GAN_ELEMENT[a] for b in range(10)] for a in range(10)
+])
+# [natal stem, candidate branch] → the branch is the stem's 天乙貴人, per the shensha rule
+GUIREN = np.zeros((10, 12), dtype=bool)
+for _gan, _zhis in next(rule for rule in shensha_rules if rule["name"] == "天乙貴人")["mapping"].items():
+    GUIREN[GAN_CODE[_gan], [ZHI_CODE[z] for z in _zhis]] = True
+
+_MONTH_STEMS = np.array(MONTH_STEM).reshape(10, 12)
+
+
+@lru_cache(maxsize=None)
+def jie_days(year: int) -> Tuple[int, ...]:
+    """Date ordinals of the twelve 節 of a solar year, in JIE order."""
+    table = Lunar.fromYmd(year, 1, 1).getJieQiTable()
+    return tuple(date(table[name].getYear(), table[name].getMonth(), table[name].getDay()).toordinal() for name in JIE)
+
+
+def _month_starts(first_year: int, last_year: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Every 節 in first_year..last_year: date ordinals, the month branch each
+    starts, and the pillar year (the calendar year, less one before 立春).
+    """
+    days, branches, years = [], [], []
+    for year in range(first_year, last_year + 1):
+        for k, day in enumerate(jie_days(year)):
+            days.append(day)
+            branches.append((k + 1) % 12)
+            years.append(year if k >= LI_CHUN else year - 1)
+    return np.array(days), np.array(branches), np.array(years)
+
+
+def year_jiazi(years) -> np.ndarray:
+    """Year pillar (jiazi) of pillar years; 1984 is 甲子."""
+    return (np.asarray(years) - 4) % 60
+
+
+def scan_pillars(start: date, end: date, scope: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Periods of `scope` between two dates, inclusive.
+
+    Returns:
+        (first day ordinal, year jiazi, month jiazi, day jiazi) arrays, one
+        entry per day; per month, from the first 節 on or after `start`; or
+        per year, from the first 立春 on or after `start`. Day jiazi is -1
+        for months and years, month jiazi -1 for years.
+    """
+    first, last = start.toordinal(), end.toordinal()
+    if scope == "year":
+        years = np.arange(start.year, end.year + 1)
+        days = np.array([jie_days(int(y))[LI_CHUN] for y in years], dtype=np.int64)
+        keep = (days >= first) & (days <= last)
+        days, years = days[keep], years[keep]
+        none = np.full(len(days), -1)
+        return days, year_jiazi(years), none, none
+
+    jie, branches, pillar_years = _month_starts(start.year - 1, end.year)
+    if scope == "month":
+        keep = (jie >= first) & (jie <= last)
+        days, month_zhi, years = jie[keep], branches[keep], pillar_years[keep]
+        day_jiazi = np.full(len(days), -1)
+    elif scope == "day":
+        days = np.arange(first, last + 1, dtype=np.int64)
+        period = np.searchsorted(jie, days, side="right") - 1
+        month_zhi, years = branches[period], pillar_years[period]
+        day_jiazi = (days + DAY_OFFSET) % 60
+    else:
+        raise ValueError(f"scope must be one of {SCOPES}, got {scope!r}")
+
+    year_pillar = year_jiazi(years)
+    month_gan = _MONTH_STEMS[year_pillar % 10, month_zhi]
+    # jiazi(gan, zhi), vectorized
+    month_pillar = (6 * month_gan - 5 * month_zhi) % 60
+    return days, year_pillar, month_pillar, day_jiazi
+
+
+def _rule_hits(rule: str, gan: np.ndarray, zhi: np.ndarray, natal_gan: int, natal_zhi: int) -> np.ndarray:
+    if rule == "sanhe":
+        return SANHE[zhi, natal_zhi]
+    if rule == "liuhe":
+        return LIUHE[zhi, natal_zhi]
+    if rule == "liuchong":
+        return LIUCHONG[zhi, natal_zhi]
+    if rule == "tianke_dichong":
+        return GAN_KE[gan, natal_gan] & LIUCHONG[zhi, natal_zhi]
+    if rule == "guiren":
+        return GUIREN[natal_gan, zhi]
+    raise ValueError(f"unknown rule {rule!r}; expected one of {RULES}")
+
+
+def search_dates(
+    gans: Sequence[int],
+    zhis: Sequence[int],
+    start: date,
+    end: date,
+    scope: str = "day",
+    rules: Sequence[str] = ("liuchong",),
+    targets: Sequence[str] = ("day",),
+    match: str = "any",
+    limit: int = 500,
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Days, months or years whose pillar meets `rules` against a natal chart.
+
+    Args:
+        gans, zhis: Natal stem / branch codes (year, month, day, time)
+        start, end: Inclusive date range
+        scope: "day", "month" or "year": which pillar is scanned
+        rules: Names from RULES
+        targets: Natal pillars ("year", "month", "day", "hour") the scanned
+            pillar is compared with; a rule holds if it holds for any of them
+        match: "any" rule or "all" rules must hold
+        limit: Most matches returned
+
+    Returns:
+        (number of matching periods, the first `limit` of them in date
+        order), each {"start", "ganzhi", "year_ganzhi", "month_ganzhi",
+        "day_ganzhi", "hits"} with hits as "rule:target" labels
+    """
+    if match not in ("any", "all"):
+        raise ValueError(f"match must be 'any' or 'all', got {match!r}")
+    days, year_pillar, month_pillar, day_pillar = scan_pillars(start, end, scope)
+    scanned = {"day": day_pillar, "month": month_pillar, "year": year_pillar}[scope]
+    gan, zhi = scanned % 10, scanned % 12
+
+    # (periods, rules, targets)
+    hits = np.empty((len(days), len(rules), len(targets)), dtype=bool)
+    for r, rule in enumerate(rules):
+        for t, target in enumerate(targets):
+            pillar = PILLAR_TARGETS.index(target)
+            hits[:, r, t] = _rule_hits(rule, gan, zhi, gans[pillar], zhis[pillar])
+    per_rule = hits.any(axis=2)
+    selected = np.flatnonzero(per_rule.all(axis=1) if match == "all" else per_rule.any(axis=1))
+
+    matches = []
+    for i in selected[:limit].tolist():
+        matches.append({
+            "start": date.fromordinal(int(days[i])),
+            "ganzhi": JIAZI[scanned[i]],
+            "year_ganzhi": JIAZI[year_pillar[i]],
+            "month_ganzhi": JIAZI[month_pillar[i]] if month_pillar[i] >= 0 else None,
+            "day_ganzhi": JIAZI[day_pillar[i]] if day_pillar[i] >= 0 else None,
+            "hits": [
+                f"{rule}:{target}"
+                for r, rule in enumerate(rules) for t, target in enumerate(targets) if hits[i, r, t]
+            ],
+        })
+    return len(selected), matches
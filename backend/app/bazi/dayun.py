@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memoized 大運 skeletons.
+
+The 大運 sequence of a chart is fixed by its month pillar and direction
+(yang-year male and yin-year female run forward): period k is the month
+pillar stepped k places through the sixty jiazi. Everything the chart
+reports about a period (ten deities, hidden stems, nayin, 空亡, 夾 / 拱
+against the natal branches) and about a 流年 inside it depends only on
+the natal pillars, the period's pillar and the year's pillar, never on the
+birth moment itself. Only start ages and calendar years do.
+
+`dayun_skeleton` builds those annotations once per (natal pillars,
+direction) and keeps them in an LRU; `BaziCalculator._get_dayun` lays the
+birth's start ages and years over them. Annotations are frozen (see
+natal_cache.py) because every chart sharing a skeleton shares them.
+"""
+
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from bazi.ganzhi_codes import EMPTY_ZHIS, GONG_HE, JIA, YINYANG_NAME, ZHI, ZHI_CODE, jiazi, zhi_mask
+from bazi.natal_cache import FrozenDict, FrozenList
+from bazi.pillar_details import PILLAR_DETAILS
+
+# 天羅地網, 四生, 四敗, 四庫 as branch masks
+TIAN_LUO_DI_WANG = zhi_mask(ZHI_CODE[z] for z in "戌亥辰巳")
+SI_SHENG = zhi_mask(ZHI_CODE[z] for z in "寅申巳亥")
+SI_BAI = zhi_mask(ZHI_CODE[z] for z in "子午卯酉")
+SI_KU = zhi_mask(ZHI_CODE[z] for z in "辰戌丑未")
+
+EMPTY = FrozenList()
+
+# Periods in a skeleton: lunar_python's ten 大運 minus the one before 起運
+SKELETON_PERIODS = 9
+
+# Skeletons kept. Each holds at most ~100 流年 annotations (~1.5 KB each)
+# once every year in it has been asked for.
+SKELETON_CACHE_SIZE = 256
+
+
+def _jia_gong(gan: int, zhi: int, gans, zhis, natal_mask: int) -> list:
+    """夾 / 拱 a pillar forms with each base pillar sharing its stem"""
+    found = []
+    for base_gan, base_zhi in zip(gans, zhis):
+        if gan == base_gan:
+            jia = JIA[zhi * 12 + base_zhi]
+            if jia >= 0:
+                found.append(f"夾:{ZHI[jia]}")
+
+            # Check for 拱 (arching) relationships
+            gong = GONG_HE[base_zhi * 12 + zhi]
+            if gong >= 0 and not natal_mask >> gong & 1:
+                found.append(f"拱:{ZHI[gong]}")
+    return FrozenList(found)
+
+
+class DayunPeriod:
+    """Annotations of one 大運 pillar against a natal chart, and of the 流年 inside it."""
+
+    __slots__ = ("pillar", "annotation", "_gans", "_zhis", "_natal_mask", "_zhus", "_empty_zhis", "_extended_mask", "_liunian")
+
+    def __init__(self, gans: Tuple[int, ...], zhis: Tuple[int, ...], pillar: int):
+        gan_, zhi_ = pillar % 10, pillar % 12
+        day_master = gans[2]
+        self.pillar = pillar
+        self._natal_mask = zhi_mask(zhis)
+        self._zhus = frozenset(jiazi(g, z) for g, z in zip(gans, zhis))
+        self._empty_zhis = EMPTY_ZHIS[jiazi(gans[2], zhis[2])]
+        # 流年 are read against the natal pillars plus this one
+        self._gans = tuple(gans) + (gan_,)
+        self._zhis = tuple(zhis) + (zhi_,)
+        self._extended_mask = self._natal_mask | 1 << zhi_
+        self._liunian: Dict[int, FrozenDict] = {}
+
+        detail = PILLAR_DETAILS[day_master * 60 + pillar].cell
+        # Every key of a 大運 entry except start_age and liunian, in output order
+        self.annotation = FrozenDict({
+            "ganzhi": detail["ganzhi"],
+            "gan": detail["gan"],
+            "zhi": detail["zhi"],
+            "gan_ten_deity": detail["gan_ten_deity"],
+            "zhi_ten_deity": detail["zhi_ten_deity"],
+            "gan_yinyang": YINYANG_NAME[gan_ % 2],
+            "zhi_yinyang": YINYANG_NAME[zhi_ % 2],
+            "hidden_stems": PILLAR_DETAILS[day_master * 60 + pillar].weighted_hidden_stems,
+            # bazi.py's relationship check tested `orig_zhi in zhi_atts[zhi_]`,
+            # whose keys are relation names, so no 地支 relationship was
+            # ever reported here; the lists stay empty.
+            "zhi_relationships": EMPTY,
+            "is_empty": zhi_ in self._empty_zhis,
+            "is_repeated": pillar in self._zhus,
+            "nayin": detail["nayin"],
+            "special_combinations": _jia_gong(gan_, zhi_, gans, zhis, self._natal_mask),
+        })
+
+    def liunian(self, ln_pillar: int) -> FrozenDict:
+        """Every key of a 流年 entry in this period except year and age, built on first use."""
+        annotation = self._liunian.get(ln_pillar)
+        if annotation is None:
+            annotation = self._liunian[ln_pillar] = self._build_liunian(ln_pillar)
+        return annotation
+
+    def _build_liunian(self, ln_pillar: int) -> FrozenDict:
+        gan2_, zhi2_ = ln_pillar % 10, ln_pillar % 12
+        detail = PILLAR_DETAILS[self._gans[2] * 60 + ln_pillar].cell
+
+        # Check for special patterns (天羅地網, 四生, 四敗, 四庫)
+        all_zhis = self._extended_mask | 1 << zhi2_
+        natal_mask = self._natal_mask
+        special_patterns = []
+        if all_zhis & TIAN_LUO_DI_WANG == TIAN_LUO_DI_WANG:
+            special_patterns.append("天羅地網:戌亥辰巳")
+        if all_zhis & SI_SHENG == SI_SHENG and (SI_SHENG & natal_mask).bit_count() == 2:
+            special_patterns.append("四生:寅申巳亥")
+        if all_zhis & SI_BAI == SI_BAI and (SI_BAI & natal_mask).bit_count() == 2:
+            special_patterns.append("四敗:子午卯酉")
+        if all_zhis & SI_KU == SI_KU and (SI_KU & natal_mask).bit_count() == 2:
+            special_patterns.append("四庫:辰戌丑未")
+
+        return FrozenDict({
+            "ganzhi": detail["ganzhi"],
+            "gan": detail["gan"],
+            "zhi": detail["zhi"],
+            "gan_ten_deity": detail["gan_ten_deity"],
+            "zhi_ten_deity": detail["zhi_ten_deity"],
+            "hidden_stems": detail["hidden_stems"],
+            "zhi_relationships": EMPTY,
+            "is_empty": zhi2_ in self._empty_zhis,
+            "is_repeated": ln_pillar in self._zhus,
+            "nayin": detail["nayin"],
+            "special_combinations": _jia_gong(gan2_, zhi2_, self._gans, self._zhis, natal_mask),
+            "special_patterns": FrozenList(special_patterns)
+        })
+
+
+@lru_cache(maxsize=SKELETON_CACHE_SIZE)
+def dayun_skeleton(gans: Tuple[int, ...], zhis: Tuple[int, ...], forward: bool) -> Tuple[DayunPeriod, ...]:
+    """
+    The chart's 大運 periods after 起運, first to last.
+
+    Args:
+        gans, zhis: Natal stem / branch codes (year, month, day, time), as tuples
+        forward: Whether the sequence steps forward from the month pillar
+    """
+    month = jiazi(gans[1], zhis[1])
+    step = 1 if forward else -1
+    return tuple(
+        dayun_period(gans, zhis, (month + step * k) % 60) for k in range(1, SKELETON_PERIODS + 1)
+    )
+
+
+@lru_cache(maxsize=SKELETON_CACHE_SIZE * SKELETON_PERIODS)
+def dayun_period(gans: Tuple[int, ...], zhis: Tuple[int, ...], pillar: int) -> DayunPeriod:
+    """Memoized DayunPeriod, shared by skeletons and by 大運 past the last one."""
+    return DayunPeriod(tuple(gans), tuple(zhis), pillar)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Integer codes for 天干 / 地支 / 六十甲子 and flat lookup tables over them.
+
+The vendored tables in external/bazi/datas.py are dicts keyed by single
+characters (and by concatenated or tuple pairs), so every lookup hashes a
+string and many chain two or three dicts. The calculator runs hundreds of
+those per chart (ten 大運 × ten 流年 × hidden stems). This module compiles
+the same data once at import into tuples indexed by small ints:
+
+    stem    0-9   甲 .. 癸            (Gan order)
+    branch  0-11  子 .. 亥            (Zhi order)
+    jiazi   0-59  甲子 .. 癸亥        (stem = j % 10, branch = j % 12)
+    element 0-4   金 木 水 火 土      (wuxing score order)
+
+Pair tables are flattened as `a * width + b`. Characters and display names
+only appear when a result dict is built, via the *_NAME tuples below.
+"""
+
+from external.bazi.datas import empties, nayins, ten_deities, zhi5, zhi5_list, zhi_atts
+from external.bazi.ganzhi import Gan, Zhi, gan5, gong_he
+
+from bazi.bazi_data import nayins_map, ten_deities_map
+
+GAN = tuple(Gan)
+ZHI = tuple(Zhi)
+JIAZI = tuple(GAN[i % 10] + ZHI[i % 12] for i in range(60))
+ELEMENTS = ("金", "木", "水", "火", "土")
+
+GAN_CODE = {g: i for i, g in enumerate(GAN)}
+ZHI_CODE = {z: i for i, z in enumerate(ZHI)}
+JIAZI_CODE = {gz: i for i, gz in enumerate(JIAZI)}
+ELEMENT_CODE = {e: i for i, e in enumerate(ELEMENTS)}
+
+# 十神 and 十二長生 in the vendored data's abbreviated form
+TEN_GODS = ("比", "劫", "食", "伤", "才", "财", "杀", "官", "枭", "印")
+LIFE_STAGES = ("长", "沐", "冠", "建", "帝", "衰", "病", "死", "墓", "绝", "胎", "养")
+TEN_GOD_CODE = {s: i for i, s in enumerate(TEN_GODS)}
+LIFE_STAGE_CODE = {s: i for i, s in enumerate(LIFE_STAGES)}
+
+# Display names, as get_ten_deity has always returned them
+TEN_GOD_NAME = tuple(ten_deities_map.get(s, s) for s in TEN_GODS)
+LIFE_STAGE_NAME = tuple(ten_deities_map.get(s, s) for s in LIFE_STAGES)
+
+YINYANG_NAME = ("陽", "陰")
+
+
+def jiazi(gan: int, zhi: int) -> int:
+    """Jiazi index of a stem/branch pair with matching parity."""
+    return (6 * gan - 5 * zhi) % 60
+
+
+# ── Stems ──
+GAN_ELEMENT = tuple(ELEMENT_CODE[gan5[g]] for g in GAN)
+# Element a stem controls (克); two stems 相克 when either controls the other
+GAN_CONTROLS = tuple(ELEMENT_CODE[ten_deities[g]["克"]] for g in GAN)
+# 天干五合 partner
+GAN_HE = tuple(GAN_CODE[ten_deities[g]["合"]] for g in GAN)
+
+# [day_master * 10 + stem] → 十神 code
+STEM_TEN_GOD = tuple(TEN_GOD_CODE[ten_deities[dm][g]] for dm in GAN for g in GAN)
+# [day_master * 12 + branch] → 十二長生 code
+BRANCH_LIFE_STAGE = tuple(LIFE_STAGE_CODE[ten_deities[dm][z]] for dm in GAN for z in ZHI)
+
+# ── Branches ──
+# 藏干 in zhi5_list order (本氣 first) and their zhi5 weights
+HIDDEN_STEMS = tuple(tuple(GAN_CODE[g] for g in zhi5_list[z]) for z in ZHI)
+HIDDEN_WEIGHTS = tuple(tuple(zhi5[z][g] for g in zhi5_list[z]) for z in ZHI)
+# Strongest / weakest 藏干, ties resolved like max()/min() over zhi5
+MAIN_STEM = tuple(GAN_CODE[max(zhi5[z], key=zhi5[z].get)] for z in ZHI)
+WEAKEST_STEM = tuple(GAN_CODE[min(zhi5[z], key=zhi5[z].get)] for z in ZHI)
+ZHI_ELEMENT = tuple(GAN_ELEMENT[stems[0]] for stems in HIDDEN_STEMS)
+
+IS_KU = tuple(z in "辰戌丑未" for z in ZHI)
+# 干支相合: the stem's 五合 partner is among the branch's 藏干, [stem * 12 + branch]
+GAN_ZHI_HE = tuple(GAN_HE[g] in HIDDEN_STEMS[z] for g in range(10) for z in range(12))
+# 三合 half-combination (拱) completing branch, or -1; [branch1 * 12 + branch2]
+GONG_HE = tuple(
+    ZHI_CODE[gong_he[z1 + z2]] if z1 + z2 in gong_he else -1 for z1 in ZHI for z2 in ZHI
+)
+# 夾 branch of two branches 2 or 10 apart, computed as bazi.py computes it, or -1;
+# [branch1 * 12 + branch2]
+JIA = tuple(
+    (z1 + z2) // 2 if abs(z1 - z2) == 2 else (z1 + z2) % 12 if abs(z1 - z2) == 10 else -1
+    for z1 in range(12) for z2 in range(12)
+)
+
+# ── Branch relationships ──
+# Relation kinds of datas.zhi_atts as bit flags, in its key order:
+# 冲 刑 被刑 合 会 害 破 六 暗
+ZHI_RELATION_KINDS = tuple(zhi_atts[ZHI[0]])
+ZHI_RELATION_BIT = {kind: 1 << i for i, kind in enumerate(ZHI_RELATION_KINDS)}
+# [branch1 * 12 + branch2] → flags of the kinds zhi_atts[branch1] lists branch2 under
+ZHI_RELATION = tuple(
+    sum(bit for kind, bit in ZHI_RELATION_BIT.items() if z2 in zhi_atts[z1][kind])
+    for z1 in ZHI for z2 in ZHI
+)
+
+# ── Jiazi ──
+NAYIN = tuple(nayins[(JIAZI[j][0], JIAZI[j][1])] for j in range(60))
+NAYIN_NAME = tuple(nayins_map.get(n, n) for n in NAYIN)
+# 空亡 pair of a day pillar, verbatim from datas.empties (辰 pairs with '己'
+# there, so only characters that are real branches get a code)
+EMPTY_PAIR = tuple(empties[(JIAZI[j][0], JIAZI[j][1])] for j in range(60))
+EMPTY_ZHIS = tuple(frozenset(ZHI_CODE[c] for c in pair if c in ZHI_CODE) for pair in EMPTY_PAIR)
+
+# ── Charts ──
+# The month stem follows from the year stem (五虎遁) and the hour stem from
+# the day stem (五鼠遁), [stem * 12 + branch]
+MONTH_STEM = tuple((g % 5 * 2 + 2 + (z - 2) % 12) % 10 for g in range(10) for z in range(12))
+HOUR_STEM = tuple((g % 5 * 2 + z) % 10 for g in range(10) for z in range(12))
+# Four-pillar charts those rules allow: year pillar × month branch × day pillar × hour branch
+CHARTS = 60 * 12 * 60 * 12
+
+
+def chart_number(gans, zhis):
+    """
+    0-based number of a chart among the CHARTS rule-following ones, or None.
+
+    lunar_python's 晚子時 (hour 23) takes its hour stem from the next day,
+    so those charts break 五鼠遁 and have no number.
+    """
+    if gans[1] != MONTH_STEM[gans[0] * 12 + zhis[1]] or gans[3] != HOUR_STEM[gans[2] * 12 + zhis[3]]:
+        return None
+    return ((jiazi(gans[0], zhis[0]) * 12 + zhis[1]) * 60 + jiazi(gans[2], zhis[2])) * 12 + zhis[3]
+
+
+def chart_pillars(number: int):
+    """(gans, zhis) of a chart number, inverse of `chart_number`."""
+    rest, hour_zhi = divmod(number, 12)
+    rest, day = divmod(rest, 60)
+    year, month_zhi = divmod(rest, 12)
+    gans = (year % 10, MONTH_STEM[year % 10 * 12 + month_zhi], day % 10, HOUR_STEM[day % 10 * 12 + hour_zhi])
+    return gans, (year % 12, month_zhi, day % 12, hour_zhi)
+
+
+def zhi_mask(zhis) -> int:
+    """12-bit mask of a collection of branch codes."""
+    mask = 0
+    for zhi in zhis:
+        mask |= 1 << zhi
+    return mask
+
+
+def ten_god(day_master: int, gan: int) -> int:
+    return STEM_TEN_GOD[day_master * 10 + gan]
+
+
+def life_stage(day_master: int, zhi: int) -> int:
+    return BRANCH_LIFE_STAGE[day_master * 12 + zhi]
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bounded LRU cache for natal bazi charts.
+
+Saved profiles are reopened and re-analysed far more often than new birth
+inputs arrive, and the natal part of a chart (see
+`BaziCalculator.calculate_natal`) never changes for a given input. The
+calculator keeps those results here, keyed by normalized birth input, and
+only re-runs the cheap as-of overlay per request.
+
+Entries are shared between requests, so they are stored frozen: `freeze`
+turns every dict and list into a FrozenDict / FrozenList that raises on
+mutation. Both still subclass dict / list, so they compare equal to,
+serialize and pickle like the plain containers.
+
+The cache is bounded by entry count and by an estimate of the memory the
+entries hold, evicting least recently used entries past either limit.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; copy it before modifying")
+
+
+class FrozenDict(dict):
+    """A dict that refuses modification."""
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class FrozenList(list):
+    """A list that refuses modification."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+
+def freeze(value: Any) -> Any:
+    """
+    Recursively convert dicts and lists into FrozenDict / FrozenList.
+
+    Values that are already frozen are returned as they are, so frozen parts
+    shared between charts (see dayun.py) are not copied per entry.
+    """
+    return freeze_with_size(value)[0]
+
+
+def freeze_with_size(value: Any) -> Tuple[Any, int]:
+    """
+    `freeze`, also returning the bytes of the containers it created.
+
+    That is what a cache entry adds to memory: already-frozen parts are
+    shared with other charts, and strings and numbers in a chart are nearly
+    all shared constants, so neither is counted.
+    """
+    created = [0]
+
+    def walk(obj):
+        kind = type(obj)
+        if kind is dict:
+            frozen = FrozenDict({k: walk(v) if type(v) in _THAWED else v for k, v in obj.items()})
+        elif kind is list or kind is tuple:
+            frozen = FrozenList([walk(v) if type(v) in _THAWED else v for v in obj])
+        else:
+            return obj
+        created[0] += sys.getsizeof(frozen)
+        return frozen
+
+    frozen = walk(value) if type(value) in _THAWED else value
+    return frozen, created[0]
+
+
+# Container types `freeze` converts; FrozenDict / FrozenList pass through
+_THAWED = frozenset((dict, list, tuple))
+
+
+class NatalCache:
+    """Thread-safe LRU of frozen natal charts, with hit / miss / eviction counters."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        """
+        Args:
+            max_entries: Most charts kept; 0 disables the cache
+            max_bytes: Most memory (as estimated by `freeze_with_size`) the
+                cached charts may hold; 0 means no memory limit
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached chart for `key`, or None. Counts a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """
+        Freeze and store `value`, evicting old entries past the limits.
+
+        Returns:
+            The frozen value, which is what later `get` calls return
+        """
+        frozen, size = freeze_with_size(value)
+        if self.max_entries <= 0:
+            return frozen
+        if self.max_bytes and size > self.max_bytes:
+            return frozen
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (frozen, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+        return frozen
+
+    def clear(self) -> int:
+        """Drop every entry; counters are kept. Returns the number dropped."""
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return cleared
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, limits and counters since startup."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
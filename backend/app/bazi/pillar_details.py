@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precomputed display details for every (day master, pillar) pair.
+
+What a chart shows for a pillar (ten deities, hidden stems with their ten
+deities, wuxing, nayin, 干支合, 庫) depends only on the day master and the
+pillar's jiazi: 10 × 60 = 600 combinations. The calculator used to rebuild
+those dicts for each natal pillar, 大運, 流年 and current-period cell; this
+table builds them once at import and every caller does one lookup:
+
+    PILLAR_DETAILS[day_master * 60 + jiazi]
+
+Records and everything in them are frozen (see natal_cache.py), so charts
+can share them. Callers copy a record's dict before adding chart-specific
+keys such as shensha.
+"""
+
+from typing import NamedTuple
+
+from bazi.bazi_functions import gan_zhi_he, get_life_stage, get_nayin, get_ten_deity, is_ku
+from bazi.ganzhi_codes import ELEMENTS, GAN, GAN_ELEMENT, HIDDEN_STEMS, HIDDEN_WEIGHTS, JIAZI, ZHI, ZHI_ELEMENT
+from bazi.natal_cache import FrozenDict, FrozenList
+
+
+class PillarDetail(NamedTuple):
+    """Display details of one pillar for one day master."""
+
+    # Natal pillar dict as _get_pillar_details returns it, without shensha
+    pillar: FrozenDict
+    # Current 大運 / 流年 cell as _current_pillar_cell returns it, without shensha
+    cell: FrozenDict
+    # 藏干 of the branch with their strength, as 大運 entries list them
+    weighted_hidden_stems: FrozenList
+
+
+def _build(day_master: int, pillar: int) -> PillarDetail:
+    gan, zhi = pillar % 10, pillar % 12
+    ten_deities = [get_ten_deity(day_master, hidden_gan) for hidden_gan in HIDDEN_STEMS[zhi]]
+    nayin = get_nayin(pillar)
+    return PillarDetail(
+        pillar=FrozenDict({
+            "ganzhi": JIAZI[pillar],
+            "gan": GAN[gan],
+            "zhi": ZHI[zhi],
+            "gan_wuxing": ELEMENTS[GAN_ELEMENT[gan]],
+            "zhi_wuxing": ELEMENTS[ZHI_ELEMENT[zhi]],
+            "ten_deity": get_ten_deity(day_master, gan),
+            "zhi_ten_deity": get_life_stage(day_master, zhi),
+            "hidden_stems": FrozenList(
+                FrozenDict(gan=GAN[hidden_gan], wuxing=ELEMENTS[GAN_ELEMENT[hidden_gan]], ten_deity=ten_deity)
+                for hidden_gan, ten_deity in zip(HIDDEN_STEMS[zhi], ten_deities)
+            ),
+            "nayin": nayin,
+            "harmony": gan_zhi_he(gan, zhi),
+            "is_treasury": is_ku(zhi),
+        }),
+        cell=FrozenDict({
+            "ganzhi": JIAZI[pillar],
+            "gan": GAN[gan],
+            "zhi": ZHI[zhi],
+            "gan_ten_deity": get_ten_deity(day_master, gan),
+            # 本氣's ten deity
+            "zhi_ten_deity": ten_deities[0],
+            "hidden_stems": FrozenList(
+                FrozenDict(gan=GAN[hidden_gan], ten_deity=ten_deity)
+                for hidden_gan, ten_deity in zip(HIDDEN_STEMS[zhi], ten_deities)
+            ),
+            "nayin": nayin,
+        }),
+        weighted_hidden_stems=FrozenList(
+            FrozenDict(gan=GAN[hidden_gan], ten_deity=ten_deity, strength=weight)
+            for hidden_gan, ten_deity, weight in zip(HIDDEN_STEMS[zhi], ten_deities, HIDDEN_WEIGHTS[zhi])
+        ),
+    )
+
+
+PILLAR_DETAILS = tuple(_build(day_master, pillar) for day_master in range(10) for pillar in range(60))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped four-pillar lookup table.
+
+`lunar_python` builds a Solar → Lunar → EightChar object graph just to hand
+back eight characters, and that conversion dominates `calculate_bazi`. The
+table built by `scripts/build_pillar_table.py` stores, for every 時辰 slot of
+every day in its range, everything the calculator reads from that graph:
+
+    year/month/day/hour pillar as 0-59 jiazi indices
+    lunar year / month (negative = leap, as lunar_python reports it) / day
+    起運 calendar-year offset for forward and backward 大運
+
+Slots follow iztro's 0-12 time index: hour 0 is 早子時, hours 1-2 丑時, ...,
+hours 21-22 亥時, hour 23 晚子時. lunar_python gives hour 0 and hour 23 of the
+same date different 時柱, so they cannot share a slot.
+
+A 節 that falls inside a two-hour slot changes the month (and, for 立春, the
+year) pillar partway through it. Those slots are stored with `AMBIGUOUS` as
+their year index and the lookup returns None, so the caller falls back to
+lunar_python for the roughly 1,200 slots in two centuries where the hour
+matters.
+
+Every record is lunar_python's answer, so the header also carries a CRC32
+of the lunar_python release the table was built with (`SOURCE`).
+`open_pillar_table` ignores a table built under another release or format
+version, and the calculator goes back to lunar_python until it is rebuilt.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from datetime import date
+from importlib.metadata import version as package_version
+from typing import NamedTuple, Optional
+
+MAGIC = b"BZPT"
+VERSION = 2
+
+# The table mirrors lunar_python; one built under another release may not
+SOURCE = zlib.crc32(f"lunar_python {package_version('lunar_python')}".encode())
+
+# magic, version, source, first year, last year, slots per day, number of days
+HEADER = struct.Struct("<4sHIHHHI")
+# The leading HEADER fields that say whether a table is current
+STAMP = struct.Struct("<4sHI")
+# year/month/day/hour jiazi, lunar year, lunar month, lunar day,
+# forward / backward 起運 year offset
+RECORD = struct.Struct("<4BhbB2B")
+
+SLOTS_PER_DAY = 13
+AMBIGUOUS = 0xFF
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "pillar_table.bin")
+
+
+class PillarSlot(NamedTuple):
+    """One table record. Pillars are jiazi indices (0 = 甲子)."""
+
+    year: int
+    month: int
+    day: int
+    time: int
+    lunar_year: int
+    lunar_month: int
+    lunar_day: int
+    forward_start_offset: int
+    backward_start_offset: int
+
+
+def hour_to_slot(hour: int) -> int:
+    """Map a 0-23 clock hour to its 0-12 時辰 slot (0 早子, 12 晚子)."""
+    return (hour + 1) // 2
+
+
+def slot_hours(slot: int) -> tuple:
+    """Clock hours covered by a slot, inverse of `hour_to_slot`."""
+    if slot == 0:
+        return (0,)
+    if slot == SLOTS_PER_DAY - 1:
+        return (23,)
+    return (2 * slot - 1, 2 * slot)
+
+
+class PillarTable:
+    """Read-only view over a built pillar table file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, first, last, slots, days = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or slots != SLOTS_PER_DAY:
+            self.close()
+            raise ValueError(f"{path} is not a v{VERSION} pillar table")
+        if len(self._mm) != HEADER.size + days * slots * RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        self.first_year = first
+        self.last_year = last
+        self.num_days = days
+        self._first_ordinal = date(first, 1, 1).toordinal()
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.num_days * SLOTS_PER_DAY
+
+    def slot_index(self, year: int, month: int, day: int, hour: int) -> Optional[int]:
+        """Flat slot number for a solar date and hour, or None when off-table."""
+        offset = date(year, month, day).toordinal() - self._first_ordinal
+        if not 0 <= offset < self.num_days:
+            return None
+        return offset * SLOTS_PER_DAY + hour_to_slot(hour)
+
+    def slot_date(self, index: int) -> date:
+        """Solar date of a flat slot number."""
+        return date.fromordinal(self._first_ordinal + index // SLOTS_PER_DAY)
+
+    def record(self, index: int) -> PillarSlot:
+        """Raw record at a flat slot number, ambiguous slots included."""
+        return PillarSlot(*RECORD.unpack_from(self._mm, HEADER.size + index * RECORD.size))
+
+    def lookup(self, year: int, month: int, day: int, hour: int) -> Optional[PillarSlot]:
+        """
+        Pillars and lunar date for a solar date and 0-23 hour.
+
+        Returns None when the date is outside the table or a 節 splits the
+        slot; the caller should then ask lunar_python.
+        """
+        index = self.slot_index(year, month, day, hour)
+        if index is None:
+            return None
+        slot = self.record(index)
+        if slot.year == AMBIGUOUS:
+            return None
+        return slot
+
+
+def open_pillar_table(path: Optional[str] = None) -> Optional[PillarTable]:
+    """
+    Open the table at `path` (default: DEFAULT_PATH).
+
+    Returns None if the file has not been built, so a fresh checkout keeps
+    working on lunar_python alone, and None if it was built under another
+    lunar_python release or format version (see SOURCE).
+    """
+    path = path or DEFAULT_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        stamp = f.read(STAMP.size)
+    if len(stamp) == STAMP.size:
+        magic, version, source = STAMP.unpack(stamp)
+        if magic == MAGIC and (version, source) != (VERSION, SOURCE):
+            return None
+    return PillarTable(path)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Birth-time rectification: rank candidate 時辰 by how well dated life events
+fit each one's chart.
+
+For every candidate slot a `SlotProfile` keeps only what the scoring reads:
+the natal branches, the 大運 pillar of each year (起運 moves with the hour)
+and, from the 紫微斗數 chart, the branch of each palace and of each 大限.
+Profiles come from calculate_natal / ZiweiCalculator.calculate once and are
+cached by the caller (services/rectify_service.py).
+
+`score_candidates` then scores all candidates against all events at once as
+NumPy lookups:
+
+    八字   the event year's 流年 and 大運 branches against the natal
+           branches (沖 / 刑 / 六合 / 三合 / 害), weighted by the palace the
+           event kind reads (BAZI_RULES), plus 交運 in the event year
+    紫微   whether the 大限 / 流年 命宮 is the event's palace
+           (EVENT_PALACE), or has it in its 三方四正
+
+The 八字 year changes at 立春; the 紫微 year and 虛歲 at 正月初一, as
+ZiweiCalculator's YEAR_DIVIDE.
+"""
+
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+from lunar_python import Lunar, Solar
+
+from bazi.date_search import LI_CHUN, jie_days
+from bazi.ganzhi_codes import JIAZI_CODE, ZHI_CODE, ZHI_RELATION, ZHI_RELATION_BIT
+
+EVENT_KINDS = ("marriage", "career", "illness", "relocation", "childbirth", "bereavement")
+
+YEAR, MONTH, DAY, HOUR = range(4)
+POSITION_NAMES = ("年支", "月支", "日支", "時支")
+
+# Relation groups scored, as (label, zhi_atts kinds)
+RELATIONS = (
+    ("沖", ("冲",)),
+    ("刑", ("刑", "被刑")),
+    ("六合", ("六",)),
+    ("三合", ("合",)),
+    ("害", ("害",)),
+)
+RELATION_MASKS = np.array([sum(ZHI_RELATION_BIT[k] for k in kinds) for _, kinds in RELATIONS])
+
+# Weight of a 流年 relation with a natal branch, per event kind: the
+# palace each kind reads (日支 spouse, 月支 career, 時支 children, ...)
+BAZI_RULES = {
+    "marriage": {"六合": {DAY: 2.0}, "三合": {DAY: 1.5}, "沖": {DAY: 1.5}},
+    "career": {"沖": {MONTH: 2.0}, "刑": {MONTH: 1.0}, "六合": {MONTH: 1.0}, "三合": {MONTH: 1.0}},
+    "illness": {"沖": {DAY: 1.5, HOUR: 1.0}, "刑": {DAY: 1.5, HOUR: 1.0}, "害": {DAY: 1.0, HOUR: 0.5}},
+    "relocation": {"沖": {YEAR: 1.0, MONTH: 1.0, DAY: 1.5}},
+    "childbirth": {"六合": {HOUR: 2.0}, "三合": {HOUR: 1.5}, "沖": {HOUR: 1.0}},
+    "bereavement": {"沖": {YEAR: 1.5, MONTH: 1.5}, "刑": {YEAR: 1.0, MONTH: 1.0}},
+}
+# A 大運 relation counts this much of the 流年 one
+DAYUN_WEIGHT = 0.5
+# Bonus when the event year starts a 大運 (交運)
+JIAO_YUN = {"marriage": 0.5, "career": 1.0, "illness": 0.5, "relocation": 1.0, "childbirth": 0.0, "bereavement": 0.5}
+
+# zh-TW palace names, as ZiweiCalculator renders them
+PALACES = ("命宮", "兄弟", "夫妻", "子女", "財帛", "疾厄", "遷移", "僕役", "官祿", "田宅", "福德", "父母")
+EVENT_PALACE = {
+    "marriage": "夫妻", "career": "官祿", "illness": "疾厄",
+    "relocation": "遷移", "childbirth": "子女", "bereavement": "父母",
+}
+# 童限: palaces of 虛歲 1, 2, ... before the first 大限, as iztro
+CHILDHOOD_PALACES = ("命宮", "財帛", "疾厄", "夫妻", "福德", "官祿")
+# (scope 命宮 is the event palace, event palace in the scope's 三方四正)
+ZIWEI_WEIGHTS = {"大限": (2.0, 1.0), "流年": (1.5, 0.75)}
+
+# Years of 大運 and ages of 大限 a profile covers
+SPAN = 128
+
+# Over 1900-2100 立春 falls on 3-5 February and 正月初一 on 21 January -
+# 20 February (as lunar_python has them), so outside this (month, day)
+# window both years of a date follow from its month alone
+YEAR_CHANGE_WINDOW = ((1, 21), (2, 20))
+WINDOW_YEARS = (1900, 2100)
+
+# [event kind, position, relation group] weights
+_RULES = np.zeros((len(EVENT_KINDS), 4, len(RELATIONS)))
+for _k, _kind in enumerate(EVENT_KINDS):
+    for _r, (_label, _) in enumerate(RELATIONS):
+        for _position, _weight in BAZI_RULES[_kind].get(_label, {}).items():
+            _RULES[_k, _position, _r] = _weight
+_JIAO_YUN = np.array([JIAO_YUN[kind] for kind in EVENT_KINDS])
+_EVENT_PALACE = np.array([PALACES.index(EVENT_PALACE[kind]) for kind in EVENT_KINDS])
+_ZHI_RELATION = np.array(ZHI_RELATION).reshape(12, 12)
+# Offsets of the palaces in a palace's 三方四正, itself excluded
+_SAN_FANG = np.isin(np.arange(12), (4, 6, 8))
+
+
+class SlotProfile(NamedTuple):
+    """What rectification reads from one candidate's 八字 and 紫微 charts."""
+
+    zhis: Tuple[int, ...]
+    # 大運 jiazi of pillar years first_year.., -1 where none
+    first_year: int
+    dayun: np.ndarray
+    # True for years a 大運 starts in, birth year excluded
+    dayun_start: np.ndarray
+    # Lunar year of birth, for 虛歲
+    lunar_year: int
+    # Branch code of each palace, in PALACES order
+    palace_branch: np.ndarray
+    # Branch of the 大限 (or 童限) palace by 虛歲, -1 where none
+    decadal_branch: np.ndarray
+
+
+def slot_profile(natal: Dict[str, Any], ziwei: Dict[str, Any], lunar_year: int) -> SlotProfile:
+    """
+    Profile of one candidate.
+
+    Args:
+        natal: BaziCalculator.calculate_natal result
+        ziwei: ZiweiCalculator.calculate result in zh-TW
+        lunar_year: Lunar year of birth
+    """
+    zhis = tuple(ZHI_CODE[natal[key]["zhi"]] for key in ("year_pillar", "month_pillar", "day_pillar", "hour_pillar"))
+
+    periods = [du for du in natal["dayun"] if du.get("liunian")]
+    first_year = periods[0]["liunian"][0]["year"]
+    dayun = np.full(SPAN, -1, dtype=np.int16)
+    dayun_start = np.zeros(SPAN, dtype=bool)
+    for du in periods:
+        years = [ln["year"] - first_year for ln in du["liunian"] if ln["year"] - first_year < SPAN]
+        if years:
+            dayun[years] = JIAZI_CODE[du["ganzhi"]]
+            dayun_start[years[0]] = years[0] > 0
+
+    palace_branch = np.zeros(len(PALACES), dtype=np.int8)
+    decadal_branch = np.full(SPAN, -1, dtype=np.int8)
+    for palace in ziwei["palaces"]:
+        branch = ZHI_CODE[palace["earthly_branch"]]
+        palace_branch[PALACES.index(palace["name"])] = branch
+        if palace.get("decadal"):
+            low, high = palace["decadal"]["range"]
+            decadal_branch[max(low, 0):min(high + 1, SPAN)] = branch
+    for age, name in enumerate(CHILDHOOD_PALACES, 1):
+        if decadal_branch[age] < 0:
+            decadal_branch[age] = palace_branch[PALACES.index(name)]
+    return SlotProfile(zhis, first_year, dayun, dayun_start, lunar_year, palace_branch, decadal_branch)
+
+
+@lru_cache(maxsize=None)
+def _year_starts(year: int) -> Tuple[int, int]:
+    """Date ordinals of 立春 and 正月初一 in solar `year`."""
+    li_chun = jie_days(year)[LI_CHUN]
+    # jie_days has just built the year, so lunar_python's one-year cache has it
+    new_year = Lunar.fromYmd(year, 1, 1).getSolar()
+    return li_chun, date(new_year.getYear(), new_year.getMonth(), new_year.getDay()).toordinal()
+
+
+def event_years(dates: Sequence[date], pillar_table=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (八字 year from 立春, lunar year from 正月初一) of each date, taken at
+    noon.
+
+    Dates outside YEAR_CHANGE_WINDOW need no calendar; inside it the year's
+    立春 and 正月初一 come from date_search.jie_days, once per year. Only on
+    立春 itself does the hour matter: the pillar table's noon slot where it
+    has the date, else lunar_python.
+    """
+    pillar_years, lunar_years = [], []
+    for d in dates:
+        if WINDOW_YEARS[0] <= d.year <= WINDOW_YEARS[1] and not (
+            YEAR_CHANGE_WINDOW[0] <= (d.month, d.day) <= YEAR_CHANGE_WINDOW[1]
+        ):
+            year = d.year if d.month > 1 else d.year - 1
+            pillar_years.append(year)
+            lunar_years.append(year)
+            continue
+
+        li_chun, new_year = _year_starts(d.year)
+        ordinal = d.toordinal()
+        lunar_years.append(d.year if ordinal >= new_year else d.year - 1)
+        if ordinal != li_chun:
+            pillar_years.append(d.year if ordinal > li_chun else d.year - 1)
+            continue
+        slot = pillar_table.lookup(d.year, d.month, d.day, 12) if pillar_table is not None else None
+        if slot is not None:
+            year_pillar = slot.year
+        else:
+            year_pillar = JIAZI_CODE[Solar.fromYmdHms(d.year, d.month, d.day, 12, 0, 0).getLunar().getYearInGanZhiExact()]
+        pillar_years.append(d.year if year_pillar == (d.year - 4) % 60 else d.year - 1)
+    return np.array(pillar_years), np.array(lunar_years)
+
+
+class Scores(NamedTuple):
+    """Scores of C candidates against E events."""
+
+    # (C, E) unweighted per-event scores
+    bazi: np.ndarray
+    ziwei: np.ndarray
+    # [candidate][event] → hit labels
+    hits: List[List[List[str]]]
+
+
+def score_candidates(
+    profiles: Sequence[SlotProfile], dates: Sequence[date], kinds: Sequence[str], pillar_table=None
+) -> Scores:
+    """
+    Score every candidate against every event.
+
+    Args:
+        profiles: One SlotProfile per candidate
+        dates: Event dates
+        kinds: Event kinds, from EVENT_KINDS
+        pillar_table: Optional PillarTable for the events' years
+
+    Returns:
+        Scores
+    """
+    kind = np.array([EVENT_KINDS.index(k) for k in kinds])
+    pillar_years, lunar_years = event_years(dates, pillar_table)
+    rules = _RULES[kind]                                                    # (E, 4, R)
+
+    natal = np.array([p.zhis for p in profiles])                            # (C, 4)
+    first_year = np.array([p.first_year for p in profiles])
+    offset = pillar_years[None, :] - first_year[:, None]                     # (C, E)
+    covered = (offset >= 0) & (offset < SPAN)
+    offset = np.where(covered, offset, 0)
+    rows = np.arange(len(profiles))[:, None]
+    dayun = np.where(covered, np.array([p.dayun for p in profiles])[rows, offset], -1)
+    jiao = covered & np.array([p.dayun_start for p in profiles])[rows, offset]
+
+    # (C, E, 4, R): the 流年 / 大運 branch forms the relation with the natal branch
+    liunian_zhi = (pillar_years - 4) % 12
+    liunian_rel = (_ZHI_RELATION[liunian_zhi[None, :, None], natal[:, None, :]][..., None] & RELATION_MASKS) != 0
+    dayun_rel = (_ZHI_RELATION[(dayun % 12)[..., None], natal[:, None, :]][..., None] & RELATION_MASKS) != 0
+    dayun_rel &= (dayun >= 0)[..., None, None]
+    liunian_rel &= rules > 0
+    dayun_rel &= rules > 0
+    bazi = ((liunian_rel + DAYUN_WEIGHT * dayun_rel) * rules).sum(axis=(2, 3)) + jiao * _JIAO_YUN[kind]
+
+    # 紫微: branch offset from each scope's 命宮 to the event palace
+    target = np.array([p.palace_branch for p in profiles])[:, _EVENT_PALACE[kind]]          # (C, E)
+    age = lunar_years[None, :] - np.array([p.lunar_year for p in profiles])[:, None] + 1
+    in_span = (age >= 0) & (age < SPAN)
+    decadal = np.where(in_span, np.array([p.decadal_branch for p in profiles])[rows, np.where(in_span, age, 0)], -1)
+    yearly = np.broadcast_to((lunar_years - 4) % 12, target.shape)
+    scope_hits = {}
+    for name, scope in (("大限", decadal), ("流年", yearly)):
+        diff = (target - scope) % 12
+        scope_hits[name] = (scope >= 0) & (diff == 0), (scope >= 0) & _SAN_FANG[diff]
+    ziwei = sum(
+        on * ZIWEI_WEIGHTS[name][0] + near * ZIWEI_WEIGHTS[name][1] for name, (on, near) in scope_hits.items()
+    )
+
+    hits = [[[] for _ in kinds] for _ in profiles]
+    for label, rel in (("流年", liunian_rel), ("大運", dayun_rel)):
+        for c, e, position, r in zip(*np.nonzero(rel)):
+            hits[c][e].append(f"{label}{RELATIONS[r][0]}{POSITION_NAMES[position]}")
+    for c, e in zip(*np.nonzero(jiao & (_JIAO_YUN[kind] > 0))):
+        hits[c][e].append("交運")
+    for name, (on, near) in scope_hits.items():
+        for c, e in zip(*np.nonzero(on)):
+            hits[c][e].append(f"{name}命宮:{EVENT_PALACE[kinds[e]]}")
+        for c, e in zip(*np.nonzero(near)):
+            hits[c][e].append(f"{name}三方四正:{EVENT_PALACE[kinds[e]]}")
+    return Scores(bazi, ziwei, hits)
+
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped reverse index: four pillars → the 時辰 slots that have them.
+
+Forward, a birth hour gives one chart. Backward, a chart given as eight
+characters recurs every sixty years or so, and finding its dates by running
+lunar_python over all 880k two-hour slots of 1900-2100 takes minutes.
+`scripts/build_reverse_index.py` does that once and stores the slots
+grouped by chart:
+
+    header     magic, version, source, first / last year, key count, entry count
+    offsets    uint32 × (KEYS + 1): entries of key k are offsets[k]:offsets[k+1]
+    entries    uint32 slot codes, in date order within a key
+
+Keys are `chart_key`: the chart number (ganzhi_codes.chart_number) for the
+518,400 charts that follow 五鼠遁, then one key per year / month / day
+pillar for the 晚子時 charts, whose hour stem comes from the next day.
+
+Slots are the pillar table's (pillar_table.py): 13 per day, 0 早子時 through
+12 晚子時. An entry is `(day * SLOTS_PER_DAY + slot) << 2 | part`, where part
+is WHOLE, or FIRST_HOUR / SECOND_HOUR when a 節 falls inside the slot and
+its two clock hours have different charts.
+
+Pillars are arithmetic (see date_search.py) except on 節 days, which go
+through lunar_python hour by hour, so the index agrees with the calculator
+to the hour. `source` is the pillar table's SOURCE, the lunar_python release
+the index was built with; `open_reverse_index` ignores an index from another
+release and lookups `scan` until it is rebuilt.
+"""
+
+import mmap
+import os
+import struct
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from lunar_python import Solar
+
+from bazi.date_search import jie_days, scan_pillars
+from bazi.ganzhi_codes import CHARTS, GAN_CODE, HOUR_STEM, ZHI_CODE, chart_number
+from bazi.pillar_table import SLOTS_PER_DAY, SOURCE, slot_hours
+
+MAGIC = b"BZRI"
+VERSION = 2
+
+# magic, version, source, first year, last year, key count, entry count
+HEADER = struct.Struct("<4sHIHHII")
+# The leading HEADER fields that say whether an index is current
+STAMP = struct.Struct("<4sHI")
+# Offsets start on this boundary
+ALIGN = 8
+
+# Regular charts, then one 晚子時 chart per year / month / day pillar
+KEYS = CHARTS + CHARTS // 12
+
+# Entry part: the whole slot, or one clock hour of a slot a 節 splits
+WHOLE, FIRST_HOUR, SECOND_HOUR = 0, 1, 2
+
+FIRST_YEAR, LAST_YEAR = 1900, 2100
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "reverse_index.bin")
+
+
+class ReverseSlot(NamedTuple):
+    """A solar date and the clock hours of one of its slots that have the chart."""
+
+    date: date
+    hours: Tuple[int, ...]
+
+
+def chart_key(gans, zhis) -> Optional[int]:
+    """Index key of a chart, or None when no hour of any day has it."""
+    number = chart_number(gans, zhis)
+    if number is not None:
+        return number
+    # 晚子時: 子 hour with the stem of the next day's 子 hour
+    if zhis[3] == 0 and gans[3] == HOUR_STEM[(gans[2] + 1) % 10 * 12]:
+        number = chart_number((*gans[:3], HOUR_STEM[gans[2] * 12]), zhis)
+        if number is not None:
+            return CHARTS + number // 12
+    return None
+
+
+def encode(day: int, slot: int, part: int = WHOLE) -> int:
+    return (day * SLOTS_PER_DAY + slot) << 2 | part
+
+
+def decode(entry: int, first_day: date) -> ReverseSlot:
+    """ReverseSlot of an entry, `first_day` being day 0 of the index."""
+    flat, part = divmod(entry, 4)
+    day, slot = divmod(flat, SLOTS_PER_DAY)
+    hours = slot_hours(slot)
+    if part != WHOLE:
+        hours = (hours[part - 1],)
+    return ReverseSlot(first_day + timedelta(days=day), hours)
+
+
+def _hour_key(d: date, hour: int) -> Optional[int]:
+    """chart_key of a clock hour, from lunar_python."""
+    ba = Solar.fromYmdHms(d.year, d.month, d.day, hour, 0, 0).getLunar().getEightChar()
+    gans = tuple(GAN_CODE[g] for g in (ba.getYearGan(), ba.getMonthGan(), ba.getDayGan(), ba.getTimeGan()))
+    zhis = tuple(ZHI_CODE[z] for z in (ba.getYearZhi(), ba.getMonthZhi(), ba.getDayZhi(), ba.getTimeZhi()))
+    return chart_key(gans, zhis)
+
+
+def _jie_day_entries(d: date, day: int) -> List[Tuple[int, int]]:
+    """(key, entry) for every slot of a 節 day, hour by hour through lunar_python."""
+    out = []
+    for slot in range(SLOTS_PER_DAY):
+        keys = [_hour_key(d, hour) for hour in slot_hours(slot)]
+        if len(set(keys)) == 1:
+            out.append((keys[0], encode(day, slot)))
+        else:
+            out.extend((key, encode(day, slot, part)) for part, key in enumerate(keys, 1))
+    return out
+
+
+def _day_keys(year_pillar: np.ndarray, month_pillar: np.ndarray, day_pillar: np.ndarray) -> np.ndarray:
+    """(days, 13) chart keys of every slot, from day-level pillars."""
+    base = (year_pillar * 12 + month_pillar % 12) * 60 + day_pillar
+    return np.concatenate((base[:, None] * 12 + np.arange(12), CHARTS + base[:, None]), axis=1)
+
+
+def compute_entries(
+    first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR, key: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every slot of first_year..last_year as parallel (keys, entries) arrays,
+    entries numbered from 1 January of first_year.
+
+    With `key`, only the slots having that chart: day pillars narrow the
+    days to one in sixty, so this is the index-free lookup.
+    """
+    start = date(first_year, 1, 1)
+    ordinals, year_pillar, month_pillar, day_pillar = scan_pillars(start, date(last_year, 12, 31), "day")
+    jie = np.isin(ordinals, [d for y in range(first_year, last_year + 1) for d in jie_days(y)])
+    days = np.arange(len(ordinals))
+
+    if key is not None:
+        # Keep the days with the key's day pillar; for 節 days also those
+        # whose previous day has its year / month, as the hours before the
+        # 節 do
+        day_of_key = (key - CHARTS) % 60 if key >= CHARTS else key // 12 % 60
+        year_month = (key - CHARTS) // 60 if key >= CHARTS else key // 720
+        day_year_month = year_pillar * 12 + month_pillar % 12
+        keep = (day_pillar == day_of_key) & (
+            (day_year_month == year_month) | (jie & (np.roll(day_year_month, 1) == year_month))
+        )
+        days, jie = days[keep], jie[keep]
+
+    regular = days[~jie]
+    keys = _day_keys(year_pillar[regular], month_pillar[regular], day_pillar[regular])
+    entries = (regular[:, None] * SLOTS_PER_DAY + np.arange(SLOTS_PER_DAY)) << 2
+    keys, entries = keys.ravel(), entries.ravel()
+
+    split = [pair for day in days[jie].tolist() for pair in _jie_day_entries(start + timedelta(days=day), day)]
+    keys = np.concatenate((keys, np.array([k for k, _ in split], dtype=np.int64)))
+    entries = np.concatenate((entries, np.array([e for _, e in split], dtype=np.int64)))
+
+    if key is not None:
+        keep = keys == key
+        keys, entries = keys[keep], entries[keep]
+    order = np.lexsort((entries, keys))
+    return keys[order], entries[order]
+
+
+class ReverseIndex:
+    """Read-only view over a built reverse index file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, first, last, keys, entries = HEADER.unpack_from(self._mm, 0)
+        offsets_at = HEADER.size + -HEADER.size % ALIGN
+        entries_at = offsets_at + (keys + 1) * 4
+        if magic != MAGIC or version != VERSION or keys != KEYS:
+            self.close()
+            raise ValueError(f"{path} is not a v{VERSION} reverse index")
+        if len(self._mm) != entries_at + entries * 4:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        self.first_year = first
+        self.last_year = last
+        self.num_entries = entries
+        self._first_day = date(first, 1, 1)
+        self._offsets = np.frombuffer(self._mm, dtype="<u4", count=keys + 1, offset=offsets_at)
+        self._entries = np.frombuffer(self._mm, dtype="<u4", count=entries, offset=entries_at)
+
+    def close(self) -> None:
+        # The arrays export the map's buffer; drop them before closing it
+        self._offsets = self._entries = None
+        self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.num_entries
+
+    def entries(self, key: int) -> List[int]:
+        """Raw entries of a key, in date order."""
+        return self._entries[self._offsets[key]:self._offsets[key + 1]].tolist()
+
+    def lookup(self, gans, zhis) -> List[ReverseSlot]:
+        """Slots with the chart, in date order; [] when the chart never occurs."""
+        key = chart_key(gans, zhis)
+        if key is None:
+            return []
+        return [decode(entry, self._first_day) for entry in self.entries(key)]
+
+
+def scan(gans, zhis, first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR) -> List[ReverseSlot]:
+    """ReverseIndex.lookup without an index: same result, in milliseconds rather than microseconds."""
+    key = chart_key(gans, zhis)
+    if key is None:
+        return []
+    _, entries = compute_entries(first_year, last_year, key)
+    first_day = date(first_year, 1, 1)
+    return [decode(entry, first_day) for entry in entries.tolist()]
+
+
+def write_reverse_index(path: str, first_year: int, last_year: int, keys: np.ndarray, entries: np.ndarray) -> int:
+    """
+    Write (keys, entries) as returned by `compute_entries` to `path`.
+    Returns the number of entries written.
+    """
+    offsets = np.zeros(KEYS + 1, dtype="<u4")
+    np.cumsum(np.bincount(keys, minlength=KEYS), out=offsets[1:])
+    offsets_at = HEADER.size + -HEADER.size % ALIGN
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, SOURCE, first_year, last_year, KEYS, len(entries)))
+        f.write(b"\0" * (offsets_at - HEADER.size))
+        f.write(offsets.tobytes())
+        f.write(entries.astype("<u4").tobytes())
+    os.replace(tmp, path)
+    return len(entries)
+
+
+def open_reverse_index(path: Optional[str] = None) -> Optional[ReverseIndex]:
+    """
+    Open the index at `path` (default: DEFAULT_PATH).
+
+    Returns None if the file has not been built, or was built under another
+    lunar_python release or format version (see SOURCE); lookups then `scan`.
+    """
+    path = path or DEFAULT_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        stamp = f.read(STAMP.size)
+    if len(stamp) == STAMP.size:
+        magic, version, source = STAMP.unpack(stamp)
+        if magic == MAGIC and (version, source) != (VERSION, SOURCE):
+            return None
+    return ReverseIndex(path)
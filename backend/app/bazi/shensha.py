@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compiled 神煞 rule engine.
+
+The apply_* functions in bazi_functions.py interpret the rule dicts in
+bazi_data.py on every call: every rule, every key pillar, every target
+pillar. This module compiles the same rules once at import into inverted
+indexes keyed by what the chart actually contains:
+
+    (key pillar, key type, key code) → {(value type, value code): hits}
+
+so evaluating a chart is one lookup per key slot followed by one lookup per
+chart character, and an extra 大運 / 流年 pillar costs two lookups per key
+slot. Codes are the ganzhi_codes stem/branch indices.
+
+Each hit carries the (rule index, key pillar position) it came from. The
+interpreter appends names in that order, so sorting the hits for a pillar
+reproduces its output exactly, duplicates included; tests/test_shensha.py
+checks the two against each other over every valid pillar combination.
+"""
+
+from typing import Dict, List, Tuple
+
+from bazi.bazi_data import shensha_other_rules, shensha_rules, xiao_er_guan_sha_rules
+from bazi.ganzhi_codes import GAN_CODE, ZHI_CODE
+
+PILLARS = ("year", "month", "day", "time")
+PILLAR_INDEX = {p: i for i, p in enumerate(PILLARS)}
+CODES = {"gan": GAN_CODE, "zhi": ZHI_CODE}
+
+# A hit: ((rule index, key pillar position), name)
+Hit = Tuple[Tuple[int, int], str]
+
+
+def _compile_keyed(rules) -> Dict[Tuple[int, str, int], Dict[Tuple[str, int], List[Hit]]]:
+    """shensha_rules → {(key pillar, key type, key code): {(value type, value code): hits}}"""
+    index: Dict[Tuple[int, str, int], Dict[Tuple[str, int], List[Hit]]] = {}
+    for rule_no, rule in enumerate(rules):
+        key_type, value_type = rule["key_type"], rule["value_type"]
+        for position, key_pillar in enumerate(rule["key_pillar"]):
+            for key_value, targets in rule["mapping"].items():
+                slot = index.setdefault((PILLAR_INDEX[key_pillar], key_type, CODES[key_type][key_value]), {})
+                for target in dict.fromkeys(targets):
+                    slot.setdefault((value_type, CODES[value_type][target]), []).append(
+                        ((rule_no, position), rule["name"])
+                    )
+    return index
+
+
+def _compile_combinations(rules):
+    """shensha_other_rules → ((format slots, {value codes: hits}), ...), grouped by format"""
+    formats: Dict[tuple, Dict[tuple, List[Hit]]] = {}
+    for rule_no, rule in enumerate(rules):
+        for position, format_pattern in enumerate(rule["format"]):
+            slots = tuple((type_spec, PILLAR_INDEX[pillar_spec]) for pillar_spec, type_spec in format_pattern)
+            table = formats.setdefault(slots, {})
+            for value in rule["value"]:
+                if not isinstance(value, tuple) or len(value) != len(slots):
+                    continue
+                key = tuple(CODES[type_spec][v] for (type_spec, _), v in zip(slots, value))
+                hits = table.setdefault(key, [])
+                hit = ((rule_no, position), rule["name"])
+                if hit not in hits:
+                    hits.append(hit)
+    return tuple(formats.items())
+
+
+def _compile_xiao_er(rules):
+    """
+    xiao_er_guan_sha_rules → {(key pillar, key type, key code): ((value type, value pillars, {value code: hits}), ...)}
+
+    A rule stops at the first of its value pillars that matches, so hits are
+    grouped by the value pillar list they are searched in.
+    """
+    index: Dict[Tuple[int, str, int], Dict[tuple, Dict[int, List[Hit]]]] = {}
+    for rule_no, rule in enumerate(rules):
+        key_type, value_type = rule["key_type"], rule["value_type"]
+        value_pillars = tuple(PILLAR_INDEX[p] for p in rule["value_pillar"])
+        for position, key_pillar in enumerate(rule["key_pillar"]):
+            for key_value, targets in rule["mapping"].items():
+                if not isinstance(targets, list):
+                    targets = [targets]
+                slot = index.setdefault((PILLAR_INDEX[key_pillar], key_type, CODES[key_type][key_value]), {})
+                group = slot.setdefault((value_type, value_pillars), {})
+                for target in dict.fromkeys(targets):
+                    group.setdefault(CODES[value_type][target], []).append(((rule_no, position), rule["name"]))
+    return {
+        slot: tuple((value_type, value_pillars, table) for (value_type, value_pillars), table in groups.items())
+        for slot, groups in index.items()
+    }
+
+
+RULES = _compile_keyed(shensha_rules)
+COMBINATIONS = _compile_combinations(shensha_other_rules)
+XIAO_ER = _compile_xiao_er(xiao_er_guan_sha_rules)
+# Key slots any keyed rule reads, so evaluation skips the rest
+RULE_KEYS = tuple(sorted({(p, t) for p, t, _ in RULES}))
+XIAO_ER_KEYS = tuple(sorted({(p, t) for p, t, _ in XIAO_ER}))
+# No rule is keyed on the hour pillar, so the year / month / day pillars'
+# 神煞 are the same for every hour of a birth date
+HOUR_FREE_SHENSHA = all(p != 3 for p, _ in RULE_KEYS) and all(p != 3 for slots, _ in COMBINATIONS for _, p in slots)
+
+
+def _names(hits: List[Hit]) -> List[str]:
+    return [name for _, name in sorted(hits)]
+
+
+def natal_shensha(gans, zhis, is_child: bool = False) -> Dict[str, List[str]]:
+    """
+    神煞 per natal pillar, in the order the interpreter reports them.
+
+    Args:
+        gans, zhis: Four stem / branch codes (year, month, day, time), or
+            three for a chart without its hour pillar
+        is_child: Also apply 小兒關煞; same as extending the adult result
+            with `child_shensha`
+
+    Returns:
+        {"year": [...], "month": [...], "day": [...], "time": [...]}, each
+        without duplicates; no "time" for three pillars
+    """
+    chart = {"gan": gans, "zhi": zhis}
+    count = len(gans)
+    keyed: List[List[Hit]] = [[] for _ in range(count)]
+    for pillar, key_type in RULE_KEYS:
+        if pillar >= count:
+            continue
+        slot = RULES.get((pillar, key_type, chart[key_type][pillar]))
+        if slot is None:
+            continue
+        for target in range(count):
+            for value_type in ("gan", "zhi"):
+                keyed[target].extend(slot.get((value_type, chart[value_type][target]), ()))
+
+    # Combination rules only ever mark the day pillar
+    combined: List[Hit] = []
+    for slots, table in COMBINATIONS:
+        if all(p < count for _, p in slots):
+            combined.extend(table.get(tuple(chart[t][p] for t, p in slots), ()))
+
+    result = {}
+    for target, pillar_name in enumerate(PILLARS[:count]):
+        names = _names(keyed[target])
+        if target == 2:
+            names += _names(combined)
+        result[pillar_name] = list(dict.fromkeys(names))
+    if is_child:
+        for pillar_name, names in child_shensha(gans, zhis).items():
+            result[pillar_name] = list(dict.fromkeys(result[pillar_name] + names))
+    return result
+
+
+def child_shensha(gans, zhis) -> Dict[str, List[str]]:
+    """小兒關煞 per natal pillar, without duplicates."""
+    chart = {"gan": gans, "zhi": zhis}
+    children: List[List[Hit]] = [[], [], [], []]
+    for pillar, key_type in XIAO_ER_KEYS:
+        for value_type, value_pillars, table in XIAO_ER.get((pillar, key_type, chart[key_type][pillar]), ()):
+            fired = set()
+            for target in value_pillars:
+                for order, name in table.get(chart[value_type][target], ()):
+                    if order not in fired:
+                        fired.add(order)
+                        children[target].append((order, name))
+    return {pillar_name: list(dict.fromkeys(_names(children[target]))) for target, pillar_name in enumerate(PILLARS)}
+
+
+def pillar_shensha(gans, zhis, gan: int, zhi: int) -> List[str]:
+    """
+    神煞 an extra pillar (大運, 流年) carries against the natal chart.
+
+    Like apply_shensha_rules_with_certain_pillar, a rule keyed on two natal
+    pillars that both match is reported twice.
+    """
+    chart = {"gan": gans, "zhi": zhis}
+    hits: List[Hit] = []
+    for pillar, key_type in RULE_KEYS:
+        slot = RULES.get((pillar, key_type, chart[key_type][pillar]))
+        if slot is not None:
+            hits.extend(slot.get(("gan", gan), ()))
+            hits.extend(slot.get(("zhi", zhi), ()))
+    return _names(hits)
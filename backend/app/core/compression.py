@@ -0,0 +1,238 @@
+"""Response compression middleware.
+
+A full chart is tens of kilobytes of repetitive CJK JSON, which gzip or
+brotli shrink several times over. `CompressionMiddleware` compresses a
+response when the client accepts one of `COMPRESSION_ALGORITHMS` (brotli
+preferred on a tie) and the body is at least `COMPRESSION_MIN_SIZE` bytes.
+A response streamed in several messages is compressed as it streams,
+whatever its size.
+
+Skipped, and sent exactly as the app produced them:
+    text/event-stream     /api/ai/analyze streams tokens; buffering them in a
+                          compressor would hold each one back
+    already encoded       a Content-Encoding set by the route
+    compressed formats    images, audio, video, zip / gzip archives
+    204 / 304             no body
+
+A strong ETag on a compressed response is weakened (W/"..."), as nginx does:
+the bytes differ from the identity response, and If-None-Match compares
+weakly, so 304s keep working (and carry the weak tag too). `stats()` reports bytes in / out and the CPU
+time spent compressing; /health/compression serves it.
+"""
+
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Content types sent as they are
+_EXCLUDED_TYPES = (
+    "text/event-stream",
+    "image/",
+    "audio/",
+    "video/",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+)
+
+# Preference when Accept-Encoding weighs the algorithms equally
+_PREFERENCE = ("br", "gzip")
+
+
+class _Stats:
+    """Compression counters since startup, per algorithm."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._skipped: Dict[str, int] = {}
+        self._algorithms: Dict[str, Dict[str, float]] = {}
+
+    def skip(self, reason: str) -> None:
+        with self._lock:
+            self._skipped[reason] = self._skipped.get(reason, 0) + 1
+
+    def record(self, algorithm: str, bytes_in: int, bytes_out: int, cpu: float, responses: int = 0) -> None:
+        with self._lock:
+            entry = self._algorithms.setdefault(
+                algorithm, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+            )
+            entry["responses"] += responses
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+            entry["cpu_seconds"] += cpu
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            algorithms = {}
+            for name, entry in self._algorithms.items():
+                algorithms[name] = {
+                    "responses": int(entry["responses"]),
+                    "bytes_in": int(entry["bytes_in"]),
+                    "bytes_out": int(entry["bytes_out"]),
+                    "bytes_saved": int(entry["bytes_in"] - entry["bytes_out"]),
+                    "ratio": round(entry["bytes_out"] / entry["bytes_in"], 3) if entry["bytes_in"] else None,
+                    "cpu_ms": round(entry["cpu_seconds"] * 1000, 2),
+                    "cpu_ms_per_mb": round(entry["cpu_seconds"] * 1000 / (entry["bytes_in"] / 1e6), 2)
+                    if entry["bytes_in"] else None,
+                }
+            return {"algorithms": algorithms, "skipped": dict(self._skipped)}
+
+
+_stats = _Stats()
+
+
+def stats() -> Dict[str, Any]:
+    """Compression settings and counters: bytes in / out / saved and CPU ms per algorithm, skips by reason."""
+    return {
+        "algorithms_enabled": list(settings.COMPRESSION_ALGORITHMS),
+        "min_size": settings.COMPRESSION_MIN_SIZE,
+        "gzip_level": settings.COMPRESSION_GZIP_LEVEL,
+        "brotli_quality": settings.COMPRESSION_BROTLI_QUALITY,
+        **_stats.snapshot(),
+    }
+
+
+def choose_encoding(accept_encoding: Optional[str], enabled: List[str]) -> Optional[str]:
+    """The enabled algorithm with the highest q in Accept-Encoding, or None for identity."""
+    weights: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for algorithm in _PREFERENCE:
+        q = weights.get(algorithm, wildcard)
+        if algorithm in enabled and q > best_q:
+            best, best_q = algorithm, q
+    return best
+
+
+class _Compressor:
+    """Incremental gzip or brotli stream that times its own CPU use."""
+
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        if algorithm == "br":
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        self.bytes_in = self.bytes_out = 0
+        self.cpu = 0.0
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        start = time.thread_time()
+        if self.algorithm == "br":
+            out = self._brotli.process(data) + (self._brotli.finish() if final else b"")
+        else:
+            out = self._zlib.compress(data) + (self._zlib.flush() if final else b"")
+        self.cpu += time.thread_time() - start
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        return out
+
+
+class CompressionMiddleware:
+    """ASGI middleware applying the policy in the module docstring."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        algorithm = choose_encoding(Headers(scope=scope).get("accept-encoding"), settings.COMPRESSION_ALGORITHMS)
+        if algorithm is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(algorithm, send).run(self.app, scope, receive)
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+class _Responder:
+    """send() wrapper for one response: decides on the first body message, then streams."""
+
+    def __init__(self, algorithm: str, send: Send):
+        self.algorithm = algorithm
+        self.send = send
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def run(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.wrapped_send)
+
+    async def wrapped_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            reason = self._skip_reason(Headers(raw=message["headers"]), message["status"])
+            if reason is not None:
+                _stats.skip(reason)
+                self.passthrough = True
+                if message["status"] == 304:
+                    # Same validator as the compressed 200 the client holds
+                    _weaken_etag(MutableHeaders(raw=message["headers"]))
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body and len(body) < settings.COMPRESSION_MIN_SIZE:
+                _stats.skip("small")
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.algorithm)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.algorithm
+            headers.add_vary_header("Accept-Encoding")
+            _weaken_etag(headers)
+            out = self.compressor.compress(body, final=not more_body)
+            if more_body:
+                del headers["content-length"]
+            else:
+                headers["Content-Length"] = str(len(out))
+            await self.send(self.start)
+        else:
+            out = self.compressor.compress(body, final=not more_body)
+
+        if not more_body:
+            c = self.compressor
+            _stats.record(self.algorithm, c.bytes_in, c.bytes_out, c.cpu, responses=1)
+        await self.send({"type": "http.response.body", "body": out, "more_body": more_body})
+
+    @staticmethod
+    def _skip_reason(headers: Headers, status: int) -> Optional[str]:
+        if status in (204, 304) or status < 200:
+            return "no_body"
+        if "content-encoding" in headers:
+            return "encoded"
+        content_type = headers.get("content-type", "").lower()
+        if content_type.startswith(_EXCLUDED_TYPES):
+            return "event_stream" if content_type.startswith("text/event-stream") else "excluded_type"
+        return None
+
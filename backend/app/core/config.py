@@ -1,6 +1,6 @@
 """Application configuration loaded from environment via pydantic-settings."""
 
-from typing import Annotated, List
+from typing import Annotated, List, Literal
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
@@ -63,13 +63,78 @@ class Settings(BaseSettings):
     NV_AI_BASE_URL: str = "https://integrate.api.nvidia.com/v1"
     NV_AI_MODEL: str = "deepseek-ai/deepseek-v4-pro"
 
+    # ── Bazi calculation ──
+    # Pillar table built by scripts/build_pillar_table.py. Empty means the
+    # default location (app/bazi/data/pillar_table.bin); if no file is there,
+    # every chart falls back to lunar_python.
+    BAZI_PILLAR_TABLE_PATH: str = ""
+    # Analysis atlas built by scripts/build_analysis_atlas.py. Empty means the
+    # default location (app/bazi/data/analysis_atlas.bin); if no file is there,
+    # the analysis and natal shensha are computed per chart.
+    BAZI_ANALYSIS_ATLAS_PATH: str = ""
+    # Reverse index built by scripts/build_reverse_index.py. Empty means the
+    # default location (app/bazi/data/reverse_index.bin); if no file is there,
+    # /api/bazi/reverse scans the date range per request.
+    BAZI_REVERSE_INDEX_PATH: str = ""
+    # In-process LRU of natal charts (see app/bazi/natal_cache.py), bounded by
+    # entry count and estimated memory. A chart holds roughly 150 KB. 0 entries
+    # disables the cache; 0 MB means no memory limit.
+    BAZI_CACHE_MAX_ENTRIES: int = 512
+    BAZI_CACHE_MAX_MB: int = 96
+    # Same LRU for 紫微斗數 charts: the built iztro-py chart and its localised
+    # palaces per birth input, language and fix_leap. The iztro-py object's
+    # memory cannot be estimated, so it is bounded by entries only.
+    ZIWEI_CACHE_MAX_ENTRIES: int = 256
+
+    # ── Batch calculation ──
+    # /api/bazi/batch and /api/ziwei/batch fan items out to a process pool.
+    # 0 workers means one per CPU. Each task carries CHUNK_SIZE items so the
+    # pickling round-trip is paid per chunk rather than per chart.
+    BATCH_MAX_WORKERS: int = 0
+    BATCH_CHUNK_SIZE: int = 16
+    BATCH_MAX_ITEMS: int = 1000
+
+    # ── Compute executor ──
+    # /api/bazi and /api/ziwei run calculators on this shared pool, off the
+    # event loop. 'process' sidesteps the GIL at the cost of pickling each
+    # chart back. At most MAX_QUEUE calls may be queued or running; beyond
+    # that, or past TIMEOUT_SECONDS, requests get 503 + Retry-After.
+    COMPUTE_EXECUTOR: Literal["thread", "process"] = "thread"
+    COMPUTE_MAX_WORKERS: int = 0  # 0 = one per CPU
+    COMPUTE_MAX_QUEUE: int = 64
+    COMPUTE_TIMEOUT_SECONDS: float = 10.0
+    COMPUTE_RETRY_AFTER_SECONDS: int = 1
+
+    # ── Response compression ──
+    # Algorithms offered by Accept-Encoding (br, gzip); empty disables compression.
+    # Bodies under MIN_SIZE bytes are sent as they are, and text/event-stream never
+    # is compressed (see app/core/compression.py). Brotli quality 0-11, gzip level 1-9;
+    # the defaults trade a little ratio for low CPU per response.
+    COMPRESSION_ALGORITHMS: Annotated[List[str], NoDecode] = Field(
+        default_factory=lambda: ["br", "gzip"]
+    )
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = Field(6, ge=1, le=9)
+    COMPRESSION_BROTLI_QUALITY: int = Field(4, ge=0, le=11)
+
+    # ── HTTP caching ──
+    # max-age of GET /api/bazi and /api/ziwei responses (see app/api/conditional.py).
+    # A bazi chart without as_of is capped at the next midnight.
+    CHART_CACHE_MAX_AGE_SECONDS: int = 86400
+
+    # ── Admin ──
+    # Token for /api/admin/* (sent as X-Admin-Token). Empty disables those endpoints.
+    ADMIN_TOKEN: str = ""
+
     # ── AI quota / limits ──
     AI_DAILY_QUOTA: int = 3
     AI_MAX_TOKENS: int = 8192
     AI_TIMEOUT_SECONDS: int = 240
     AI_QUOTA_TIMEZONE: str = "Asia/Taipei"
 
-    @field_validator("CORS_ORIGINS", "CORS_ALLOW_METHODS", "CORS_ALLOW_HEADERS", mode="before")
+    @field_validator(
+        "CORS_ORIGINS", "CORS_ALLOW_METHODS", "CORS_ALLOW_HEADERS", "COMPRESSION_ALGORITHMS", mode="before"
+    )
     @classmethod
     def _split_csv(cls, v):
         if isinstance(v, str):
@@ -24,7 +24,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     """
     return JSONResponse(
         status_code=exc.status_code,
-        content=exc.detail if isinstance(exc.detail, dict) else {"error": str(exc.detail)}
+        content=exc.detail if isinstance(exc.detail, dict) else {"error": str(exc.detail)},
+        headers=exc.headers
     )
 
 
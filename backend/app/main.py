@@ -8,13 +8,25 @@ It creates the app instance and configures middleware and routes.
 """
 
 import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.core.exceptions import http_exception_handler, general_exception_handler
 from app.api.routes import api_router
+from app.services import batch_service, compute_service
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    yield
+    # Both pools are started lazily; stop their workers with the app
+    batch_service.shutdown_executor()
+    compute_service.shutdown_executor()
 
 
 def create_app() -> FastAPI:
@@ -27,7 +39,8 @@ def create_app() -> FastAPI:
     application = FastAPI(
         title=settings.APP_TITLE,
         description=settings.APP_DESCRIPTION,
-        version=settings.APP_VERSION
+        version=settings.APP_VERSION,
+        lifespan=lifespan
     )
 
     # Configure CORS middleware
@@ -39,6 +52,10 @@ def create_app() -> FastAPI:
         allow_headers=settings.CORS_ALLOW_HEADERS,
     )
 
+    # Compress large responses; added last so it is outermost and sees the
+    # final headers (see app/core/compression.py)
+    application.add_middleware(CompressionMiddleware)
+
     # Register exception handlers
     application.add_exception_handler(HTTPException, http_exception_handler)
     application.add_exception_handler(Exception, general_exception_handler)
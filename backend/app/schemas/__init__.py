@@ -1,29 +1,67 @@
 """Schemas module for Pydantic models."""
 
 from app.schemas.bazi import (
+    BaziBatchItem,
+    BaziBatchRequest,
+    BaziBatchResponse,
+    BaziHourUnknownResponse,
+    BaziHourVariant,
+    BaziQuery,
     BaziRequest,
     BaziResponse,
     DayunEntry,
     DayunPillar,
+    DayunRange,
+    DateSearchMatch,
+    DateSearchRequest,
+    DateSearchResponse,
     ErrorResponse,
     HiddenStem,
     LiunianEntry,
     LiunianPillar,
+    LiunianRequest,
+    LiunianResponse,
     Pillar,
+    ReverseLookupRequest,
+    ReverseLookupResponse,
+    ReverseLookupSlot,
+)
+from app.schemas.rectify import (
+    RectifyCandidate,
+    RectifyEvent,
+    RectifyEventScore,
+    RectifyRequest,
+    RectifyResponse,
 )
 from app.schemas.ziwei import (
+    ZiweiBatchItem,
+    ZiweiBatchRequest,
+    ZiweiBatchResponse,
     ZiweiDecadal,
     ZiweiHoroscope,
+    ZiweiHoroscopeRequest,
+    ZiweiHoroscopeResponse,
     ZiweiHoroscopeScope,
+    ZiweiHourUnknownResponse,
+    ZiweiHourVariant,
     ZiweiPalace,
     ZiweiRequest,
     ZiweiResponse,
     ZiweiStar,
+    ZiweiTimelineEntry,
+    ZiweiTimelineRequest,
+    ZiweiTimelineResponse,
 )
 
 __all__ = [
     "BaziRequest",
+    "BaziQuery",
     "BaziResponse",
+    "BaziBatchRequest",
+    "BaziBatchItem",
+    "BaziBatchResponse",
+    "BaziHourVariant",
+    "BaziHourUnknownResponse",
     "ErrorResponse",
     "Pillar",
     "HiddenStem",
@@ -31,11 +69,35 @@ __all__ = [
     "LiunianPillar",
     "DayunEntry",
     "LiunianEntry",
+    "DayunRange",
+    "LiunianRequest",
+    "LiunianResponse",
+    "DateSearchRequest",
+    "DateSearchMatch",
+    "DateSearchResponse",
+    "ReverseLookupRequest",
+    "ReverseLookupSlot",
+    "ReverseLookupResponse",
+    "RectifyRequest",
+    "RectifyEvent",
+    "RectifyEventScore",
+    "RectifyCandidate",
+    "RectifyResponse",
     "ZiweiRequest",
     "ZiweiResponse",
+    "ZiweiBatchRequest",
+    "ZiweiBatchItem",
+    "ZiweiBatchResponse",
+    "ZiweiHourVariant",
+    "ZiweiHourUnknownResponse",
     "ZiweiPalace",
     "ZiweiStar",
     "ZiweiDecadal",
     "ZiweiHoroscope",
+    "ZiweiHoroscopeRequest",
+    "ZiweiHoroscopeResponse",
     "ZiweiHoroscopeScope",
+    "ZiweiTimelineRequest",
+    "ZiweiTimelineEntry",
+    "ZiweiTimelineResponse",
 ]
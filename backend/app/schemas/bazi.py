@@ -7,23 +7,174 @@ This module defines all data models used for validating API inputs
 and structuring API outputs.
 """
 
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from datetime import date
+from typing import Optional, Dict, Any, List, Literal
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 # =============================================================================
 # Request Models
 # =============================================================================
 
+# `fields` shorthand for the four pillars
+_FIELD_GROUPS = {"pillars": ("year_pillar", "month_pillar", "day_pillar", "hour_pillar")}
+
+_FIELDS_DESCRIPTION = (
+    "Return only these BaziResponse fields (repeated, or comma-separated); 'pillars' stands for the "
+    "four pillars. Parts of the chart no requested field needs are not calculated. Not with hour_unknown."
+)
+
+
+def split_fields(fields: List[str]) -> List[str]:
+    """Names in a `fields` parameter given repeated, comma-separated or both, without blanks."""
+    return [name.strip() for item in fields for name in item.split(",") if name.strip()]
+
+
+def _chart_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """`fields` of a Bazi request: groups expanded, checked against BaziResponse, in its order."""
+    if fields is None:
+        return None
+    names = {field for name in split_fields(fields) for field in _FIELD_GROUPS.get(name, (name,))}
+    unknown = sorted(names.difference(BaziResponse.model_fields))
+    if unknown:
+        raise ValueError(
+            f"unknown fields {', '.join(unknown)}; choose from pillars, {', '.join(BaziResponse.model_fields)}"
+        )
+    if not names:
+        raise ValueError("fields must name at least one field")
+    return [name for name in BaziResponse.model_fields if name in names]
+
+
+def _check_hour(model):
+    if model.hour is None and not model.hour_unknown:
+        raise ValueError("hour is required unless hour_unknown is set")
+    if model.hour_unknown and model.fields is not None:
+        raise ValueError("fields is not supported with hour_unknown")
+    return model
+
+class DayunRange(BaseModel):
+    """Page of the 大運 list to return."""
+    offset: int = Field(0, ge=0, description="Index of the first 大運 period")
+    limit: Optional[int] = Field(None, ge=1, description="Number of periods; omit for all remaining")
+
+
 class BaziRequest(BaseModel):
     """Request model for Bazi calculation."""
     year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
     month: int = Field(..., ge=1, le=12, description="Month (1-12)")
     day: int = Field(..., ge=1, le=31, description="Day (1-31)")
+    hour: Optional[int] = Field(None, ge=0, le=23, description="Hour (0-23); required unless hour_unknown")
+    hour_unknown: bool = Field(
+        False,
+        description="Birth hour unknown: return one variant per 時辰 and a three-pillar analysis "
+                    "(BaziHourUnknownResponse) instead of a single chart. hour is ignored.",
+    )
+    is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
+    is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
+    gender: str = Field("male", description="Gender: 'male' or 'female'")
+    as_of: Optional[date] = Field(
+        None,
+        description="Date the current 大運 / 流年 and 小兒關煞 are evaluated at. Omit for today.",
+        examples=["2026-08-15"],
+    )
+    include_liunian: Literal["all", "current", "none"] = Field(
+        "all",
+        description="流年 listed inside each 大運 entry: all, only the as_of year, or none. "
+                    "dayun_pillar / liunian_pillar are returned either way.",
+    )
+    dayun_range: Optional[DayunRange] = Field(None, description="Return only this page of the 大運 list")
+    fields: Optional[List[str]] = Field(
+        None, description=_FIELDS_DESCRIPTION, examples=[["pillars", "dayun_pillar", "liunian_pillar"]]
+    )
+
+    @field_validator("fields")
+    @classmethod
+    def _known_fields(cls, fields):
+        return _chart_fields(fields)
+
+    @model_validator(mode="after")
+    def _hour_given(self):
+        return _check_hour(self)
+
+
+class BaziQuery(BaseModel):
+    """Query parameters of GET /api/bazi: BaziRequest with dayun_range as two flat parameters."""
+    year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
+    month: int = Field(..., ge=1, le=12, description="Month (1-12)")
+    day: int = Field(..., ge=1, le=31, description="Day (1-31)")
+    hour: Optional[int] = Field(None, ge=0, le=23, description="Hour (0-23); required unless hour_unknown")
+    hour_unknown: bool = Field(False, description="Birth hour unknown, as in BaziRequest")
+    is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
+    is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
+    gender: str = Field("male", description="Gender: 'male' or 'female'")
+    as_of: Optional[date] = Field(
+        None,
+        description="Date the current 大運 / 流年 are evaluated at. Omit for today; "
+                    "the response is then cacheable only until midnight.",
+    )
+    include_liunian: Literal["all", "current", "none"] = Field("all", description="As in BaziRequest")
+    dayun_offset: int = Field(0, ge=0, description="Index of the first 大運 period returned")
+    dayun_limit: Optional[int] = Field(None, ge=1, description="Number of 大運 periods; omit for all remaining")
+    fields: Optional[List[str]] = Field(None, description=_FIELDS_DESCRIPTION)
+
+    @field_validator("fields")
+    @classmethod
+    def _known_fields(cls, fields):
+        return _chart_fields(fields)
+
+    @model_validator(mode="after")
+    def _hour_given(self):
+        return _check_hour(self)
+
+
+class LiunianRequest(BaseModel):
+    """Query parameters for expanding 流年 over a year range."""
+    year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
+    month: int = Field(..., ge=1, le=12, description="Month (1-12)")
+    day: int = Field(..., ge=1, le=31, description="Day (1-31)")
     hour: int = Field(..., ge=0, le=23, description="Hour (0-23)")
     is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
     is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
     gender: str = Field("male", description="Gender: 'male' or 'female'")
+    start_year: int = Field(..., ge=1900, le=2300, description="First calendar year, inclusive")
+    end_year: int = Field(..., ge=1900, le=2300, description="Last calendar year, inclusive")
+
+
+class DateSearchRequest(BaseModel):
+    """Request model for 擇日: scanning a date range for pillars related to a natal chart."""
+    year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
+    month: int = Field(..., ge=1, le=12, description="Month (1-12)")
+    day: int = Field(..., ge=1, le=31, description="Day (1-31)")
+    hour: int = Field(..., ge=0, le=23, description="Hour (0-23)")
+    is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
+    is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
+    gender: str = Field("male", description="Gender: 'male' or 'female'")
+    start_date: date = Field(..., ge=date(1900, 1, 1), le=date(2300, 12, 31), description="First date, inclusive")
+    end_date: date = Field(..., ge=date(1900, 1, 1), le=date(2300, 12, 31), description="Last date, inclusive")
+    scope: Literal["day", "month", "year"] = Field(
+        "day", description="Scan day pillars, month pillars (from each 節) or year pillars (from each 立春)"
+    )
+    rules: List[Literal["sanhe", "liuhe", "liuchong", "tianke_dichong", "guiren"]] = Field(
+        ..., min_length=1,
+        description="Relations to look for: 三合, 六合, 六沖, 天剋地沖 (stems 相剋 and branches 六沖), 天乙貴人",
+    )
+    targets: List[Literal["year", "month", "day", "hour"]] = Field(
+        ["day"], min_length=1, description="Natal pillars the scanned pillar is compared with"
+    )
+    match: Literal["any", "all"] = Field("any", description="Whether any or all rules must hold")
+    limit: int = Field(500, ge=1, le=5000, description="Most matches returned")
+
+
+class ReverseLookupRequest(BaseModel):
+    """Query for finding birth dates from four pillars."""
+    pillars: str = Field(
+        ..., description="Year, month, day and hour pillars, e.g. '甲子丙寅戊辰庚申' or '甲子,丙寅,戊辰,庚申'"
+    )
+
+
+class BaziBatchRequest(BaseModel):
+    """Request model for calculating many Bazi charts in one call."""
+    items: List[BaziRequest] = Field(..., min_length=1, description="Birth inputs, one chart each")
 
 
 # =============================================================================
@@ -137,6 +288,86 @@ class BaziResponse(BaseModel):
     analysis: Dict[str, Any] = Field(..., description="Detailed Bazi analysis")
 
 
+class BaziHourVariant(BaseModel):
+    """The hour-dependent part of a chart for one 時辰 of an unknown-hour birth."""
+    zhi: str = Field(..., description="時辰 branch")
+    hours: List[int] = Field(..., description="Clock hours of the 時辰 (子: 0 only; 23:00 is the next day's 子 stem)")
+    year_pillar: Optional[Pillar] = Field(None, description="Only when it differs from the shared year pillar")
+    month_pillar: Optional[Pillar] = Field(None, description="Only when it differs from the shared month pillar")
+    day_pillar: Optional[Pillar] = Field(None, description="Only when it differs from the shared day pillar")
+    hour_pillar: Pillar = Field(..., description="Hour pillar information")
+    dayun: List[DayunEntry] = Field(..., description="Major fortune periods")
+    dayun_pillar: Optional[DayunPillar] = Field(None, description="Current dayun pillar with shensha")
+    liunian_pillar: Optional[LiunianPillar] = Field(None, description="Current liunian pillar with shensha")
+    nayin: Dict[str, str] = Field(..., description="Nayin elements for each pillar")
+    empty_positions: Dict[str, Any] = Field(..., description="Empty position analysis")
+    analysis: Dict[str, Any] = Field(..., description="Detailed Bazi analysis of the four pillars")
+
+
+class BaziHourUnknownResponse(BaseModel):
+    """Bazi for a birth date without a reliable hour: shared pillars plus one variant per 時辰."""
+    year_pillar: Pillar = Field(..., description="Year pillar (as at 早子時)")
+    month_pillar: Pillar = Field(..., description="Month pillar (as at 早子時)")
+    day_pillar: Pillar = Field(..., description="Day pillar (as at 早子時)")
+    lunar_date: str = Field(..., description="Corresponding lunar date")
+    solar_date: str = Field(..., description="Solar calendar date")
+    three_pillar_analysis: Dict[str, Any] = Field(..., description="三柱 analysis of the year, month and day pillars")
+    variants: List[BaziHourVariant] = Field(..., description="One chart variant per 時辰, 子 to 亥")
+
+
+class LiunianResponse(BaseModel):
+    """流年 entries for the requested year range."""
+    start_year: int = Field(..., description="First requested year")
+    end_year: int = Field(..., description="Last requested year")
+    liunian: List[LiunianEntry] = Field(..., description="Entries in year order; years before birth are omitted")
+
+
+class DateSearchMatch(BaseModel):
+    """One day, month or year meeting the search rules."""
+    start: date = Field(..., description="The day; for month / year scope, the day the month / year starts")
+    ganzhi: str = Field(..., description="The scanned pillar")
+    year_ganzhi: str = Field(..., description="Year pillar")
+    month_ganzhi: Optional[str] = Field(None, description="Month pillar (day and month scope)")
+    day_ganzhi: Optional[str] = Field(None, description="Day pillar (day scope)")
+    hits: List[str] = Field(..., description="Rules that hold, as 'rule:target'")
+
+
+class DateSearchResponse(BaseModel):
+    """擇日 results in date order."""
+    total: int = Field(..., description="Number of matching periods in the range")
+    truncated: bool = Field(..., description="Whether more matches exist than were returned")
+    matches: List[DateSearchMatch] = Field(..., description="The first `limit` matches")
+
+
+class ReverseLookupSlot(BaseModel):
+    """A solar date and the clock hours of one 時辰 on it that have the chart."""
+    solar_date: date = Field(..., description="Solar date")
+    hours: List[int] = Field(..., description="Clock hours (0-23); one hour when a 節 splits the 時辰")
+
+
+class ReverseLookupResponse(BaseModel):
+    """Birth slots whose four pillars match, in date order."""
+    pillars: List[str] = Field(..., description="Year, month, day and hour pillars")
+    first_year: int = Field(..., description="First year searched")
+    last_year: int = Field(..., description="Last year searched")
+    total: int = Field(..., description="Number of slots")
+    slots: List[ReverseLookupSlot] = Field(..., description="Matching slots")
+
+
+class BaziBatchItem(BaseModel):
+    """One batch result: either the chart or the error /api/bazi would have returned."""
+    index: int = Field(0, description="Position of the input in the request")
+    result: Optional[BaziResponse] = Field(None, description="Chart, when calculation succeeded")
+    error: Optional[Dict[str, str]] = Field(None, description="Error body, when it failed")
+
+
+class BaziBatchResponse(BaseModel):
+    """Batch Bazi results in input order."""
+    results: List[BaziBatchItem] = Field(..., description="One entry per input item")
+    succeeded: int = Field(..., description="Number of items with a result")
+    failed: int = Field(..., description="Number of items with an error")
+
+
 class ErrorResponse(BaseModel):
     """Standard error response model."""
     error: str
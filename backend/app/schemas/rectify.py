@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pydantic models for birth-time rectification (POST /api/rectify).
+"""
+
+import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+EventKind = Literal["marriage", "career", "illness", "relocation", "childbirth", "bereavement"]
+
+
+# =============================================================================
+# Request Models
+# =============================================================================
+
+class RectifyEvent(BaseModel):
+    """A dated life event."""
+
+    date: datetime.date = Field(..., description="Solar date of the event")
+    kind: EventKind = Field(..., description="Event kind; career covers job changes and promotions")
+    weight: float = Field(1.0, ge=0, le=10, description="How much the event counts towards a candidate's score")
+
+
+class RectifyRequest(BaseModel):
+    """Birth date without a reliable hour, plus the events to rank its 時辰 by."""
+
+    year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
+    month: int = Field(..., ge=1, le=12, description="Month (1-12)")
+    day: int = Field(..., ge=1, le=31, description="Day (1-31)")
+    is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
+    is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
+    gender: Literal["male", "female"] = Field("male", description="Gender")
+    hour_start: Optional[int] = Field(
+        None, ge=0, le=23, description="First clock hour of the candidate window, inclusive; omit for the whole day"
+    )
+    hour_end: Optional[int] = Field(
+        None, ge=0, le=23, description="Last clock hour of the window, inclusive; wraps past midnight if before hour_start"
+    )
+    events: List[RectifyEvent] = Field(..., min_length=1, description="Life events to score the candidates against")
+
+    @model_validator(mode="after")
+    def _window_complete(self):
+        if (self.hour_start is None) != (self.hour_end is None):
+            raise ValueError("hour_start and hour_end go together")
+        return self
+
+
+# =============================================================================
+# Response Models
+# =============================================================================
+
+class RectifyEventScore(BaseModel):
+    """How one event fits one candidate."""
+
+    index: int = Field(..., description="Position of the event in the request")
+    bazi: float = Field(..., description="八字 score: 流年 / 大運 relations with the natal branches, 交運")
+    ziwei: float = Field(..., description="紫微 score: the event's palace against the 大限 / 流年 命宮")
+    hits: List[str] = Field(..., description="What scored, e.g. 流年沖日支, 大限命宮:夫妻")
+
+
+class RectifyCandidate(BaseModel):
+    """One candidate 時辰 and its fit."""
+
+    zhi: str = Field(..., description="時辰 branch")
+    hours: List[int] = Field(..., description="Clock hours of the 時辰")
+    late_zi: bool = Field(..., description="晚子時 (23:00), whose hour stem comes from the next day")
+    hour_pillar: str = Field(..., description="Hour pillar")
+    score: float = Field(..., description="Weighted total, bazi_score + ziwei_score")
+    bazi_score: float = Field(..., description="Weighted 八字 total")
+    ziwei_score: float = Field(..., description="Weighted 紫微 total")
+    events: List[RectifyEventScore] = Field(..., description="Per-event scores, in request order")
+
+
+class RectifyResponse(BaseModel):
+    """Candidate 時辰, best fit first."""
+
+    candidates: List[RectifyCandidate] = Field(..., description="Candidates by descending score")
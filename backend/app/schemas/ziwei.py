@@ -8,9 +8,11 @@ camelCase, so the frontend consumes it the same way it consumes /api/bazi.
 """
 
 from datetime import date
-from typing import Any, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.schemas.bazi import split_fields
 
 Language = Literal["zh-TW", "zh-CN", "en-US", "ja-JP", "ko-KR", "vi-VN"]
 
@@ -19,6 +21,39 @@ Language = Literal["zh-TW", "zh-CN", "en-US", "ja-JP", "ko-KR", "vi-VN"]
 # Request Models
 # =============================================================================
 
+def _chart_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    `fields` of a 紫微斗數 request, checked against ZiweiResponse and in its
+    order. `palaces.<field>` selects ZiweiPalace fields and brings
+    `palaces.index` along; plain `palaces` means all of them.
+    """
+    if fields is None:
+        return None
+    names = set(split_fields(fields))
+    palace_fields = {name.partition(".")[2] for name in names if name.startswith("palaces.")}
+    unknown = sorted(
+        {name for name in names if not name.startswith("palaces.")}.difference(ZiweiResponse.model_fields)
+        | {f"palaces.{name}" for name in palace_fields.difference(ZiweiPalace.model_fields)}
+    )
+    if unknown:
+        raise ValueError(
+            f"unknown fields {', '.join(unknown)}; choose from {', '.join(ZiweiResponse.model_fields)}, "
+            f"or palaces.<field> for {', '.join(ZiweiPalace.model_fields)}"
+        )
+    if not names:
+        raise ValueError("fields must name at least one field")
+    selected = []
+    for name in ZiweiResponse.model_fields:
+        if name in names:
+            selected.append(name)
+        elif name == "palaces" and palace_fields:
+            selected.extend(
+                f"palaces.{field}" for field in ZiweiPalace.model_fields
+                if field in palace_fields or field == "index"
+            )
+    return selected
+
+
 class ZiweiRequest(BaseModel):
     """Request model for a 紫微斗數 chart. Mirrors BaziRequest so a single
     birth-data form can drive both endpoints."""
@@ -26,7 +61,11 @@ class ZiweiRequest(BaseModel):
     year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
     month: int = Field(..., ge=1, le=12, description="Month (1-12)")
     day: int = Field(..., ge=1, le=31, description="Day (1-31)")
-    hour: int = Field(..., ge=0, le=23, description="Hour (0-23)")
+    hour: Optional[int] = Field(None, ge=0, le=23, description="Hour (0-23); required unless hour_unknown")
+    hour_unknown: bool = Field(
+        False,
+        description="Birth hour unknown: return one chart per 時辰 (ZiweiHourUnknownResponse). hour is ignored.",
+    )
     is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
     is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
     gender: Literal["male", "female"] = Field("male", description="Gender")
@@ -39,6 +78,76 @@ class ZiweiRequest(BaseModel):
         description="Solar date to resolve 運限 (大限/流年/流月/流日/流時/小限) for. Omit to skip.",
         examples=["2026-08-15"],
     )
+    fields: Optional[List[str]] = Field(
+        None,
+        description="Return only these ZiweiResponse fields (repeated, or comma-separated); "
+                    "palaces.<field> selects palace fields, e.g. palaces.major_stars. Parts of the chart "
+                    "no requested field needs are not built. Not with hour_unknown.",
+        examples=[["chinese_date", "palaces.name", "palaces.major_stars"]],
+    )
+
+    @field_validator("fields")
+    @classmethod
+    def _known_fields(cls, fields):
+        return _chart_fields(fields)
+
+    @model_validator(mode="after")
+    def _hour_given(self):
+        if self.hour is None and not self.hour_unknown:
+            raise ValueError("hour is required unless hour_unknown is set")
+        if self.hour_unknown and self.fields is not None:
+            raise ValueError("fields is not supported with hour_unknown")
+        return self
+
+
+class ZiweiHoroscopeRequest(BaseModel):
+    """Request model for 運限 of one chart at one or more dates, without the chart."""
+
+    year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
+    month: int = Field(..., ge=1, le=12, description="Month (1-12)")
+    day: int = Field(..., ge=1, le=31, description="Day (1-31)")
+    hour: int = Field(..., ge=0, le=23, description="Hour (0-23)")
+    is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
+    is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
+    gender: Literal["male", "female"] = Field("male", description="Gender")
+    language: Language = Field("zh-TW", description="Output language")
+    fix_leap: bool = Field(True, description="Split a leap month at the 15th (iztro's fixLeap)")
+    dates: List[date] = Field(
+        ..., min_length=1, description="Solar dates to resolve 運限 for", examples=[["2026-08-15", "2026-09-15"]]
+    )
+
+
+class ZiweiTimelineRequest(BaseModel):
+    """Request model for every 運限 scope of one chart over a date range."""
+
+    year: int = Field(..., ge=1900, le=2100, description="Year (1900-2100)")
+    month: int = Field(..., ge=1, le=12, description="Month (1-12)")
+    day: int = Field(..., ge=1, le=31, description="Day (1-31)")
+    hour: int = Field(..., ge=0, le=23, description="Hour (0-23)")
+    is_lunar: bool = Field(False, description="Whether the date is lunar calendar")
+    is_leap_month: bool = Field(False, description="Whether it's a leap month (lunar only)")
+    gender: Literal["male", "female"] = Field("male", description="Gender")
+    language: Language = Field("zh-TW", description="Output language")
+    fix_leap: bool = Field(True, description="Split a leap month at the 15th (iztro's fixLeap)")
+    start: date = Field(..., ge=date(1900, 1, 1), le=date(2300, 12, 31), description="First solar date, inclusive")
+    end: date = Field(..., ge=date(1900, 1, 1), le=date(2300, 12, 31), description="Last solar date, inclusive")
+    granularity: Literal["decadal", "yearly", "monthly", "daily"] = Field(
+        "yearly",
+        description="Finest layer returned: decadal is 大限 only; yearly adds 小限 and 流年, "
+                    "monthly adds 流月, daily adds 流日",
+    )
+
+    @model_validator(mode="after")
+    def _ordered(self):
+        if self.end < self.start:
+            raise ValueError("end must not be before start")
+        return self
+
+
+class ZiweiBatchRequest(BaseModel):
+    """Request model for calculating many 紫微斗數 charts in one call."""
+
+    items: List[ZiweiRequest] = Field(..., min_length=1, description="Birth inputs, one chart each")
 
 
 # =============================================================================
@@ -148,3 +257,79 @@ class ZiweiResponse(BaseModel):
     horoscope: Optional[ZiweiHoroscope] = Field(
         None, description="運限, present only when horoscope_date was supplied"
     )
+
+
+class ZiweiHoroscopeResponse(BaseModel):
+    """運限 of one chart, per requested date."""
+
+    horoscopes: List[ZiweiHoroscope] = Field(..., description="One per date, in request order")
+
+
+class ZiweiTimelineEntry(BaseModel):
+    """The 運限 in force from one date until the next entry's, as positions in ZiweiTimelineResponse.scopes."""
+
+    solar_date: str = Field(..., description="Date these scopes hold from (the range start for the first entry)")
+    lunar_date: str = Field(..., description="Corresponding lunar date")
+    nominal_age: Optional[int] = Field(None, description="虛歲 on that date")
+    decadal: Optional[int] = Field(None, description="Position in scopes.decadal (大限)")
+    age_scope: Optional[int] = Field(None, description="Position in scopes.age_scope (小限)")
+    yearly: Optional[int] = Field(None, description="Position in scopes.yearly (流年)")
+    monthly: Optional[int] = Field(None, description="Position in scopes.monthly (流月)")
+    daily: Optional[int] = Field(None, description="Position in scopes.daily (流日)")
+
+
+class ZiweiTimelineResponse(BaseModel):
+    """運限 over a date range: each scope once, and entries referring to them."""
+
+    granularity: str = Field(..., description="Finest layer returned")
+    scopes: Dict[str, List[ZiweiHoroscopeScope]] = Field(
+        ..., description="Per layer (decadal, age_scope, yearly, ...), each distinct run of a scope once, in date order"
+    )
+    entries: List[ZiweiTimelineEntry] = Field(..., description="One per date on which some layer changes, in date order")
+
+
+class ZiweiHourVariant(BaseModel):
+    """The 時辰-dependent part of a chart for an unknown-hour birth."""
+
+    chinese_date: str = Field(..., description="四柱 (year/month/day/hour ganzhi)")
+    time: str = Field(..., description="時辰 name, e.g. 巳時")
+    time_range: str = Field(..., description="Clock range of the 時辰")
+    time_index: int = Field(..., description="iztro 時辰 index 0-11 (0 早子時)")
+    five_elements_class: str = Field(..., description="五行局, e.g. 火六局")
+    soul: str = Field(..., description="命主")
+    body: str = Field(..., description="身主")
+    soul_palace_branch: str = Field(..., description="Earthly branch of 命宮")
+    body_palace_branch: str = Field(..., description="Earthly branch of 身宮")
+    palaces: List[ZiweiPalace] = Field(..., description="Twelve palaces, by palace index")
+    horoscope: Optional[ZiweiHoroscope] = Field(
+        None, description="運限, present only when horoscope_date was supplied"
+    )
+
+
+class ZiweiHourUnknownResponse(BaseModel):
+    """紫微斗數 charts for every 時辰 of a birth date whose hour is unknown."""
+
+    solar_date: str = Field(..., description="Solar calendar date")
+    lunar_date: str = Field(..., description="Lunar date in Chinese numerals")
+    year_divide: str = Field(..., description="Year-boundary convention, as in ZiweiResponse")
+    gender: str = Field(..., description="Gender as rendered in the chart language")
+    zodiac: str = Field(..., description="生肖")
+    sign: str = Field(..., description="星座")
+    language: str = Field(..., description="Language the charts were rendered in")
+    variants: List[ZiweiHourVariant] = Field(..., description="One chart per 時辰, 子 (早子時) to 亥")
+
+
+class ZiweiBatchItem(BaseModel):
+    """One batch result: either the chart or the error /api/ziwei would have returned."""
+
+    index: int = Field(0, description="Position of the input in the request")
+    result: Optional[ZiweiResponse] = Field(None, description="Chart, when calculation succeeded")
+    error: Optional[Dict[str, str]] = Field(None, description="Error body, when it failed")
+
+
+class ZiweiBatchResponse(BaseModel):
+    """Batch 紫微斗數 results in input order."""
+
+    results: List[ZiweiBatchItem] = Field(..., description="One entry per input item")
+    succeeded: int = Field(..., description="Number of items with a result")
+    failed: int = Field(..., description="Number of items with an error")
@@ -0,0 +1,154 @@
+"""Batch chart calculation on a bounded process pool.
+
+Charts are pure CPU work, so a batch is split into chunks of
+`BATCH_CHUNK_SIZE` items and fanned out to a `ProcessPoolExecutor`. Each worker
+process builds its own BaziCalculator / ZiweiCalculator once (via the usual
+deps singletons) and reuses it for every chunk it receives. Results are
+validated into response models inside the worker, so the API process only
+reassembles them in input order.
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.schemas.bazi import BaziBatchItem, BaziRequest, BaziResponse
+from app.schemas.ziwei import ZiweiBatchItem, ZiweiRequest, ZiweiResponse
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker() -> None:
+    # Importing deps sets up the sys.path the vendored bazi package needs;
+    # building the calculators here keeps that cost out of the first chunk.
+    from app.api.deps import get_calculator, get_ziwei_calculator
+
+    get_calculator()
+    get_ziwei_calculator()
+
+
+def worker_count() -> int:
+    return settings.BATCH_MAX_WORKERS or os.cpu_count() or 1
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared batch pool, starting it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=worker_count(), initializer=_init_worker)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _invalid_date(year: int, month: int, day: int) -> Optional[Dict[str, str]]:
+    try:
+        datetime(year, month, day)
+        return None
+    except ValueError:
+        return {"error": "Invalid date", "message": f"Date {year}-{month}-{day} is not valid"}
+
+
+def bazi_chunk(items: List[BaziRequest]) -> List[BaziBatchItem]:
+    """Calculate one chunk of /api/bazi inputs. Runs in a worker process."""
+    from app.api.deps import get_calculator
+
+    calculator = get_calculator()
+    results = []
+    for item in items:
+        error = _invalid_date(item.year, item.month, item.day)
+        if item.hour_unknown:
+            error = {"error": "Invalid input", "message": "hour_unknown is not supported in batch requests"}
+        if item.fields is not None:
+            error = {"error": "Invalid input", "message": "fields is not supported in batch requests"}
+        if error:
+            results.append(BaziBatchItem(error=error))
+            continue
+        try:
+            result = calculator.calculate_bazi(
+                year=item.year,
+                month=item.month,
+                day=item.day,
+                hour=item.hour,
+                is_lunar=item.is_lunar,
+                is_leap_month=item.is_leap_month,
+                gender=item.gender,
+                as_of=item.as_of,
+                include_liunian=item.include_liunian,
+                dayun_range=(item.dayun_range.offset, item.dayun_range.limit) if item.dayun_range else None,
+            )
+            results.append(BaziBatchItem(result=BaziResponse(**result)))
+        except ValueError as e:
+            results.append(BaziBatchItem(error={"error": "Invalid input", "message": str(e)}))
+        except Exception as e:
+            results.append(BaziBatchItem(error={"error": "Calculation failed", "message": str(e)}))
+    return results
+
+
+def ziwei_chunk(items: List[ZiweiRequest]) -> List[ZiweiBatchItem]:
+    """Calculate one chunk of /api/ziwei inputs. Runs in a worker process."""
+    from app.api.deps import get_ziwei_calculator
+
+    calculator = get_ziwei_calculator()
+    results = []
+    for item in items:
+        # Same guard as /api/ziwei: only solar dates can be checked up front
+        error = None if item.is_lunar else _invalid_date(item.year, item.month, item.day)
+        if item.hour_unknown:
+            error = {"error": "Invalid input", "message": "hour_unknown is not supported in batch requests"}
+        if item.fields is not None:
+            error = {"error": "Invalid input", "message": "fields is not supported in batch requests"}
+        if error:
+            results.append(ZiweiBatchItem(error=error))
+            continue
+        try:
+            result = calculator.calculate(
+                year=item.year,
+                month=item.month,
+                day=item.day,
+                hour=item.hour,
+                is_lunar=item.is_lunar,
+                is_leap_month=item.is_leap_month,
+                gender=item.gender,
+                language=item.language,
+                fix_leap=item.fix_leap,
+                horoscope_date=item.horoscope_date.isoformat() if item.horoscope_date else None,
+            )
+            results.append(ZiweiBatchItem(result=ZiweiResponse(**result)))
+        except ValueError as e:
+            results.append(ZiweiBatchItem(error={"error": "Invalid input", "message": str(e)}))
+        except Exception as e:
+            results.append(ZiweiBatchItem(error={"error": "Calculation failed", "message": str(e)}))
+    return results
+
+
+async def run_batch(
+    chunk_fn: Callable[[List[Any]], List[Any]],
+    items: List[Any],
+    executor: Optional[Executor] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Any]:
+    """
+    Run `chunk_fn` over `items` in chunks on the pool, without blocking the event loop.
+
+    Returns one result per item, in input order, each tagged with its index.
+    """
+    executor = executor or get_executor()
+    size = max(1, chunk_size or settings.BATCH_CHUNK_SIZE)
+    loop = asyncio.get_running_loop()
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    done = await asyncio.gather(*(loop.run_in_executor(executor, chunk_fn, chunk) for chunk in chunks))
+
+    results = []
+    for index, item in enumerate(r for chunk in done for r in chunk):
+        item.index = index
+        results.append(item)
+    return results
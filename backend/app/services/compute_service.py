@@ -0,0 +1,262 @@
+"""Shared executor for CPU-bound chart calculation.
+
+The chart endpoints are `async def`, so calling a calculator inline blocks
+the event loop, and with it every other request on the worker, including
+in-flight AI SSE streams. Instead they `await run(...)`, which hands the call
+to one shared thread or process pool (`COMPUTE_EXECUTOR`).
+
+The pool's own queue is unbounded, so admission is capped here: at most
+`COMPUTE_MAX_QUEUE` calls may be queued or running. Past that, or when a
+call misses its `COMPUTE_TIMEOUT_SECONDS` deadline, the request gets a 503
+with Retry-After rather than piling up. `stats()` reports queue depth and
+queue wait so the pool can be sized; /health/compute serves it.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+# Queue waits kept for the percentiles in stats()
+_WAIT_SAMPLES = 1000
+
+
+def _init_worker() -> None:
+    # Process workers: importing deps sets up the vendored bazi sys.path, and
+    # building the calculators up front keeps that out of the first request.
+    from app.api.deps import get_calculator, get_ziwei_calculator
+
+    get_calculator()
+    get_ziwei_calculator()
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple, kwargs: dict) -> tuple:
+    # Runs in the worker; the start timestamp gives the caller its queue wait.
+    return time.time(), fn(*args, **kwargs)
+
+
+def bazi_chart(**kwargs) -> Dict[str, Any]:
+    """BaziCalculator.calculate_bazi on the worker's calculator."""
+    from app.api.deps import get_calculator
+
+    return get_calculator().calculate_bazi(**kwargs)
+
+
+def bazi_chart_hour_unknown(**kwargs) -> Dict[str, Any]:
+    """BaziCalculator.calculate_bazi_hour_unknown on the worker's calculator."""
+    from app.api.deps import get_calculator
+
+    return get_calculator().calculate_bazi_hour_unknown(**kwargs)
+
+
+def bazi_liunian(**kwargs) -> List[Dict[str, Any]]:
+    """BaziCalculator.calculate_liunian on the worker's calculator."""
+    from app.api.deps import get_calculator
+
+    return get_calculator().calculate_liunian(**kwargs)
+
+
+def bazi_date_search(**kwargs) -> tuple:
+    """BaziCalculator.search_dates on the worker's calculator."""
+    from app.api.deps import get_calculator
+
+    return get_calculator().search_dates(**kwargs)
+
+
+def bazi_reverse_lookup(**kwargs) -> Dict[str, Any]:
+    """BaziCalculator.reverse_lookup on the worker's calculator."""
+    from app.api.deps import get_calculator
+
+    return get_calculator().reverse_lookup(**kwargs)
+
+
+def rectify(**kwargs) -> Dict[str, Any]:
+    """rectify_service.rectify in the worker, with its per-process profile cache."""
+    from app.services import rectify_service
+
+    return rectify_service.rectify(**kwargs)
+
+
+def ziwei_chart(**kwargs) -> Dict[str, Any]:
+    """ZiweiCalculator.calculate on the worker's calculator."""
+    from app.api.deps import get_ziwei_calculator
+
+    return get_ziwei_calculator().calculate(**kwargs)
+
+
+def ziwei_horoscopes(**kwargs) -> List[Dict[str, Any]]:
+    """ZiweiCalculator.horoscopes on the worker's calculator and its chart cache."""
+    from app.api.deps import get_ziwei_calculator
+
+    return get_ziwei_calculator().horoscopes(**kwargs)
+
+
+def ziwei_timeline(**kwargs) -> Dict[str, Any]:
+    """ZiweiCalculator.timeline on the worker's calculator and its chart cache."""
+    from app.api.deps import get_ziwei_calculator
+
+    return get_ziwei_calculator().timeline(**kwargs)
+
+
+def ziwei_chart_hour_unknown(**kwargs) -> Dict[str, Any]:
+    """ZiweiCalculator.calculate_hour_unknown on the worker's calculator."""
+    from app.api.deps import get_ziwei_calculator
+
+    return get_ziwei_calculator().calculate_hour_unknown(**kwargs)
+
+
+class ComputeExecutor:
+    """Bounded front for a thread or process pool, with queue metrics."""
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int, timeout: float, retry_after: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"COMPUTE_EXECUTOR must be 'thread' or 'process', got {kind!r}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        if kind == "process":
+            self._pool: Executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+
+        # Done-callbacks fire on pool threads, so counters share a lock
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waits: deque = deque(maxlen=_WAIT_SAMPLES)
+
+    def _unavailable(self, message: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error": "Service busy", "message": message},
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on the pool and return its result.
+
+        With a process pool `fn` and its arguments must be picklable; use the
+        module-level helpers (bazi_chart, bazi_liunian, ziwei_chart, ...) rather
+        than a calculator method.
+
+        Raises:
+            HTTPException: 503 with Retry-After when the queue is full or the
+                call misses its deadline. Exceptions from `fn` propagate.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_queue:
+                self._rejected += 1
+                raise self._unavailable(f"{self._in_flight} calculations already queued, try again shortly")
+            self._in_flight += 1
+            self._submitted += 1
+
+        enqueued = time.time()
+        try:
+            future = self._pool.submit(_timed_call, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            # Cancelling the wrapper cancels the pool future if it has not started
+            started, result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise self._unavailable(f"Calculation did not finish within {self.timeout:g}s")
+
+        wait = max(0.0, started - enqueued)
+        with self._lock:
+            self._wait_count += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._waits.append(wait)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait-time counters since startup."""
+        with self._lock:
+            waits = sorted(self._waits)
+            in_flight = self._in_flight
+
+            def percentile(p: float) -> float:
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2) if waits else 0.0
+
+            return {
+                "executor": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout,
+                "in_flight": in_flight,
+                # Calls not yet picked up by a worker, assuming a busy pool runs max_workers at once
+                "queue_depth": max(0, in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "wait_ms": {
+                    "avg": round(self._wait_total / self._wait_count * 1000, 2) if self._wait_count else 0.0,
+                    "p50": percentile(0.50),
+                    "p95": percentile(0.95),
+                    "max": round(self._wait_max * 1000, 2),
+                },
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[ComputeExecutor] = None
+
+
+def get_executor() -> ComputeExecutor:
+    """Return the shared compute executor, starting it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ComputeExecutor(
+            kind=settings.COMPUTE_EXECUTOR,
+            max_workers=settings.COMPUTE_MAX_WORKERS or os.cpu_count() or 1,
+            max_queue=settings.COMPUTE_MAX_QUEUE,
+            timeout=settings.COMPUTE_TIMEOUT_SECONDS,
+            retry_after=settings.COMPUTE_RETRY_AFTER_SECONDS,
+        )
+    return _executor
+
+
+async def run(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run `fn` on the shared executor; see ComputeExecutor.run."""
+    return await get_executor().run(fn, *args, **kwargs)
+
+
+def stats() -> Dict[str, Any]:
+    return get_executor().stats()
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
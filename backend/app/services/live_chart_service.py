@@ -0,0 +1,173 @@
+"""Incremental chart recompute for live form editing (/ws/chart).
+
+A connection keeps a `LiveState`: the last validated input, its natal chart,
+the chart last sent and the year / month / day pillars built for the birth
+date. Each message changes some input fields, and `live_update` recomputes
+only what those fields reach:
+
+    date fields         everything, with a fresh set of shared pillars
+    hour                the natal chart, reusing the year / month / day
+                        pillars and their 神煞 (calculate_natal's shared_pillars)
+    gender              the 大運 list only (calculate_natal_for_gender)
+    as_of, include_liunian, dayun_range
+                        the date-dependent part only (apply_as_of)
+
+and answers with a JSON Patch (RFC 6902) from the chart last sent.
+"""
+
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+DATE_FIELDS = frozenset(("year", "month", "day", "is_lunar", "is_leap_month"))
+AS_OF_FIELDS = frozenset(("as_of", "include_liunian", "dayun_range"))
+
+
+class LiveState(NamedTuple):
+    """Per-connection state between messages."""
+
+    request: Dict[str, Any]
+    natal: Dict[str, Any]
+    chart: Dict[str, Any]
+    shared_pillars: Dict[tuple, Dict[str, Any]]
+
+
+def _pointer(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def _size(value: Any) -> int:
+    """Serialized length of `value`, counting strings without their escapes."""
+    if isinstance(value, str):
+        return len(value) + 2
+    if value is None or isinstance(value, bool):
+        return 4 if value in (None, True) else 5
+    if isinstance(value, (int, float)):
+        return len(repr(value))
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+
+# Serialized size of an operation without its path and value
+_OP_SIZE = {op: _size({"op": op, "path": ""}) + (len(',"value":') if op != "remove" else 0)
+            for op in ("add", "remove", "replace")}
+
+
+def _diff(old: Any, new: Any, path: str) -> Tuple[List[Dict[str, Any]], int, int]:
+    """(operations, their serialized size, serialized size of `new`)."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "remove", "path": _pointer(path, key)} for key in old if key not in new]
+        ops_size = sum(_OP_SIZE["remove"] + len(op["path"]) for op in ops)
+        new_size = 1 + len(new)
+        for key, value in new.items():
+            pointer = _pointer(path, key)
+            if key in old:
+                child_ops, child_ops_size, size = _diff(old[key], value, pointer)
+                ops.extend(child_ops)
+                ops_size += child_ops_size
+            else:
+                size = _size(value)
+                ops.append({"op": "add", "path": pointer, "value": value})
+                ops_size += _OP_SIZE["add"] + len(pointer) + size
+            new_size += _size(key) + 1 + size
+    elif isinstance(old, list) and isinstance(new, list):
+        ops, ops_size, new_size = [], 0, 1 + max(len(new), 1)
+        for i, (a, b) in enumerate(zip(old, new)):
+            child_ops, child_ops_size, size = _diff(a, b, _pointer(path, i))
+            ops.extend(child_ops)
+            ops_size += child_ops_size
+            new_size += size
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            ops.append({"op": "remove", "path": _pointer(path, i)})
+            ops_size += _OP_SIZE["remove"] + len(ops[-1]["path"])
+        for i in range(len(old), len(new)):
+            size = _size(new[i])
+            ops.append({"op": "add", "path": _pointer(path, i), "value": new[i]})
+            ops_size += _OP_SIZE["add"] + len(ops[-1]["path"]) + size
+            new_size += size
+    else:
+        new_size = _size(new)
+        if old == new and type(old) is type(new):
+            return [], 0, new_size
+        return [{"op": "replace", "path": path, "value": new}], _OP_SIZE["replace"] + len(path) + new_size, new_size
+
+    replace_size = _OP_SIZE["replace"] + len(path) + new_size
+    if path and len(ops) > 1 and ops_size > replace_size:
+        return [{"op": "replace", "path": path, "value": new}], replace_size, new_size
+    return ops, ops_size, new_size
+
+
+def json_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    JSON Patch operations turning `old` into `new`.
+
+    Dicts are compared key by key and lists item by item; a list that
+    shrinks loses its tail from the end, so the operations apply in order.
+    Where a container's operations would serialize larger than the container
+    itself (every 大運 after a gender flip) it is replaced whole instead.
+    """
+    return _diff(old, new, path)[0]
+
+
+def changed_scope(previous: Optional[Dict[str, Any]], request: Dict[str, Any]) -> str:
+    """What an input change reaches: "full", "hour", "gender", "as_of" or "none"."""
+    if previous is None:
+        return "full"
+    changed = {key for key, value in request.items() if previous.get(key) != value}
+    if changed & DATE_FIELDS:
+        return "full"
+    if "hour" in changed:
+        return "hour"
+    if "gender" in changed:
+        return "gender"
+    if changed & AS_OF_FIELDS:
+        return "as_of"
+    return "none"
+
+
+def live_update(state: Optional[LiveState], request: Dict[str, Any]) -> Tuple[LiveState, Dict[str, Any]]:
+    """
+    Apply a validated BaziRequest (as a dict) to a connection's state.
+
+    Returns:
+        (new state, message): {"type": "chart", "scope": "full", "chart"}
+        for the first chart of a connection, then {"type": "patch",
+        "scope", "patch"} against the chart last sent
+
+    Raises:
+        ValueError: If the calculator rejects the input
+    """
+    from app.api.deps import get_calculator
+    from app.schemas.bazi import BaziResponse
+
+    calculator = get_calculator()
+    scope = changed_scope(state.request if state else None, request)
+    birth = (
+        request["year"], request["month"], request["day"], request["hour"],
+        request["is_lunar"], request["is_leap_month"], request["gender"],
+    )
+
+    if scope == "full":
+        shared_pillars: Dict[tuple, Dict[str, Any]] = {}
+        natal = calculator.calculate_natal(*birth, shared_pillars=shared_pillars)
+    else:
+        shared_pillars = state.shared_pillars
+        if scope == "hour":
+            natal = calculator.calculate_natal(*birth, shared_pillars=shared_pillars)
+        elif scope == "gender":
+            natal = calculator.calculate_natal_for_gender(state.natal, *birth)
+        else:
+            natal = state.natal
+
+    if scope == "none":
+        chart = state.chart
+    else:
+        dayun_range = request["dayun_range"]
+        result = calculator.apply_as_of(
+            natal, request["year"], request["as_of"], request["include_liunian"],
+            (dayun_range["offset"], dayun_range["limit"]) if dayun_range else None,
+        )
+        chart = BaziResponse(**result).model_dump(mode="json")
+
+    new_state = LiveState(request, natal, chart, shared_pillars)
+    if state is None:
+        return new_state, {"type": "chart", "scope": scope, "chart": chart}
+    return new_state, {"type": "patch", "scope": scope, "patch": json_patch(state.chart, chart)}
@@ -0,0 +1,124 @@
+"""Birth-time rectification over candidate 時辰 (POST /api/rectify).
+
+Each candidate slot's profile (bazi/rectify.py) needs a natal 八字 chart and
+a 紫微斗數 chart. They are built once per (birth input, slot) and kept in a
+per-process LRU, so re-ranking the same birth with other events only runs the
+vectorized scoring. The natal charts also go through the calculator's natal
+cache, which makes the follow-up /api/bazi for the chosen hour a hit.
+"""
+
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+# Profiles kept per process; one birth date has at most 13
+PROFILE_CACHE_SLOTS = 4096
+
+
+def candidate_slots(hour_start: Optional[int], hour_end: Optional[int]) -> List[int]:
+    """
+    Pillar-table slots (0 早子時 .. 12 晚子時) with a clock hour in the window.
+
+    The window is inclusive and wraps past midnight when hour_start >
+    hour_end; no window means every slot.
+    """
+    from bazi.pillar_table import SLOTS_PER_DAY, slot_hours
+
+    if hour_start is None or hour_end is None:
+        return list(range(SLOTS_PER_DAY))
+    if hour_start <= hour_end:
+        window = set(range(hour_start, hour_end + 1))
+    else:
+        window = set(range(hour_start, 24)) | set(range(hour_end + 1))
+    return [slot for slot in range(SLOTS_PER_DAY) if window.intersection(slot_hours(slot))]
+
+
+@lru_cache(maxsize=PROFILE_CACHE_SLOTS)
+def _slot_profile(year: int, month: int, day: int, slot: int, is_lunar: bool, is_leap_month: bool, gender: str):
+    from lunar_python import Lunar, Solar
+
+    from app.api.deps import get_calculator, get_ziwei_calculator
+    from bazi.pillar_table import slot_hours
+    from bazi.rectify import slot_profile
+
+    hour = slot_hours(slot)[0]
+    natal = get_calculator().calculate_natal(year, month, day, hour, is_lunar, is_leap_month, gender)
+    ziwei = get_ziwei_calculator().calculate(year, month, day, hour, is_lunar, is_leap_month, gender)
+    if is_lunar:
+        lunar = Lunar.fromYmdHms(year, -month if is_leap_month else month, day, hour, 0, 0)
+    else:
+        lunar = Solar.fromYmdHms(year, month, day, hour, 0, 0).getLunar()
+    hour_pillar = natal["hour_pillar"]["gan"] + natal["hour_pillar"]["zhi"]
+    return hour_pillar, slot_profile(natal, ziwei, lunar.getYear())
+
+
+def rectify(
+    year: int,
+    month: int,
+    day: int,
+    events: Sequence[Dict[str, Any]],
+    is_lunar: bool = False,
+    is_leap_month: bool = False,
+    gender: str = "male",
+    hour_start: Optional[int] = None,
+    hour_end: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Rank the candidate 時辰 of a birth date by how well `events` fit them.
+
+    Args:
+        year, month, day, is_lunar, is_leap_month, gender: Birth input, as
+            for /api/bazi without the hour
+        events: {"date": date, "kind": one of EVENT_KINDS, "weight": float}
+        hour_start, hour_end: Inclusive clock-hour window of the candidates
+
+    Returns:
+        dict matching RectifyResponse, candidates best first
+
+    Raises:
+        ValueError: If the window holds no slot or an event precedes the birth year
+    """
+    from app.api.deps import get_calculator
+    from bazi.ganzhi_codes import ZHI
+    from bazi.pillar_table import slot_hours
+    from bazi.rectify import score_candidates
+
+    slots = candidate_slots(hour_start, hour_end)
+    if not slots:
+        raise ValueError("No 時辰 falls inside the hour window")
+    charts = [_slot_profile(year, month, day, slot, is_lunar, is_leap_month, gender) for slot in slots]
+    profiles = [profile for _, profile in charts]
+    dates: List[date] = [event["date"] for event in events]
+    first_year = min(profile.first_year for profile in profiles)
+    early = [d for d in dates if d.year < first_year]
+    if early:
+        raise ValueError(f"Event {early[0].isoformat()} is before the birth year {first_year}")
+
+    scores = score_candidates(profiles, dates, [event["kind"] for event in events], get_calculator().pillar_table)
+    weights = [event.get("weight", 1.0) for event in events]
+    bazi_totals = scores.bazi @ weights
+    ziwei_totals = scores.ziwei @ weights
+
+    candidates = []
+    for c, (slot, (hour_pillar, _)) in enumerate(zip(slots, charts)):
+        candidates.append({
+            "zhi": ZHI[slot % 12],
+            "hours": list(slot_hours(slot)),
+            "late_zi": slot == 12,
+            "hour_pillar": hour_pillar,
+            "score": round(float(bazi_totals[c] + ziwei_totals[c]), 2),
+            "bazi_score": round(float(bazi_totals[c]), 2),
+            "ziwei_score": round(float(ziwei_totals[c]), 2),
+            "events": [
+                {
+                    "index": e,
+                    "bazi": round(float(scores.bazi[c, e]), 2),
+                    "ziwei": round(float(scores.ziwei[c, e]), 2),
+                    "hits": scores.hits[c][e],
+                }
+                for e in range(len(events))
+            ],
+        })
+    # Stable: equal scores keep slot order
+    candidates.sort(key=lambda candidate: -candidate["score"])
+    return {"candidates": candidates}
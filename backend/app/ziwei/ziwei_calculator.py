@@ -9,11 +9,13 @@ know about: the project's `male`/`female` + 0-23 hour convention vs iztro's
 `男`/`女` + 0-12 時辰 index, and the gaps in iztro-py's own localisation.
 """
 
-from typing import Any, Dict, List, Optional
+import datetime
+from typing import Any, Collection, Dict, FrozenSet, List, Optional, Sequence, Tuple
 
 from iztro_py import by_lunar, by_solar
 from iztro_py.i18n import t
 from iztro_py.utils.helpers import hour_to_time_index
+from lunar_python import LunarYear, Solar
 
 # iztro-py only accepts 男/女; the rest of this project speaks male/female.
 _GENDER = {"male": "男", "female": "女"}
@@ -26,6 +28,10 @@ _GENDER = {"male": "男", "female": "女"}
 # of school, not a bug, so it is surfaced in the response instead of patched.
 YEAR_DIVIDE = "normal"
 
+# Part of every /api/ziwei ETag. Bump when calculate output changes, including
+# after an iztro-py upgrade, so caches never revalidate a stale chart.
+CALCULATOR_VERSION = 1
+
 # iztro-py leaks four simplified-Chinese strings into its zh-TW output:
 # the 廟 brightness level, both 四化 names that differ between scripts
 # (star/mutagen.py hardcodes ["禄", "权", "科", "忌"], bypassing i18n entirely),
@@ -34,9 +40,95 @@ YEAR_DIVIDE = "normal"
 # a guess — revisit it when bumping iztro-py.
 _ZH_TW_FIXES = {"庙": "廟", "权": "權", "禄": "祿", "流时": "流時"}
 
+# Chart fields that are the same for every 時辰 of a day (0-11; 晚子時 can
+# move the lunar date), returned once by calculate_hour_unknown.
+_HOUR_FREE_FIELDS = ("solar_date", "lunar_date", "year_divide", "gender", "zodiac", "sign", "language")
+
+# calculate fields, in ZiweiResponse order; `fields` selects among them
+CHART_FIELDS = (
+    "solar_date", "lunar_date", "chinese_date", "year_divide", "time", "time_range", "time_index", "gender",
+    "zodiac", "sign", "five_elements_class", "soul", "body", "soul_palace_branch", "body_palace_branch",
+    "language", "palaces", "horoscope",
+)
+# Palace fields, in ZiweiPalace order; `palaces.<field>` selects among them
+PALACE_FIELDS = (
+    "index", "name", "is_body_palace", "is_original_palace", "heavenly_stem", "earthly_branch", "major_stars",
+    "minor_stars", "adjective_stars", "changsheng12", "boshi12", "jiangqian12", "suiqian12", "decadal", "ages",
+)
+# 運限 layers a timeline lists at each granularity, coarse to fine. 大限 and
+# 小限 turn with 虛歲, so at the same lunar new years as 流年.
+TIMELINE_LAYERS = {
+    "decadal": ("decadal",),
+    "yearly": ("decadal", "age_scope", "yearly"),
+    "monthly": ("decadal", "age_scope", "yearly", "monthly"),
+    "daily": ("decadal", "age_scope", "yearly", "monthly", "daily"),
+}
+
+# Palace fields only iztro-py's model_dump() carries
+_RAW_PALACE_FIELDS = frozenset(("decadal", "ages"))
+
+
+def check_fields(fields: Collection[str]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    Split `fields` into the CHART_FIELDS and the PALACE_FIELDS to build.
+
+    `palaces.<field>` entries select palace fields (index always comes
+    along); plain `palaces`, or no `palaces.*` entry, means all of them.
+
+    Raises:
+        ValueError: If a field is unknown, or none is given
+    """
+    chart = {name for name in fields if not name.startswith("palaces.")}
+    palace = {name.partition(".")[2] for name in fields if name.startswith("palaces.")}
+    unknown = sorted(
+        chart.difference(CHART_FIELDS) | {f"palaces.{name}" for name in palace.difference(PALACE_FIELDS)}
+    )
+    if unknown:
+        raise ValueError(f"Unknown chart fields {', '.join(unknown)}")
+    if not fields:
+        raise ValueError("fields must name at least one chart field")
+    if palace and "palaces" not in chart:
+        chart.add("palaces")
+        return frozenset(chart), frozenset(palace | {"index"})
+    return frozenset(chart), frozenset(PALACE_FIELDS)
+
+
+def _timeline_dates(start: datetime.date, end: datetime.date, granularity: str) -> List[datetime.date]:
+    """
+    `start` and each date in (start, end] a scope of `granularity` can begin
+    on: every day for daily; the first of every lunar month for monthly,
+    plus the 16th of a leap month, where iztro-py splits its 流月; the
+    first of 正月 otherwise. Extra dates cost a horoscope() call each but
+    no entry, as timeline drops dates on which nothing changes.
+    """
+    if granularity == "daily":
+        return [start + datetime.timedelta(days=n) for n in range((end - start).days + 1)]
+
+    dates = [start]
+    first_year = Solar.fromYmd(start.year, start.month, start.day).getLunar().getYear()
+    for lunar_year in range(first_year, end.year + 1):
+        for lunar_month in LunarYear.fromYear(lunar_year).getMonthsInYear():
+            if granularity != "monthly" and lunar_month.getMonth() != 1:
+                continue
+            solar = Solar.fromJulianDay(lunar_month.getFirstJulianDay())
+            first = datetime.date(solar.getYear(), solar.getMonth(), solar.getDay())
+            candidates = [first, first + datetime.timedelta(days=15)] if lunar_month.isLeap() else [first]
+            dates.extend(date for date in candidates if start < date <= end)
+    return dates
+
 
 class ZiweiCalculator:
-    """Builds 紫微斗數 charts. Stateless and safe to share across requests."""
+    """Builds 紫微斗數 charts. Safe to share across requests."""
+
+    def __init__(self, natal_cache: Optional[Any] = None):
+        """
+        Args:
+            natal_cache: A NatalCache (app/bazi/natal_cache.py) for built
+                iztro charts and their localised natal fields, per birth
+                input, language and fix_leap; without one every call
+                rebuilds the chart.
+        """
+        self.natal_cache = natal_cache
 
     def calculate(
         self,
@@ -50,6 +142,7 @@ class ZiweiCalculator:
         language: str = "zh-TW",
         fix_leap: bool = True,
         horoscope_date: Optional[str] = None,
+        fields: Optional[Collection[str]] = None,
     ) -> Dict[str, Any]:
         """
         Build a full 紫微斗數 chart.
@@ -64,9 +157,49 @@ class ZiweiCalculator:
             language: One of iztro's six locales; defaults to Traditional Chinese.
             fix_leap: Split a leap month at the 15th, per iztro's `fixLeap`.
             horoscope_date: Solar 'YYYY-MM-DD' to resolve 運限 for. Omit to skip.
+            fields: CHART_FIELDS and `palaces.<field>` entries to return
+                (see check_fields); None for all. The palaces, their star
+                lists, 大限 / 小限 and the 運限 are only built when asked
+                for. iztro-py still places every star: by_solar / by_lunar
+                build the whole chart up front. A cached chart is used when
+                there is one; a partial one is not cached.
 
         Returns:
-            dict matching ZiweiResponse.
+            dict matching ZiweiResponse, or only `fields` of it.
+
+        Raises:
+            ValueError: On an unknown gender or field, or a date iztro-py rejects.
+        """
+        if gender not in _GENDER:
+            raise ValueError(f"gender must be 'male' or 'female', got {gender!r}")
+
+        chart_fields, palace_fields = check_fields(fields) if fields is not None else (None, None)
+        return self._chart(
+            year, month, day, hour_to_time_index(hour), is_lunar, is_leap_month,
+            gender, language, fix_leap, horoscope_date, chart_fields, palace_fields,
+        )
+
+    def calculate_hour_unknown(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male",
+        language: str = "zh-TW",
+        fix_leap: bool = True,
+        horoscope_date: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the chart for each of the twelve 時辰 of a birth date whose hour
+        is unknown, 子 (早子時) to 亥.
+
+        Arguments as `calculate`, without `hour`.
+
+        Returns:
+            dict matching ZiweiHourUnknownResponse: the fields no 時辰 changes
+            (dates, gender, 生肖, 星座) once, and the rest per variant.
 
         Raises:
             ValueError: On an unknown gender or a date iztro-py rejects.
@@ -74,23 +207,268 @@ class ZiweiCalculator:
         if gender not in _GENDER:
             raise ValueError(f"gender must be 'male' or 'female', got {gender!r}")
 
+        charts = [
+            self._chart(
+                year, month, day, time_index, is_lunar, is_leap_month,
+                gender, language, fix_leap, horoscope_date,
+            )
+            for time_index in range(12)
+        ]
+        result: Dict[str, Any] = {key: charts[0][key] for key in _HOUR_FREE_FIELDS}
+        result["variants"] = [
+            {key: value for key, value in chart.items() if key not in _HOUR_FREE_FIELDS}
+            for chart in charts
+        ]
+        return result
+
+    def horoscopes(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        dates: Sequence[str],
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male",
+        language: str = "zh-TW",
+        fix_leap: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        運限 of one chart at each of `dates`, without the chart itself.
+
+        The chart is built once (or taken from the cache) and resolved at
+        every date, so stepping a 運限 view through dates costs one iztro
+        horoscope() call per date.
+
+        Args:
+            dates: Solar 'YYYY-MM-DD' dates.
+            Others as `calculate`.
+
+        Returns:
+            One dict matching ZiweiHoroscope per date, in order.
+
+        Raises:
+            ValueError: On an unknown gender or a date iztro-py rejects.
+        """
+        if gender not in _GENDER:
+            raise ValueError(f"gender must be 'male' or 'female', got {gender!r}")
+
+        chart = self._horoscope_chart(year, month, day, hour, is_lunar, is_leap_month, gender, language, fix_leap)
+        return [self._horoscope(chart, date, language) for date in dates]
+
+    def timeline(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        start: datetime.date,
+        end: datetime.date,
+        granularity: str = "yearly",
+        is_lunar: bool = False,
+        is_leap_month: bool = False,
+        gender: str = "male",
+        language: str = "zh-TW",
+        fix_leap: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Every 運限 scope of one chart from `start` to `end`, down to
+        `granularity` (see TIMELINE_LAYERS).
+
+        The chart is built once (or taken from the cache) and resolved at
+        `start` and each later date a scope can begin on (see
+        _timeline_dates). A scope is listed once for the run of consecutive
+        dates sharing it, e.g. one 大限 for a decade of 流年, and entries
+        refer to it by position. A date on which no layer changes adds no
+        entry.
+
+        Args:
+            start, end: First and last solar date, inclusive.
+            granularity: 'decadal', 'yearly', 'monthly' or 'daily'.
+            Others as `calculate`.
+
+        Returns:
+            dict matching ZiweiTimelineResponse.
+
+        Raises:
+            ValueError: On an unknown gender or granularity, or a date
+                iztro-py rejects.
+        """
+        if gender not in _GENDER:
+            raise ValueError(f"gender must be 'male' or 'female', got {gender!r}")
+        if granularity not in TIMELINE_LAYERS:
+            raise ValueError(f"granularity must be one of {', '.join(TIMELINE_LAYERS)}, got {granularity!r}")
+
+        chart = self._horoscope_chart(year, month, day, hour, is_lunar, is_leap_month, gender, language, fix_leap)
+        layers = TIMELINE_LAYERS[granularity]
+        scopes: Dict[str, List[Dict[str, Any]]] = {layer: [] for layer in layers}
+        entries: List[Dict[str, Any]] = []
+        for date in _timeline_dates(start, end, granularity):
+            horoscope = self._horoscope(chart, date.isoformat(), language)
+            previous = entries[-1] if entries else {}
+            entry = {
+                "solar_date": horoscope["solar_date"],
+                "lunar_date": horoscope["lunar_date"],
+                "nominal_age": horoscope["nominal_age"],
+            }
+            for layer in layers:
+                scope, index = horoscope[layer], previous.get(layer)
+                if scope is None:
+                    index = None
+                elif index is None or scopes[layer][index] != scope:
+                    scopes[layer].append(scope)
+                    index = len(scopes[layer]) - 1
+                entry[layer] = index
+            if not entries or any(entry[layer] != previous[layer] for layer in layers):
+                entries.append(entry)
+        return {"granularity": granularity, "scopes": scopes, "entries": entries}
+
+    # ------------------------------------------------------------------
+    # Natal chart cache
+    # ------------------------------------------------------------------
+
+    def _chart(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        time_index: int,
+        is_lunar: bool,
+        is_leap_month: bool,
+        gender: str,
+        language: str,
+        fix_leap: bool,
+        horoscope_date: Optional[str],
+        chart_fields: Optional[FrozenSet[str]] = None,
+        palace_fields: Optional[FrozenSet[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        One chart as a ZiweiResponse dict; only `chart_fields` (all when
+        None), with palaces of `palace_fields`.
+        """
+        chart, natal = self._natal(
+            year, month, day, time_index, is_lunar, is_leap_month, gender, language, fix_leap,
+            chart_fields, palace_fields,
+        )
+        result = dict(natal)
+        result["horoscope"] = None
+        if horoscope_date and (chart_fields is None or "horoscope" in chart_fields):
+            result["horoscope"] = self._horoscope(chart, horoscope_date, language)
+
+        if chart_fields is None:
+            return result
+        result = {key: value for key, value in result.items() if key in chart_fields}
+        if "palaces" in result and len(palace_fields) < len(PALACE_FIELDS):
+            result["palaces"] = [
+                {key: palace[key] for key in PALACE_FIELDS if key in palace_fields}
+                for palace in result["palaces"]
+            ]
+        return result
+
+    def _horoscope_chart(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        is_lunar: bool,
+        is_leap_month: bool,
+        gender: str,
+        language: str,
+        fix_leap: bool,
+    ) -> Any:
+        """The iztro chart to resolve 運限 on: cached (with its natal fields) when there is a cache."""
         time_index = hour_to_time_index(hour)
+        if self.natal_cache is not None:
+            return self._natal(
+                year, month, day, time_index, is_lunar, is_leap_month, gender, language, fix_leap
+            )[0]
+        return self._iztro_chart(year, month, day, time_index, is_lunar, is_leap_month, gender, language, fix_leap)
+
+    def _natal(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        time_index: int,
+        is_lunar: bool,
+        is_leap_month: bool,
+        gender: str,
+        language: str,
+        fix_leap: bool,
+        chart_fields: Optional[FrozenSet[str]] = None,
+        palace_fields: Optional[FrozenSet[str]] = None,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        The iztro chart and its localised natal fields (all but horoscope).
+
+        With a cache, a full build is stored and later calls get it back
+        (frozen). A miss with `chart_fields` builds only the parts they
+        need and leaves the cache alone.
+        """
+        key = (
+            CALCULATOR_VERSION, year, month, day, time_index, is_lunar, is_lunar and is_leap_month,
+            gender, language, fix_leap,
+        )
+        if self.natal_cache is not None:
+            cached = self.natal_cache.get(key)
+            if cached is not None:
+                return cached["chart"], cached["natal"]
+
+        chart = self._iztro_chart(year, month, day, time_index, is_lunar, is_leap_month, gender, language, fix_leap)
+        natal = self._natal_fields(chart, time_index, language, chart_fields, palace_fields)
+        if self.natal_cache is not None and chart_fields is None:
+            natal = self.natal_cache.put(key, {"chart": chart, "natal": natal})["natal"]
+        return chart, natal
+
+    @staticmethod
+    def _iztro_chart(
+        year: int,
+        month: int,
+        day: int,
+        time_index: int,
+        is_lunar: bool,
+        is_leap_month: bool,
+        gender: str,
+        language: str,
+        fix_leap: bool,
+    ) -> Any:
+        """iztro-py's chart object for a birth input."""
         date_str = f"{year}-{month:02d}-{day:02d}"
         iztro_gender = _GENDER[gender]
 
         if is_lunar:
-            chart = by_lunar(
+            return by_lunar(
                 date_str, time_index, iztro_gender, is_leap_month, fix_leap, language
             )
-        else:
-            chart = by_solar(date_str, time_index, iztro_gender, fix_leap, language)
+        return by_solar(date_str, time_index, iztro_gender, fix_leap, language)
+
+    def _natal_fields(
+        self,
+        chart: Any,
+        time_index: int,
+        language: str,
+        chart_fields: Optional[FrozenSet[str]] = None,
+        palace_fields: Optional[FrozenSet[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        ZiweiResponse fields of `chart` but horoscope, after _fix_locale;
+        palaces only if in `chart_fields` (all when None), with
+        `palace_fields`.
+        """
+        wanted = CHART_FIELDS if chart_fields is None else chart_fields
+        palace_keys = PALACE_FIELDS if palace_fields is None else palace_fields
 
         # Neither serialisation iztro-py offers is complete on its own:
         # to_iztro_dict() localises names but drops 大限/小限, while model_dump()
         # keeps them but emits raw keys like 'ziweiMaj'. Merge the two by palace
-        # index — both are 12 entries in the same order.
+        # index — both are 12 entries in the same order. model_dump() is
+        # skipped when no requested field reads it.
         localized = chart.to_iztro_dict()
-        raw = chart.model_dump()
+        raw_palaces = [None] * len(localized["palaces"])
+        if "palaces" in wanted and _RAW_PALACE_FIELDS.intersection(palace_keys):
+            raw_palaces = chart.model_dump()["palaces"]
 
         result: Dict[str, Any] = {
             "solar_date": localized["solarDate"],
@@ -109,52 +487,63 @@ class ZiweiCalculator:
             "soul_palace_branch": localized["earthlyBranchOfSoulPalace"],
             "body_palace_branch": localized["earthlyBranchOfBodyPalace"],
             "language": language,
-            "palaces": [
-                self._build_palace(loc, raw_palace, language)
-                for loc, raw_palace in zip(localized["palaces"], raw["palaces"])
-            ],
-            "horoscope": None,
+            "palaces": None,
         }
 
-        if horoscope_date:
-            result["horoscope"] = self._build_horoscope(
-                chart.horoscope(horoscope_date).model_dump(), language
-            )
+        if "palaces" in wanted:
+            result["palaces"] = [
+                self._build_palace(position, loc, raw_palace, language, palace_keys)
+                for position, (loc, raw_palace) in enumerate(zip(localized["palaces"], raw_palaces))
+            ]
 
         return self._fix_locale(result, language)
 
+    def _horoscope(self, chart: Any, date: str, language: str) -> Dict[str, Any]:
+        """ZiweiHoroscope dict of `chart` at solar 'YYYY-MM-DD' `date`, after _fix_locale."""
+        return self._fix_locale(self._build_horoscope(chart.horoscope(date).model_dump(), language), language)
+
     # ------------------------------------------------------------------
     # Chart assembly
     # ------------------------------------------------------------------
 
     def _build_palace(
-        self, loc: Dict[str, Any], raw: Dict[str, Any], language: str
+        self,
+        position: int,
+        loc: Dict[str, Any],
+        raw: Optional[Dict[str, Any]],
+        language: str,
+        keys: Collection[str] = PALACE_FIELDS,
     ) -> Dict[str, Any]:
-        """Merge a localised palace with the 大限/小限 fields only `raw` carries."""
-        decadal = raw.get("decadal") or {}
-        return {
-            "index": raw["index"],
+        """
+        Merge a localised palace with the 大限/小限 fields only `raw` carries,
+        building only `keys`. `raw` may be None when neither is wanted; the
+        palace at `position` then stands in for raw["index"].
+        """
+        palace: Dict[str, Any] = {
+            "index": raw["index"] if raw is not None else position,
             "name": loc["name"],
             "is_body_palace": loc["isBodyPalace"],
             "is_original_palace": loc["isOriginalPalace"],
             "heavenly_stem": loc["heavenlyStem"],
             "earthly_branch": loc["earthlyBranch"],
-            "major_stars": [self._build_star(s) for s in loc["majorStars"]],
-            "minor_stars": [self._build_star(s) for s in loc["minorStars"]],
-            "adjective_stars": [self._build_star(s) for s in loc["adjectiveStars"]],
-            "changsheng12": loc["changsheng12"],
-            "boshi12": loc["boshi12"],
-            "jiangqian12": loc["jiangqian12"],
-            "suiqian12": loc["suiqian12"],
-            "decadal": {
+        }
+        for key, stars in (
+            ("major_stars", "majorStars"), ("minor_stars", "minorStars"), ("adjective_stars", "adjectiveStars")
+        ):
+            if key in keys:
+                palace[key] = [self._build_star(s) for s in loc[stars]]
+        for key in ("changsheng12", "boshi12", "jiangqian12", "suiqian12"):
+            palace[key] = loc[key]
+        if "decadal" in keys:
+            decadal = raw.get("decadal") or {}
+            palace["decadal"] = {
                 "range": list(decadal.get("range") or []),
                 "heavenly_stem": self._stem(decadal.get("heavenly_stem"), language),
                 "earthly_branch": self._branch(decadal.get("earthly_branch"), language),
-            }
-            if decadal
-            else None,
-            "ages": list(raw.get("ages") or []),
-        }
+            } if decadal else None
+        if "ages" in keys:
+            palace["ages"] = list(raw.get("ages") or [])
+        return {key: palace[key] for key in PALACE_FIELDS if key in keys}
 
     @staticmethod
     def _build_star(star: Dict[str, Any]) -> Dict[str, Any]:
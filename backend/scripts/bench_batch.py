@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""批次排盤吞吐量 — 量 /api/bazi/batch 背後的 process pool 隨 worker 數的 charts/sec。
+
+直接呼叫 batch_service.run_batch（不經 HTTP），每個 worker 數各開一個新的
+ProcessPoolExecutor，先暖機（worker 建好 calculator）再計時，所以量到的是穩態吞吐。
+
+用法:
+    python scripts/bench_batch.py                          # 1..CPU 核心數，各跑 400 張八字盤
+    python scripts/bench_batch.py --workers 1 2 4 8 --count 2000
+    python scripts/bench_batch.py --kind ziwei --chunk-size 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.schemas import BaziRequest, ZiweiRequest  # noqa: E402
+from app.services import batch_service  # noqa: E402
+
+
+def make_items(kind: str, count: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    model = BaziRequest if kind == "bazi" else ZiweiRequest
+    return [
+        model(
+            year=rnd.randint(1920, 2020),
+            month=rnd.randint(1, 12),
+            day=rnd.randint(1, 28),
+            hour=rnd.randint(0, 23),
+            gender=rnd.choice(["male", "female"]),
+        )
+        for _ in range(count)
+    ]
+
+
+def run(kind: str, items: list, workers: int, chunk_size: int) -> float:
+    chunk_fn = batch_service.bazi_chunk if kind == "bazi" else batch_service.ziwei_chunk
+    with ProcessPoolExecutor(max_workers=workers, initializer=batch_service._init_worker) as pool:
+        # 暖機：每個 worker 都跑過 initializer
+        wait([pool.submit(chunk_fn, items[:1]) for _ in range(workers)])
+        t0 = time.perf_counter()
+        results = asyncio.run(batch_service.run_batch(chunk_fn, items, executor=pool, chunk_size=chunk_size))
+        elapsed = time.perf_counter() - t0
+    failed = sum(1 for r in results if r.error is not None)
+    if failed:
+        print(f"  warning: {failed} items failed")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kind", choices=["bazi", "ziwei"], default="bazi")
+    parser.add_argument("--count", type=int, default=400, help="charts per run (default 400)")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default 1..CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="items per task (default 16)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workers = args.workers or list(range(1, (os.cpu_count() or 1) + 1))
+    items = make_items(args.kind, args.count, args.seed)
+
+    print(f"{args.kind}: {args.count} charts, chunk size {args.chunk_size}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'charts/s':>9} {'speedup':>8}")
+    base = None
+    for n in workers:
+        elapsed = run(args.kind, items, n, args.chunk_size)
+        rate = args.count / elapsed
+        base = base or rate
+        print(f"{n:>8} {elapsed:>9.2f} {rate:>9.1f} {rate / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
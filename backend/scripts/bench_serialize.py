@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""回應序列化耗時 — 比較 /api/bazi、/api/ziwei 舊路徑與 api/responses.py 快速路徑。
+
+舊路徑照 FastAPI 處理 `response_model` 的步驟重現：route 建 `Model(**result)`，
+FastAPI 再 model_dump 成 dict、對 response model 重新驗證一次、dump 成 JSON 相容
+的 dict，最後由 JSONResponse 用 json.dumps 編碼。快速路徑只驗證一次，直接由
+pydantic-core 編成 bytes。排盤結果先算好，只計序列化時間；兩條路徑的輸出會先比對一致。
+
+第二張表列出 Accept 可選的各種編碼（JSON / MessagePack，逐列或 columnar）的
+回應大小與編碼耗時。
+
+用法:
+    python scripts/bench_serialize.py                     # 各 50 張盤，每張重複 20 次
+    python scripts/bench_serialize.py --count 200 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.api.deps import get_calculator, get_ziwei_calculator  # noqa: E402
+from app.api.responses import JSON, MSGPACK, ChartEncoding, encode_chart  # noqa: E402
+from app.schemas import BaziResponse, ZiweiResponse  # noqa: E402
+
+AS_OF = datetime.date(2026, 3, 1)
+
+ENCODINGS = [
+    ("json", ChartEncoding(JSON)),
+    ("json columnar", ChartEncoding(JSON, columnar=True)),
+    ("msgpack", ChartEncoding(MSGPACK)),
+    ("msgpack columnar", ChartEncoding(MSGPACK, columnar=True)),
+]
+
+
+def make_births(count: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    return [
+        dict(
+            year=rnd.randint(1920, 2020),
+            month=rnd.randint(1, 12),
+            day=rnd.randint(1, 28),
+            hour=rnd.randint(0, 23),
+            gender=rnd.choice(["male", "female"]),
+        )
+        for _ in range(count)
+    ]
+
+
+def response_model_path(model) -> Callable[[dict], bytes]:
+    """FastAPI's route + serialize_response + JSONResponse steps."""
+    adapter = TypeAdapter(model)
+
+    def encode(result: dict) -> bytes:
+        content = model(**result).model_dump(by_alias=True)
+        value = adapter.validate_python(content)
+        data = adapter.dump_python(value, mode="json", by_alias=True)
+        return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    return encode
+
+
+def timed(encode: Callable[[dict], bytes], results: list, repeat: int) -> Tuple[float, int]:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for result in results:
+            body = encode(result)
+    elapsed = time.perf_counter() - t0
+    return elapsed / (repeat * len(results)) * 1000, len(body)
+
+
+def cases(births: list) -> List[Tuple[str, type, list]]:
+    bazi, ziwei = get_calculator(), get_ziwei_calculator()
+    return [
+        ("bazi, all 流年", BaziResponse,
+         [bazi.calculate_bazi(**b, as_of=AS_OF) for b in births]),
+        ("bazi, current 流年", BaziResponse,
+         [bazi.calculate_bazi(**b, as_of=AS_OF, include_liunian="current") for b in births]),
+        ("ziwei + 運限", ZiweiResponse,
+         [ziwei.calculate(**b, horoscope_date=AS_OF.isoformat()) for b in births]),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=50, help="charts per case (default 50)")
+    parser.add_argument("--repeat", type=int, default=20, help="encodes per chart (default 20)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    births = make_births(args.count, args.seed)
+    charts = cases(births)
+    print(f"{args.count} charts per case, {args.repeat} encodes each; ms per response")
+    print(f"{'case':<20} {'bytes':>8} {'response_model':>15} {'fast':>8} {'speedup':>8}")
+    for name, model, results in charts:
+        slow, fast = response_model_path(model), lambda r, m=model: encode_chart(m, r)
+        for result in results:
+            assert json.loads(slow(result)) == json.loads(fast(result)), name
+        slow_ms, size = timed(slow, results, args.repeat)
+        fast_ms, _ = timed(fast, results, args.repeat)
+        print(f"{name:<20} {size:>8} {slow_ms:>15.3f} {fast_ms:>8.3f} {slow_ms / fast_ms:>7.2f}x")
+
+    print()
+    print(f"{'case':<20} {'encoding':<17} {'bytes':>8} {'of json':>8} {'ms':>8}")
+    for name, model, results in charts:
+        json_size = None
+        for label, encoding in ENCODINGS:
+            ms, size = timed(lambda r, m=model, e=encoding: encode_chart(m, r, e), results, args.repeat)
+            json_size = json_size or size
+            print(f"{name:<20} {label:<17} {size:>8} {size / json_size:>7.0%} {ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
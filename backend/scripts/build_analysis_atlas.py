@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""建 / 驗證八字分析圖譜 (app/bazi/data/analysis_atlas.bin)。
+
+格式見 app/bazi/analysis_atlas.py。月干由年干、時干由日干決定，合法四柱只有
+60×12×60×12 = 518,400 組；這支腳本對每一組呼叫 analyze_chart（與線上未命中
+時走的是同一個函式），逐欄寫入。--verify 重新逐組計算，確認讀回的內容完全一致。
+
+用法:
+    python scripts/build_analysis_atlas.py              # 建全部 518,400 組，單核約 1 分鐘
+    python scripts/build_analysis_atlas.py --verify     # 建完後逐組驗證
+    python scripts/build_analysis_atlas.py --limit 5000 --out /tmp/a.bin --verify
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+_BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(_BACKEND, "app", "external", "bazi"))
+sys.path.insert(0, os.path.join(_BACKEND, "app"))
+
+from bazi.analysis_atlas import DEFAULT_PATH, AnalysisAtlas, analyze_chart, write_atlas  # noqa: E402
+from bazi.ganzhi_codes import CHARTS, chart_pillars  # noqa: E402
+
+
+def records(limit: int):
+    """analyze_chart for chart numbers 0 .. limit - 1, with progress every 10%."""
+    t0 = time.perf_counter()
+    step = max(limit // 10, 1)
+    for number in range(limit):
+        yield analyze_chart(*chart_pillars(number))
+        if (number + 1) % step == 0:
+            print(f"  {number + 1}/{limit} ({time.perf_counter() - t0:.0f}s)", flush=True)
+
+
+def build(out: str, limit: int = CHARTS) -> None:
+    """Write the atlas for the first `limit` chart numbers."""
+    charts = write_atlas(out, records(limit))
+    print(f"wrote {out}: {charts} charts, {os.path.getsize(out)} bytes")
+
+
+def verify(path: str) -> int:
+    """Compare every chart in the atlas against analyze_chart. Returns mismatch count."""
+    atlas = AnalysisAtlas(path)
+    mismatches = 0
+    for number in range(len(atlas)):
+        gans, zhis = chart_pillars(number)
+        expected = analyze_chart(gans, zhis)
+        got = atlas.lookup(gans, zhis)
+        if got != expected:
+            mismatches += 1
+            print(f"MISMATCH chart {number}: atlas={got} direct={expected}")
+    print(f"verified {len(atlas)} charts: {mismatches} mismatches")
+    atlas.close()
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=CHARTS, help=f"charts to build (default all {CHARTS})")
+    parser.add_argument("--out", default=DEFAULT_PATH, help="output path")
+    parser.add_argument("--verify", action="store_true", help="verify after building")
+    parser.add_argument("--verify-only", action="store_true", help="verify an existing atlas")
+    args = parser.parse_args()
+
+    if not args.verify_only:
+        build(args.out, args.limit)
+    if args.verify or args.verify_only:
+        sys.exit(1 if verify(args.out) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""建 / 驗證四柱查表檔 (app/bazi/data/pillar_table.bin)。
+
+表格內容與格式見 app/bazi/pillar_table.py。每筆資料都直接由 lunar_python 算出，
+所以這支腳本是唯一真相來源；--verify 則用同一份 lunar_python 逐時重算，確認
+BaziCalculator 實際走的查表路徑（含「節」切開時辰時回退）與直接換算完全一致，
+並每天抽一個時辰（逐日輪替）、男女各一，比對由表重建的大運/流年序列與
+lunar_python 的 Yun。
+
+用法:
+    python scripts/build_pillar_table.py                       # 建 1900-2100，單核約 35 分鐘
+    python scripts/build_pillar_table.py --verify              # 建完後逐時驗證整張表，單核再約 2 小時
+    python scripts/build_pillar_table.py --start 1990 --end 1991 --out /tmp/t.bin --verify
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+_BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(_BACKEND, "app", "external", "bazi"))
+sys.path.insert(0, os.path.join(_BACKEND, "app"))
+
+from lunar_python import Lunar, Solar  # noqa: E402
+from lunar_python.util import LunarUtil  # noqa: E402
+
+from bazi.bazi_calculator import BaziCalculator  # noqa: E402
+from bazi.pillar_table import (  # noqa: E402
+    AMBIGUOUS,
+    DEFAULT_PATH,
+    HEADER,
+    MAGIC,
+    RECORD,
+    SLOTS_PER_DAY,
+    SOURCE,
+    VERSION,
+    PillarTable,
+    slot_hours,
+)
+
+GENDERS = ("male", "female")
+
+
+def reference_slot(year: int, month: int, day: int, hour: int) -> tuple:
+    """The record lunar_python implies for one clock hour, in RECORD field order."""
+    solar = Solar.fromYmdHms(year, month, day, hour, 0, 0)
+    lunar = solar.getLunar()
+    ba = lunar.getEightChar()
+    pillars = [
+        LunarUtil.getJiaZiIndex(gz)
+        for gz in (ba.getYear(), ba.getMonth(), ba.getDay(), ba.getTime())
+    ]
+    # getYun(1) is the male chart: forward for a yang year stem, backward otherwise.
+    yang = pillars[0] % 2 == 0
+    male_offset = ba.getYun(1).getStartSolar().getYear() - year
+    female_offset = ba.getYun(0).getStartSolar().getYear() - year
+    forward, backward = (male_offset, female_offset) if yang else (female_offset, male_offset)
+    return (*pillars, lunar.getYear(), lunar.getMonth(), lunar.getDay(), forward, backward)
+
+
+def reference_periods(calculator: BaziCalculator, year: int, month: int, day: int, hour: int, gender: str) -> list:
+    """The 大運/流年 sequence lunar_python's Yun gives one clock hour, as the calculator lays it out."""
+    ba = Solar.fromYmdHms(year, month, day, hour, 0, 0).getLunar().getEightChar()
+    return calculator._periods_from_yun(ba.getYun(gender == "male"))
+
+
+def solar_term_days(first_year: int, last_year: int) -> set:
+    """Every date carrying a 節氣. Only those days can have a slot split by a 節."""
+    days = set()
+    for year in range(first_year - 1, last_year + 2):
+        for solar in Lunar.fromYmd(year, 6, 1).getJieQiTable().values():
+            days.add(date(solar.getYear(), solar.getMonth(), solar.getDay()))
+    return days
+
+
+def build_day(d: date, term_day: bool) -> list:
+    records = []
+    for slot in range(SLOTS_PER_DAY):
+        hours = slot_hours(slot)
+        record = reference_slot(d.year, d.month, d.day, hours[0])
+        if term_day and len(hours) == 2:
+            if reference_slot(d.year, d.month, d.day, hours[1]) != record:
+                record = (AMBIGUOUS,) + record[1:]
+        records.append(record)
+    return records
+
+
+def build(first_year: int, last_year: int, out: str, num_days: int | None = None) -> None:
+    """Write the table for first_year..last_year, or only its first `num_days` days."""
+    first = date(first_year, 1, 1)
+    num_days = num_days or (date(last_year, 12, 31) - first).days + 1
+    term_days = solar_term_days(first_year, last_year)
+
+    buf = bytearray(HEADER.size + num_days * SLOTS_PER_DAY * RECORD.size)
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, SOURCE, first_year, last_year, SLOTS_PER_DAY, num_days)
+
+    t0 = time.perf_counter()
+    ambiguous = 0
+    offset = HEADER.size
+    for i in range(num_days):
+        d = first + timedelta(days=i)
+        for record in build_day(d, d in term_days):
+            RECORD.pack_into(buf, offset, *record)
+            offset += RECORD.size
+            ambiguous += record[0] == AMBIGUOUS
+        if d.month == 12 and d.day == 31:
+            print(f"  {d.year} done ({time.perf_counter() - t0:.0f}s)", flush=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(buf)
+    os.replace(tmp, out)
+    print(f"wrote {out}: {num_days} days, {ambiguous} ambiguous slots, {len(buf)} bytes")
+
+
+def verify(path: str) -> int:
+    """
+    Compare every clock hour in the table against lunar_python, and the
+    大運/流年 sequence the calculator rebuilds from one slot a day (a
+    different slot each day) against lunar_python's Yun. Returns mismatch
+    count.
+    """
+    table = PillarTable(path)
+    calculator = BaziCalculator()
+    first = date(table.first_year, 1, 1)
+    mismatches = 0
+    fallbacks = 0
+    for i in range(table.num_days):
+        d = first + timedelta(days=i)
+        for hour in range(24):
+            expected = reference_slot(d.year, d.month, d.day, hour)
+            got = table.lookup(d.year, d.month, d.day, hour)
+            if got is None:
+                fallbacks += 1
+                continue
+            if tuple(got) != expected:
+                mismatches += 1
+                print(f"MISMATCH {d} {hour:02d}h: table={tuple(got)} lunar_python={expected}")
+        # A Yun costs about as much as a day of hours; check one slot a day
+        hour = slot_hours(i % SLOTS_PER_DAY)[0]
+        got = table.lookup(d.year, d.month, d.day, hour)
+        for gender in GENDERS if got is not None else ():
+            expected = reference_periods(calculator, d.year, d.month, d.day, hour, gender)
+            if calculator._periods_from_slot(got, d.year, gender) != expected:
+                mismatches += 1
+                print(f"MISMATCH {d} {hour:02d}h {gender}: 大運/流年 rebuilt from the table differ from Yun")
+    table.close()
+    print(f"verified {table.num_days * 24} hours and their 大運/流年: {mismatches} mismatches, {fallbacks} fall back")
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=int, default=1900, help="first year (default 1900)")
+    parser.add_argument("--end", type=int, default=2100, help="last year (default 2100)")
+    parser.add_argument("--out", default=DEFAULT_PATH, help="output path")
+    parser.add_argument("--verify", action="store_true", help="verify after building")
+    parser.add_argument("--verify-only", action="store_true", help="verify an existing table")
+    args = parser.parse_args()
+
+    if not args.verify_only:
+        build(args.start, args.end, args.out)
+    if args.verify or args.verify_only:
+        sys.exit(1 if verify(args.out) else 0)
+
+
+if __name__ == "__main__":
+    main()
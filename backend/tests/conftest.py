@@ -0,0 +1,14 @@
+"""Shared pytest setup.
+
+Mirrors the sys.path entries `app/api/deps.py` installs at import time, so
+tests can import the calculator as `bazi.*` (and the vendored library as
+`external.bazi.*`) exactly the way the API layer does.
+"""
+
+import os
+import sys
+
+_APP = os.path.join(os.path.dirname(__file__), "..", "app")
+sys.path.insert(0, os.path.join(_APP, "external", "bazi"))
+sys.path.insert(0, _APP)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
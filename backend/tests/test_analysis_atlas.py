@@ -0,0 +1,75 @@
+"""Analysis atlas vs direct computation.
+
+Builds an atlas of the 8,640 甲子-year charts (1984 births) and checks the
+lookup path against analyze_chart and the calculator's output. The
+every-chart check lives in `scripts/build_analysis_atlas.py --verify`.
+"""
+
+import importlib.util
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from bazi.analysis_atlas import HEADER, AnalysisAtlas, analyze_chart, open_analysis_atlas
+from bazi.bazi_calculator import BaziCalculator
+from bazi.ganzhi_codes import CHARTS, chart_number, chart_pillars
+
+_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "build_analysis_atlas.py")
+_spec = importlib.util.spec_from_file_location("build_analysis_atlas", _SCRIPT)
+build_analysis_atlas = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(build_analysis_atlas)
+
+# Year pillar 甲子 × every month branch, day pillar and hour branch
+LIMIT = 12 * 60 * 12
+
+
+@pytest.fixture(scope="module")
+def atlas(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("atlas") / "analysis_atlas.bin")
+    build_analysis_atlas.build(path, limit=LIMIT)
+    a = AnalysisAtlas(path)
+    yield a
+    a.close()
+
+
+def test_chart_numbers_round_trip():
+    for number in range(0, CHARTS, 997):
+        assert chart_number(*chart_pillars(number)) == number
+    # 甲子 day with a 丙子 hour: a 晚子時 hour stem, no number
+    assert chart_number((0, 2, 0, 2), (0, 2, 0, 0)) is None
+
+
+def test_every_record_matches_analyze_chart(atlas):
+    assert len(atlas) == LIMIT
+    for number in range(LIMIT):
+        gans, zhis = chart_pillars(number)
+        assert atlas.lookup(gans, zhis) == analyze_chart(gans, zhis)
+    assert atlas.lookup(*chart_pillars(LIMIT)) is None
+
+
+def test_calculator_output_identical_with_and_without_atlas(atlas):
+    with_atlas = BaziCalculator(analysis_atlas=atlas)
+    without = BaziCalculator()
+    for d in (date(1984, 3, 1) + timedelta(days=37 * i) for i in range(9)):
+        for hour in (0, 9, 23):
+            for gender in ("male", "female"):
+                args = dict(year=d.year, month=d.month, day=d.day, hour=hour, gender=gender)
+                assert with_atlas.calculate_bazi(**args) == without.calculate_bazi(**args)
+
+
+def test_missing_atlas_is_optional(tmp_path):
+    assert open_analysis_atlas(str(tmp_path / "absent.bin")) is None
+
+
+@pytest.mark.parametrize("field", [1, 2])  # format version, rules
+def test_stale_atlas_is_ignored(atlas, tmp_path, field):
+    assert open_analysis_atlas(atlas.path) is not None
+    with open(atlas.path, "rb") as f:
+        data = bytearray(f.read())
+    header = list(HEADER.unpack_from(data, 0))
+    header[field] ^= 1
+    HEADER.pack_into(data, 0, *header)
+    stale = tmp_path / "stale.bin"
+    stale.write_bytes(bytes(data))
+    assert open_analysis_atlas(str(stale)) is None
@@ -0,0 +1,41 @@
+"""Natal / as-of split: the date-dependent fields come only from `as_of`."""
+
+import copy
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from bazi.bazi_calculator import BaziCalculator
+
+BIRTH = dict(year=2016, month=5, day=15, hour=10, gender="female")
+
+
+def test_as_of_selects_current_pillars():
+    calculator = BaziCalculator()
+    for as_of in (date(2020, 6, 1), date(2041, 1, 1), date(2080, 12, 31)):
+        chart = calculator.calculate_bazi(**BIRTH, as_of=as_of)
+        assert chart["liunian_pillar"]["year"] == as_of.year
+        # Same chart no matter what day it is computed on
+        assert calculator.calculate_bazi(**BIRTH, as_of=as_of) == chart
+
+
+def test_child_shensha_only_before_eleven():
+    calculator = BaziCalculator()
+    natal = calculator.calculate_natal(**BIRTH)
+    before = copy.deepcopy(natal)
+
+    child = calculator.apply_as_of(natal, BIRTH["year"], date(2026, 1, 1))
+    adult = calculator.apply_as_of(natal, BIRTH["year"], date(2027, 1, 1))
+
+    assert natal == before
+    for key in ("year_pillar", "month_pillar", "day_pillar", "hour_pillar"):
+        assert adult[key] == natal[key]
+        assert child[key]["shensha"][: len(adult[key]["shensha"])] == adult[key]["shensha"]
+    assert any(child[key] != adult[key] for key in ("year_pillar", "month_pillar", "day_pillar", "hour_pillar"))
+
+
+def test_endpoint_accepts_as_of():
+    with TestClient(app) as client:
+        body = client.post("/api/bazi", json={**BIRTH, "as_of": "2050-03-01"}).json()
+    assert body["liunian_pillar"]["year"] == 2050
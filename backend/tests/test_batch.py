@@ -0,0 +1,58 @@
+"""Batch endpoints: input order, per-item errors, same charts as the single endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Several chunks per request, so reassembly order is actually exercised
+    monkeypatch.setattr(settings, "BATCH_CHUNK_SIZE", 3)
+
+
+def test_bazi_batch_matches_single_endpoint(client):
+    items = [{"year": 1990, "month": 5, "day": 15, "hour": h, "gender": "female"} for h in range(0, 24, 3)]
+    items.insert(4, {"year": 1990, "month": 2, "day": 30, "hour": 1})
+
+    body = client.post("/api/bazi/batch", json={"items": items}).json()
+
+    assert [r["index"] for r in body["results"]] == list(range(len(items)))
+    assert body["succeeded"] == len(items) - 1 and body["failed"] == 1
+    assert body["results"][4]["error"]["error"] == "Invalid date"
+    for item, entry in zip(items, body["results"]):
+        if entry["error"] is None:
+            assert entry["result"] == client.post("/api/bazi", json=item).json()
+
+
+def test_ziwei_batch_matches_single_endpoint(client):
+    items = [
+        {"year": 1990, "month": 5, "day": 15, "hour": 10, "horoscope_date": "2026-01-01"},
+        {"year": 1990, "month": 2, "day": 31, "hour": 1},
+        {"year": 1990, "month": 4, "day": 1, "hour": 5, "is_lunar": True, "language": "en-US"},
+        {"year": 1985, "month": 8, "day": 8, "hour": 23, "gender": "female"},
+    ]
+
+    body = client.post("/api/ziwei/batch", json={"items": items}).json()
+
+    assert body["succeeded"] == 3 and body["failed"] == 1
+    assert body["results"][1]["error"]["error"] == "Invalid date"
+    for item, entry in zip(items, body["results"]):
+        if entry["error"] is None:
+            assert entry["result"] == client.post("/api/ziwei", json=item).json()
+
+
+def test_batch_size_limit(client, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_ITEMS", 2)
+    item = {"year": 1990, "month": 5, "day": 15, "hour": 10}
+    response = client.post("/api/bazi/batch", json={"items": [item] * 3})
+    assert response.status_code == 400
+    assert response.json()["error"] == "Batch too large"
@@ -0,0 +1,46 @@
+"""Vectorized scoring must match the scalar bazi_functions bit for bit."""
+
+import random
+
+import numpy as np
+import pytest
+
+from bazi.batch_scoring import charts_from_numbers, score_charts
+from bazi.bazi_functions import calculate_ten_deities, calculate_wuxing_scores, check_day_master_strength
+from bazi.ganzhi_codes import CHARTS, chart_pillars
+
+
+def _check(charts):
+    scores = score_charts(charts)
+    for row, chart in enumerate(np.asarray(charts).tolist()):
+        gans, zhis = chart[:4], chart[4:]
+        day_master = gans[2]
+        element_scores, stem_scores = calculate_wuxing_scores(gans, zhis)
+        gan_gods, zhi_gods = calculate_ten_deities(gans, zhis, day_master)
+        assert scores.wuxing_scores[row].tolist() == element_scores
+        assert scores.gan_scores[row].tolist() == stem_scores
+        assert scores.gan_gods[row].tolist() == gan_gods
+        assert scores.zhi_gods[row].tolist() == zhi_gods
+        others = gan_gods[:2] + gan_gods[3:] + zhi_gods
+        assert scores.deity_counts[row].tolist() == [others.count(code) for code in range(10)]
+        assert bool(scores.is_strong[row]) == check_day_master_strength(zhis, day_master)
+
+
+def test_random_codes_match_scalar_functions():
+    # Any stem / branch codes, rule-following or not
+    rnd = random.Random(5)
+    _check([[rnd.randrange(10) for _ in range(4)] + [rnd.randrange(12) for _ in range(4)] for _ in range(3000)])
+
+
+def test_chart_numbers_match_chart_pillars(monkeypatch):
+    numbers = list(range(0, CHARTS, 173))
+    charts = charts_from_numbers(numbers)
+    assert charts.tolist() == [list(gans) + list(zhis) for gans, zhis in map(chart_pillars, numbers)]
+    # Blocks split the batch without changing any row
+    monkeypatch.setattr("bazi.batch_scoring.BLOCK_ROWS", 7)
+    _check(charts[:100])
+
+
+def test_rejects_wrong_shape():
+    with pytest.raises(ValueError):
+        score_charts(np.zeros((3, 7), dtype=np.int8))
@@ -0,0 +1,89 @@
+"""Accept negotiation: msgpack and columnar payloads carry the JSON chart's values."""
+
+import datetime
+import json
+
+import msgpack
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_calculator
+from app.api.responses import (
+    CHART_SCHEMA_VERSION,
+    JSON,
+    MSGPACK,
+    ChartEncoding,
+    encode_chart,
+    negotiate,
+)
+from app.main import app
+from app.schemas import BaziHourUnknownResponse, BaziResponse
+
+AS_OF = datetime.date(2026, 3, 1)
+BIRTH = {"year": 1990, "month": 5, "day": 15, "hour": 9, "as_of": "2026-03-01"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def _rows(columns):
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def from_columnar(data):
+    if "variants" in data:
+        return {**data, "variants": [from_columnar(v) for v in data["variants"]]}
+    dayun = [{**entry, "liunian": _rows(entry["liunian"])} for entry in _rows(data["dayun"])]
+    return {**data, "dayun": dayun}
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, ChartEncoding()),
+    ("*/*", ChartEncoding()),
+    ("text/html, application/msgpack", ChartEncoding(MSGPACK)),
+    ("application/x-msgpack", ChartEncoding(MSGPACK)),
+    ("application/msgpack;q=0.5, application/json", ChartEncoding(JSON)),
+    ("application/json; layout=columnar", ChartEncoding(JSON, True)),
+    (f'application/msgpack; schema="{CHART_SCHEMA_VERSION}"; layout=columnar', ChartEncoding(MSGPACK, True)),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+@pytest.mark.parametrize("accept", ["application/msgpack; schema=0", "application/json; layout=grid"])
+def test_negotiate_not_acceptable(accept):
+    with pytest.raises(HTTPException) as e:
+        negotiate(accept)
+    assert e.value.status_code == 406
+
+
+def test_encodings_carry_same_chart():
+    calc = get_calculator()
+    for model, result in [
+        (BaziResponse, calc.calculate_bazi(1990, 5, 15, 9, as_of=AS_OF)),
+        (BaziHourUnknownResponse, calc.calculate_bazi_hour_unknown(1990, 5, 15, as_of=AS_OF)),
+    ]:
+        expected = json.loads(encode_chart(model, result))
+        assert msgpack.unpackb(encode_chart(model, result, ChartEncoding(MSGPACK))) == expected
+        columnar = msgpack.unpackb(encode_chart(model, result, ChartEncoding(MSGPACK, True)))
+        assert from_columnar(columnar) == expected
+        assert from_columnar(json.loads(encode_chart(model, result, ChartEncoding(JSON, True)))) == expected
+
+
+def test_endpoints(client):
+    chart = client.post("/api/bazi", json=BIRTH).json()
+
+    response = client.post("/api/bazi", json=BIRTH, headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == f"application/msgpack; schema={CHART_SCHEMA_VERSION}"
+    assert "Accept" in response.headers["vary"].split(", ")
+    assert msgpack.unpackb(response.content) == chart
+
+    response = client.post("/api/bazi", json=BIRTH, headers={"Accept": "application/msgpack; schema=2"})
+    assert response.status_code == 406
+
+    response = client.post("/api/ziwei", json=BIRTH, headers={"Accept": "application/msgpack; layout=columnar"})
+    assert response.headers["content-type"].endswith("layout=columnar")
+    assert msgpack.unpackb(response.content) == client.post("/api/ziwei", json=BIRTH).json()
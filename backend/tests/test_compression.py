@@ -0,0 +1,89 @@
+"""Response compression: size threshold, algorithm choice, SSE untouched."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.main import app
+
+BIRTH = {"year": 1990, "month": 5, "day": 15, "hour": 9, "as_of": "2026-03-01"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def stream_client():
+    small = FastAPI()
+    small.add_middleware(CompressionMiddleware)
+
+    @small.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: a\n\n"] * 500), media_type="text/event-stream")
+
+    @small.get("/text")
+    def text(size: int):
+        return PlainTextResponse("八字" * size)
+
+    return TestClient(small)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("br;q=0, *;q=0.1", "gzip"),
+    ("identity", None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header, ["br", "gzip"]) == expected
+
+
+def test_enabled_algorithms():
+    assert choose_encoding("br, gzip", ["gzip"]) == "gzip"
+    assert choose_encoding("br, gzip", []) is None
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_chart_compressed(client, encoding):
+    plain = client.get("/api/bazi", params=BIRTH, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    response = client.get("/api/bazi", params=BIRTH, headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    # The client decodes the body; Content-Length is the compressed size
+    assert response.json() == plain.json()
+    assert int(response.headers["content-length"]) < len(plain.content) / 3
+    # Weak validator on the compressed body, still answered with 304
+    etag = response.headers["etag"]
+    assert etag == "W/" + plain.headers["etag"]
+    not_modified = client.get(
+        "/api/bazi", params=BIRTH, headers={"Accept-Encoding": encoding, "If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304 and not_modified.headers["etag"] == etag
+
+
+def test_small_and_stream_responses(stream_client):
+    before = compression.stats()["skipped"]
+    small = stream_client.get("/text", params={"size": 10}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    large = stream_client.get("/text", params={"size": 1000}, headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip" and large.text == "八字" * 1000
+
+    events = stream_client.get("/events", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in events.headers
+    assert events.text == "data: a\n\n" * 500
+
+    after = compression.stats()
+    assert after["skipped"]["small"] == before.get("small", 0) + 1
+    assert after["skipped"]["event_stream"] == before.get("event_stream", 0) + 1
+    gzip_stats = after["algorithms"]["gzip"]
+    assert gzip_stats["bytes_saved"] > 0 and gzip_stats["cpu_ms"] >= 0
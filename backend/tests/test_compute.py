@@ -0,0 +1,82 @@
+"""Compute executor: bounded admission, deadline, metrics, and the 503 it surfaces."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import compute_service
+from app.services.compute_service import ComputeExecutor
+
+
+def _executor(**overrides) -> ComputeExecutor:
+    options = dict(kind="thread", max_workers=1, max_queue=2, timeout=5.0, retry_after=3)
+    options.update(overrides)
+    return ComputeExecutor(**options)
+
+
+def test_rejects_past_max_queue_and_counts_waits():
+    executor = _executor()
+    release = threading.Event()
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert executor.stats()["in_flight"] == 2
+        assert executor.stats()["queue_depth"] == 1
+
+        with pytest.raises(HTTPException) as exc:
+            await executor.run(lambda: None)
+        assert exc.value.status_code == 503
+        assert exc.value.headers == {"Retry-After": "3"}
+
+        release.set()
+        assert await asyncio.gather(*blocked) == [True, True]
+
+    asyncio.run(scenario())
+    stats = executor.stats()
+    assert stats["in_flight"] == 0
+    assert (stats["submitted"], stats["completed"], stats["rejected"]) == (2, 2, 1)
+    # The second call queued behind the first
+    assert stats["wait_ms"]["max"] >= 40
+    executor.shutdown()
+
+
+def test_deadline():
+    executor = _executor(timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(HTTPException) as exc:
+            await executor.run(release.wait)
+        assert exc.value.status_code == 503
+
+    asyncio.run(scenario())
+    assert executor.stats()["timed_out"] == 1
+    release.set()
+    executor.shutdown()
+
+
+def test_errors_from_the_calculation_propagate():
+    executor = _executor()
+
+    def fail():
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        asyncio.run(executor.run(fail))
+    executor.shutdown()
+
+
+def test_endpoint_returns_503_with_retry_after(monkeypatch):
+    executor = _executor(max_queue=0, retry_after=7)
+    monkeypatch.setattr(compute_service, "_executor", executor)
+    with TestClient(app) as client:
+        response = client.post("/api/bazi", json={"year": 1990, "month": 5, "day": 15, "hour": 10})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "7"
+        assert response.json()["error"] == "Service busy"
+        assert client.get("/health/compute").json()["rejected"] == 1
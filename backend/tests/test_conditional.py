@@ -0,0 +1,61 @@
+"""Conditional GET: GET /api/bazi and /api/ziwei match POST, and a matching ETag skips compute."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.conditional import etag_matches, strong_etag
+from app.main import app
+from app.services import compute_service
+
+BIRTH = {"year": 1990, "month": 5, "day": 15, "hour": 9}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_etag_matches():
+    etag = strong_etag("bazi", 2, {"year": 1990})
+    assert etag.startswith('"') and etag == strong_etag("bazi", 2, {"year": 1990})
+    assert etag != strong_etag("bazi", 3, {"year": 1990})
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag) and not etag_matches('"other"', etag)
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/bazi", {**BIRTH, "as_of": "2026-03-01", "dayun_offset": 2, "dayun_limit": 3}),
+    ("/api/ziwei", {**BIRTH, "horoscope_date": "2026-03-01"}),
+])
+def test_get_matches_post_and_revalidates(client, path, params, monkeypatch):
+    body = dict(params)
+    if "dayun_limit" in body:
+        body["dayun_range"] = {"offset": body.pop("dayun_offset"), "limit": body.pop("dayun_limit")}
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    assert response.json() == client.post(path, json=body).json()
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=86400"
+    assert client.get(path, params=params).headers["etag"] == etag
+
+    # A different encoding is a different representation
+    msgpack = client.get(path, params=params, headers={"Accept": "application/msgpack"})
+    assert msgpack.headers["etag"] != etag
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("calculated despite a matching ETag")
+
+    monkeypatch.setattr(compute_service, "run", fail)
+    response = client.get(path, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_bazi_without_as_of_expires_at_midnight(client):
+    response = client.get("/api/bazi", params=BIRTH)
+    max_age = int(response.headers["cache-control"].rpartition("=")[2])
+    assert 0 <= max_age <= 86400
+    other_day = client.get("/api/bazi", params={**BIRTH, "as_of": "2000-01-01"})
+    assert other_day.headers["etag"] != response.headers["etag"]
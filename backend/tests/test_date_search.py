@@ -0,0 +1,101 @@
+"""擇日 date search: arithmetic pillars vs lunar_python, rule tables vs zhi_atts / gan_ke."""
+
+import random
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from lunar_python import Solar
+
+from app.main import app
+from ganzhi import zhi_atts
+from bazi.bazi_functions import gan_ke
+from bazi.date_search import scan_pillars, search_dates
+from bazi.ganzhi_codes import GAN, JIAZI, ZHI
+
+BIRTH = dict(year=1990, month=5, day=15, hour=10, gender="female")
+
+
+def _lunar(d):
+    return Solar.fromYmd(d.year, d.month, d.day).getLunar()
+
+
+def test_day_pillars_match_lunar_python():
+    rng = random.Random(14)
+    days = sorted(date(1900, 1, 1) + timedelta(days=rng.randrange(146000)) for _ in range(300))
+    for d in days:
+        _, year_pillar, month_pillar, day_pillar = scan_pillars(d, d, "day")
+        lunar = _lunar(d)
+        assert JIAZI[year_pillar[0]] == lunar.getYearInGanZhiByLiChun(), d
+        assert JIAZI[month_pillar[0]] == lunar.getMonthInGanZhi(), d
+        assert JIAZI[day_pillar[0]] == lunar.getDayInGanZhi(), d
+
+
+def test_month_and_year_scopes_start_at_jie():
+    start, end = date(2023, 1, 1), date(2026, 12, 31)
+    days, _, month_pillar, _ = scan_pillars(start, end, "month")
+    assert len(days) == 48
+    for day, pillar in zip(days.tolist(), month_pillar.tolist()):
+        d = date.fromordinal(day)
+        assert JIAZI[pillar] == _lunar(d).getMonthInGanZhi()
+        assert _lunar(d - timedelta(days=1)).getMonthInGanZhi() != JIAZI[pillar]
+
+    days, year_pillar, _, _ = scan_pillars(start, end, "year")
+    assert [JIAZI[p] for p in year_pillar.tolist()] == ["癸卯", "甲辰", "乙巳", "丙午"]
+    assert all(date.fromordinal(day).month == 2 for day in days.tolist())
+
+
+def test_rules_match_scalar_relations():
+    # Natal 甲子 day pillar, every other pillar 丙寅
+    gans, zhis = (2, 2, 0, 2), (2, 2, 0, 2)
+    total, matches = search_dates(
+        gans, zhis, date(2024, 1, 1), date(2024, 12, 31),
+        rules=("sanhe", "liuhe", "liuchong", "tianke_dichong", "guiren"), limit=400,
+    )
+    assert total == len(matches)
+    by_day = {m["start"]: m["hits"] for m in matches}
+    d = date(2024, 1, 1)
+    while d <= date(2024, 12, 31):
+        ganzhi = _lunar(d).getDayInGanZhi()
+        gan, zhi = GAN.index(ganzhi[0]), ZHI.index(ganzhi[1])
+        expected = []
+        if ZHI[zhi] in zhi_atts[ZHI[0]]["合"]:
+            expected.append("sanhe:day")
+        if ZHI[zhi] in zhi_atts[ZHI[0]]["六"]:
+            expected.append("liuhe:day")
+        chong = ZHI[zhi] in zhi_atts[ZHI[0]]["冲"]
+        if chong:
+            expected.append("liuchong:day")
+        if chong and gan_ke(gan, 0):
+            expected.append("tianke_dichong:day")
+        if ZHI[zhi] in ("丑", "未"):
+            expected.append("guiren:day")
+        assert by_day.get(d, []) == expected, d
+        d += timedelta(days=1)
+
+    total, matches = search_dates(
+        gans, zhis, date(2024, 1, 1), date(2024, 12, 31), rules=("liuchong", "guiren"), match="all"
+    )
+    assert total == 0 and matches == []
+
+
+def test_date_search_endpoint():
+    with TestClient(app) as client:
+        body = client.post("/api/bazi/date-search", json={
+            **BIRTH, "start_date": "2026-01-01", "end_date": "2026-12-31",
+            "rules": ["liuchong"], "targets": ["day", "year"], "limit": 5,
+        }).json()
+        assert len(body["matches"]) == 5
+        assert body["truncated"] and body["total"] > 5
+        assert body["matches"][0]["hits"]
+
+        months = client.post("/api/bazi/date-search", json={
+            **BIRTH, "start_date": "2026-01-01", "end_date": "2026-12-31",
+            "scope": "month", "rules": ["sanhe", "liuhe"],
+        }).json()
+        assert all(m["day_ganzhi"] is None for m in months["matches"])
+
+        response = client.post("/api/bazi/date-search", json={
+            **BIRTH, "start_date": "2026-01-01", "end_date": "2025-01-01", "rules": ["liuchong"],
+        })
+        assert response.status_code == 400
+        assert response.json()["error"] == "Invalid range"
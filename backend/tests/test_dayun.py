@@ -0,0 +1,43 @@
+"""大運 skeletons: the memoized sequence matches lunar_python's and is shared, frozen."""
+
+import random
+
+import pytest
+from lunar_python import Solar
+
+from bazi.bazi_calculator import BaziCalculator
+from bazi.dayun import dayun_skeleton
+from bazi.ganzhi_codes import GAN_CODE, JIAZI_CODE, ZHI_CODE
+
+
+def test_skeleton_follows_lunar_python_sequence():
+    calculator = BaziCalculator()
+    rnd = random.Random(11)
+    for _ in range(10):
+        eight_char = Solar.fromYmdHms(
+            rnd.randint(1901, 2099), rnd.randint(1, 12), rnd.randint(1, 28), rnd.randint(0, 23), 0, 0
+        ).getLunar().getEightChar()
+        gans = tuple(GAN_CODE[g] for g in (eight_char.getYearGan(), eight_char.getMonthGan(), eight_char.getDayGan(), eight_char.getTimeGan()))
+        zhis = tuple(ZHI_CODE[z] for z in (eight_char.getYearZhi(), eight_char.getMonthZhi(), eight_char.getDayZhi(), eight_char.getTimeZhi()))
+        for male in (True, False):
+            periods = calculator._periods_from_yun(eight_char.getYun(male))
+            forward = periods[1][1] == (JIAZI_CODE[eight_char.getMonth()] + 1) % 60
+            skeleton = dayun_skeleton(gans, zhis, forward)
+            assert [p.pillar for p in skeleton] == [pillar for _, pillar, _ in periods[1:]]
+
+
+def test_same_pillars_share_annotations():
+    calculator = BaziCalculator()
+    # Hours 1 and 2 fall in the same 時辰: same pillars, same skeleton
+    first = calculator.calculate_natal(1990, 5, 15, 1)
+    second = calculator.calculate_natal(1990, 5, 15, 2)
+    assert first["dayun"][3]["hidden_stems"] is second["dayun"][3]["hidden_stems"]
+    with pytest.raises(TypeError):
+        first["dayun"][3]["liunian"].append({})
+
+
+def test_relationship_lists_stay_empty():
+    natal = BaziCalculator().calculate_natal(1990, 5, 15, 10)
+    for period in natal["dayun"]:
+        assert period["zhi_relationships"] == []
+        assert all(year["zhi_relationships"] == [] for year in period["liunian"])
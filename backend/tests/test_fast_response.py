@@ -0,0 +1,57 @@
+"""api/responses.py: one validation, same body as the response_model path."""
+
+import datetime
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.api.deps import get_calculator, get_ziwei_calculator
+from app.api.responses import encode_chart
+from app.main import app
+from app.schemas import BaziHourUnknownResponse, BaziResponse, ZiweiResponse
+
+AS_OF = datetime.date(2026, 3, 1)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("include_liunian", ["all", "current"])
+def test_bazi_matches_response_model(include_liunian):
+    result = get_calculator().calculate_bazi(1990, 5, 15, 9, as_of=AS_OF, include_liunian=include_liunian)
+    body = encode_chart(BaziResponse, result)
+    assert json.loads(body) == BaziResponse(**result).model_dump(mode="json")
+    # Non-ASCII text is sent as UTF-8, as JSONResponse does
+    assert result["day_pillar"]["gan"].encode() in body
+
+
+def test_hour_unknown_and_ziwei_match_response_model():
+    result = get_calculator().calculate_bazi_hour_unknown(1990, 5, 15, as_of=AS_OF)
+    assert json.loads(encode_chart(BaziHourUnknownResponse, result)) == \
+        BaziHourUnknownResponse(**result).model_dump(mode="json")
+    result = get_ziwei_calculator().calculate(1990, 5, 15, 9, horoscope_date="2026-03-01")
+    assert json.loads(encode_chart(ZiweiResponse, result)) == ZiweiResponse(**result).model_dump(mode="json")
+
+
+def test_invalid_result_raises():
+    result = get_calculator().calculate_bazi(1990, 5, 15, 9, as_of=AS_OF)
+    with pytest.raises(ValidationError):
+        encode_chart(BaziResponse, {**result, "year_pillar": None})
+
+
+def test_endpoints(client):
+    body = {"year": 1990, "month": 5, "day": 15, "hour": 9, "as_of": "2026-03-01"}
+    response = client.post("/api/bazi", json=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    result = get_calculator().calculate_bazi(1990, 5, 15, 9, as_of=AS_OF)
+    assert response.json() == BaziResponse(**result).model_dump(mode="json")
+
+    response = client.post("/api/ziwei", json={**body, "horoscope_date": "2026-03-01"})
+    assert response.status_code == 200
+    assert set(response.json()) == set(ZiweiResponse.model_fields)
+    assert response.json()["horoscope"] is not None
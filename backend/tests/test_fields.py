@@ -0,0 +1,85 @@
+"""Sparse fieldsets: `fields` returns part of a chart and skips computing the rest."""
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ziwei.ziwei_calculator import ZiweiCalculator
+from bazi.bazi_calculator import BaziCalculator
+
+AS_OF = date(2026, 3, 1)
+BIRTH = {"year": 1990, "month": 5, "day": 15, "hour": 9}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("calculated a field nobody asked for")
+
+
+def test_bazi_fields_skip_unrequested_sections(monkeypatch):
+    calc = BaziCalculator()
+    full = calc.calculate_bazi(**BIRTH, as_of=AS_OF)
+
+    for name in ("_get_dayun", "_periods_from_yun", "_periods_from_slot", "_generate_comprehensive_analysis"):
+        monkeypatch.setattr(calc, name, _fail)
+    fields = ["year_pillar", "month_pillar", "day_pillar", "hour_pillar", "nayin"]
+    assert calc.calculate_bazi(**BIRTH, as_of=AS_OF, fields=fields) == {key: full[key] for key in fields}
+
+    monkeypatch.undo()
+    fields = ["day_pillar", "dayun_pillar", "liunian_pillar"]
+    assert calc.calculate_bazi(**BIRTH, as_of=AS_OF, fields=fields) == {key: full[key] for key in fields}
+
+    with pytest.raises(ValueError):
+        calc.calculate_bazi(**BIRTH, as_of=AS_OF, fields=["pillars"])
+
+
+def test_ziwei_fields_skip_unrequested_sections(monkeypatch):
+    calc = ZiweiCalculator()
+    full = calc.calculate(**BIRTH, horoscope_date="2026-03-01")
+
+    monkeypatch.setattr(calc, "_build_horoscope", _fail)
+    result = calc.calculate(
+        **BIRTH, horoscope_date="2026-03-01", fields=["chinese_date", "palaces.name", "palaces.major_stars"]
+    )
+    assert list(result) == ["chinese_date", "palaces"]
+    assert result["palaces"] == [
+        {"index": p["index"], "name": p["name"], "major_stars": p["major_stars"]} for p in full["palaces"]
+    ]
+
+
+def test_bazi_endpoint(client):
+    body = {**BIRTH, "as_of": "2026-03-01"}
+    full = client.post("/api/bazi", json=body).json()
+
+    response = client.post("/api/bazi", json={**body, "fields": ["pillars", "liunian_pillar"]})
+    assert response.status_code == 200
+    assert list(response.json()) == ["year_pillar", "month_pillar", "day_pillar", "hour_pillar", "liunian_pillar"]
+    assert response.json()["liunian_pillar"] == full["liunian_pillar"]
+
+    response = client.get("/api/bazi", params={**body, "fields": "dayun_pillar,lunar_date"})
+    assert response.json() == {"dayun_pillar": full["dayun_pillar"], "lunar_date": full["lunar_date"]}
+    assert response.headers["etag"] != client.get("/api/bazi", params=body).headers["etag"]
+
+
+def test_ziwei_endpoint(client):
+    response = client.get("/api/ziwei", params={**BIRTH, "fields": ["soul", "palaces.ages"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["soul"] == client.post("/api/ziwei", json=BIRTH).json()["soul"]
+    assert set(data["palaces"][0]) == {"index", "ages"}
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/bazi", {**BIRTH, "fields": ["hour"]}),
+    ("/api/bazi", {**BIRTH, "fields": []}),
+    ("/api/bazi", {**BIRTH, "hour_unknown": True, "fields": ["pillars"]}),
+    ("/api/ziwei", {**BIRTH, "fields": ["palaces.stars"]}),
+])
+def test_invalid_fields(client, path, body):
+    assert client.post(path, json=body).status_code == 422
@@ -0,0 +1,71 @@
+"""The integer-coded tables must say exactly what the vendored dicts say."""
+
+from external.bazi.datas import empties, nayins, ten_deities, zhi5, zhi5_list, zhi_atts
+from external.bazi.ganzhi import Gan, Zhi, gan5, gong_he
+
+from bazi.bazi_data import nayins_map, ten_deities_map
+from bazi.bazi_functions import get_life_stage, get_nayin, get_ten_deity
+from bazi.ganzhi_codes import (
+    ELEMENTS,
+    EMPTY_PAIR,
+    GAN_ELEMENT,
+    GAN_ZHI_HE,
+    GONG_HE,
+    HIDDEN_STEMS,
+    HIDDEN_WEIGHTS,
+    JIA,
+    JIAZI,
+    NAYIN,
+    ZHI,
+    ZHI_RELATION,
+    ZHI_RELATION_BIT,
+    jiazi,
+    zhi_mask,
+)
+
+
+def test_jiazi_codes():
+    for j, gz in enumerate(JIAZI):
+        assert jiazi(Gan.index(gz[0]), Zhi.index(gz[1])) == j
+        assert (gz[0], gz[1]) in nayins
+
+
+def test_stem_and_branch_tables():
+    for dm, dm_char in enumerate(Gan):
+        assert ELEMENTS[GAN_ELEMENT[dm]] == gan5[dm_char]
+        for g, g_char in enumerate(Gan):
+            raw = ten_deities[dm_char][g_char]
+            assert get_ten_deity(dm, g) == ten_deities_map.get(raw, raw)
+        for z, z_char in enumerate(Zhi):
+            raw = ten_deities[dm_char][z_char]
+            assert get_life_stage(dm, z) == ten_deities_map.get(raw, raw)
+            he = ten_deities[dm_char]["合"] in zhi5[z_char]
+            assert GAN_ZHI_HE[dm * 12 + z] == he
+
+    for z, z_char in enumerate(Zhi):
+        assert [Gan[g] for g in HIDDEN_STEMS[z]] == zhi5_list[z_char]
+        assert list(HIDDEN_WEIGHTS[z]) == [zhi5[z_char][g] for g in zhi5_list[z_char]]
+        for z2, z2_char in enumerate(Zhi):
+            expected = gong_he.get(z_char + z2_char)
+            assert (ZHI[GONG_HE[z * 12 + z2]] if GONG_HE[z * 12 + z2] >= 0 else None) == expected
+            kinds = [kind for kind, bit in ZHI_RELATION_BIT.items() if ZHI_RELATION[z * 12 + z2] & bit]
+            assert kinds == [kind for kind, targets in zhi_atts[z_char].items() if z2_char in targets]
+            if abs(z - z2) == 2:
+                assert JIA[z * 12 + z2] == (z + z2) // 2
+            elif abs(z - z2) == 10:
+                assert JIA[z * 12 + z2] == (z + z2) % 12
+            else:
+                assert JIA[z * 12 + z2] == -1
+
+
+def test_zhi_mask():
+    assert zhi_mask([]) == 0
+    assert zhi_mask([0, 11, 11]) == 1 | 1 << 11
+
+
+def test_jiazi_tables():
+    for j, gz in enumerate(JIAZI):
+        raw = nayins[(gz[0], gz[1])]
+        assert NAYIN[j] == raw
+        assert get_nayin(j) == nayins_map.get(raw, raw)
+        assert EMPTY_PAIR[j] == empties[(gz[0], gz[1])]
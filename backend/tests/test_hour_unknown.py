@@ -0,0 +1,134 @@
+"""hour_unknown mode: every variant is the chart of its 時辰.
+
+Days include 立春 1990 (4 February, 10:14) and 立秋 2020 (7 August, 09:06),
+where a 節 during the day changes the month (and year) pillar between
+variants, and the days either side of them, which are converted once.
+"""
+
+import datetime
+import importlib.util
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from bazi.bazi_calculator import HOUR_UNKNOWN_HOURS, BaziCalculator
+from bazi.natal_cache import NatalCache
+from bazi.pillar_table import PillarTable
+
+AS_OF = datetime.date(2026, 3, 1)
+BIRTHS = [(1990, 5, 15), (1990, 2, 3), (1990, 2, 4), (1990, 2, 5), (2020, 8, 6), (2020, 8, 7)]
+
+_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "build_pillar_table.py")
+_spec = importlib.util.spec_from_file_location("build_pillar_table", _SCRIPT)
+build_pillar_table = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(build_pillar_table)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    """Pillar table for 1990-01-01..02-14, 立春 included"""
+    path = str(tmp_path_factory.mktemp("pillars") / "pillar_table.bin")
+    build_pillar_table.build(1990, 1990, path, num_days=45)
+    t = PillarTable(path)
+    yield t
+    t.close()
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("converted an hour on its own")
+
+
+def _assert_variants_match(calc, result, *birth, **kwargs):
+    assert [v["hours"][0] for v in result["variants"]] == list(HOUR_UNKNOWN_HOURS)
+    for variant in result["variants"]:
+        full = calc.calculate_bazi(*birth, variant["hours"][0], as_of=AS_OF, **kwargs)
+        assert variant["hour_pillar"]["zhi"] == variant["zhi"]
+        for key, value in variant.items():
+            if key in full:
+                assert value == full[key], (variant["zhi"], key)
+        for key in ("year_pillar", "month_pillar", "day_pillar"):
+            assert full[key] == variant.get(key, result[key]), (variant["zhi"], key)
+
+
+@pytest.mark.parametrize("cache", [None, NatalCache(256, 64 << 20)], ids=["uncached", "cached"])
+@pytest.mark.parametrize("gender", ["male", "female"])
+@pytest.mark.parametrize("birth", BIRTHS)
+def test_variants_match_calculate_bazi(birth, gender, cache):
+    calc = BaziCalculator(natal_cache=cache)
+    result = calc.calculate_bazi_hour_unknown(*birth, gender=gender, as_of=AS_OF)
+    _assert_variants_match(calc, result, *birth, gender=gender)
+
+
+def test_lunar_input():
+    calc = BaziCalculator()
+    result = calc.calculate_bazi_hour_unknown(2023, 2, 12, is_lunar=True, is_leap_month=True, as_of=AS_OF)
+    assert result["lunar_date"] == "2023年2月12日"
+    _assert_variants_match(calc, result, 2023, 2, 12, is_lunar=True, is_leap_month=True)
+
+
+def test_pillar_table_days(table):
+    with_table, without = BaziCalculator(pillar_table=table), BaziCalculator()
+    for day in (datetime.date(1990, 1, 28), datetime.date(1990, 2, 4)):
+        args = dict(year=day.year, month=day.month, day=day.day, gender="female", as_of=AS_OF)
+        assert with_table.calculate_bazi_hour_unknown(**args) == without.calculate_bazi_hour_unknown(**args)
+
+
+def test_only_jie_days_convert_each_hour(monkeypatch):
+    calc = BaziCalculator()
+    monkeypatch.setattr(calc, "_periods_from_yun", _fail)
+    calc.calculate_bazi_hour_unknown(1990, 2, 5, as_of=AS_OF)
+    with pytest.raises(ValueError):
+        calc.calculate_bazi_hour_unknown(1990, 2, 4, as_of=AS_OF)
+
+
+def test_jie_day_overrides_month_pillar():
+    result = BaziCalculator().calculate_bazi_hour_unknown(1990, 2, 4, as_of=AS_OF)
+    # 丑 (01-02h) is before 立春, 午 (11-12h) after
+    before, after = result["variants"][1], result["variants"][6]
+    assert "month_pillar" not in before and "year_pillar" not in before
+    assert after["month_pillar"]["gan"] + after["month_pillar"]["zhi"] == "戊寅"
+    assert after["year_pillar"]["gan"] + after["year_pillar"]["zhi"] == "庚午"
+
+
+def test_three_pillar_analysis():
+    result = BaziCalculator().calculate_bazi_hour_unknown(1990, 5, 15, as_of=AS_OF)
+    analysis = result["three_pillar_analysis"]
+    assert analysis["day_master_nature"]["gan"] == result["day_pillar"]["gan"]
+    deities = analysis["deity_distribution"]
+    assert deities["gan_deities"][2] == "日主"
+    # Six positions, day master excluded: five 十神
+    assert len(deities["zhi_deities"]) == 3
+    assert sum(deities["deity_counts"].values()) == 5
+
+
+def test_bazi_endpoint(client):
+    body = {"year": 1990, "month": 5, "day": 15, "gender": "male", "hour_unknown": True, "include_liunian": "none"}
+    r = client.post("/api/bazi", json=body)
+    assert r.status_code == 200
+    data = r.json()
+    assert [v["zhi"] for v in data["variants"]] == list("子丑寅卯辰巳午未申酉戌亥")
+    assert "three_pillar_analysis" in data
+
+    r = client.post("/api/bazi", json={k: v for k, v in body.items() if k != "hour_unknown"})
+    assert r.status_code == 422
+
+
+def test_ziwei_endpoint(client):
+    body = {"year": 1990, "month": 5, "day": 15, "hour_unknown": True}
+    r = client.post("/api/ziwei", json=body)
+    assert r.status_code == 200
+    data = r.json()
+    assert [v["time_index"] for v in data["variants"]] == list(range(12))
+
+    single = client.post("/api/ziwei", json={**body, "hour_unknown": False, "hour": 10}).json()
+    variant = data["variants"][5]
+    assert variant["palaces"] == single["palaces"]
+    assert variant["chinese_date"] == single["chinese_date"]
+    assert data["lunar_date"] == single["lunar_date"]
@@ -0,0 +1,49 @@
+"""include_liunian / dayun_range trimming and the on-demand 流年 endpoint."""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from bazi.bazi_calculator import BaziCalculator
+
+BIRTH = dict(year=1990, month=5, day=15, hour=10, gender="female")
+AS_OF = date(2026, 3, 1)
+
+
+def test_trimmed_dayun_keeps_current_pillars():
+    calculator = BaziCalculator()
+    full = calculator.calculate_bazi(**BIRTH, as_of=AS_OF)
+
+    current = calculator.calculate_bazi(**BIRTH, as_of=AS_OF, include_liunian="current")
+    assert [ln["year"] for du in current["dayun"] for ln in du["liunian"]] == [2026]
+    assert [{**du, "liunian": []} for du in current["dayun"]] == [{**du, "liunian": []} for du in full["dayun"]]
+
+    page = calculator.calculate_bazi(**BIRTH, as_of=AS_OF, include_liunian="none", dayun_range=(2, 3))
+    assert [du["ganzhi"] for du in page["dayun"]] == [du["ganzhi"] for du in full["dayun"][2:5]]
+    assert all(du["liunian"] == [] for du in page["dayun"])
+    for key in ("dayun_pillar", "liunian_pillar", "year_pillar", "analysis"):
+        assert page[key] == full[key]
+
+
+def test_liunian_range_matches_chart_and_extends_past_it():
+    calculator = BaziCalculator()
+    natal = calculator.calculate_natal(**BIRTH)
+    in_chart = [ln for du in natal["dayun"] for ln in du["liunian"]]
+
+    entries = calculator.expand_liunian(natal, 1980, in_chart[-1]["year"] + 25)
+    assert entries[: len(in_chart)] == in_chart
+    years = [ln["year"] for ln in entries]
+    assert years == list(range(in_chart[0]["year"], in_chart[-1]["year"] + 26))
+    # 流年 干支 follow the calendar year
+    assert entries[-1]["ganzhi"] == calculator.expand_liunian(natal, years[-1] - 60, years[-1] - 60)[0]["ganzhi"]
+
+
+def test_liunian_endpoint():
+    with TestClient(app) as client:
+        body = client.get("/api/bazi/liunian", params={**BIRTH, "start_year": 2030, "end_year": 2034}).json()
+        assert [ln["year"] for ln in body["liunian"]] == [2030, 2031, 2032, 2033, 2034]
+
+        response = client.get("/api/bazi/liunian", params={**BIRTH, "start_year": 2030, "end_year": 2020})
+        assert response.status_code == 400
+        assert response.json()["error"] == "Invalid range"
@@ -0,0 +1,100 @@
+"""/ws/chart: every patch turns the last chart into the /api/bazi chart of the new input."""
+
+import copy
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.live_chart_service import json_patch
+
+BIRTH = {"year": 1990, "month": 5, "day": 15, "hour": 9, "gender": "male", "as_of": "2026-03-01"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def apply_patch(doc, ops):
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        *parents, last = [_unescape(t) for t in op["path"].split("/")[1:]]
+        target = doc
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            index = int(last)
+            if op["op"] == "add":
+                target.insert(index, op["value"])
+            elif op["op"] == "remove":
+                del target[index]
+            else:
+                target[index] = op["value"]
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return doc
+
+
+def test_json_patch():
+    old = {"a": [1, 2, 3], "b": {"c/d": 1, "e": 2, "h": "a value long enough to keep patching inside"}, "f": "x"}
+    new = {"a": [1, 5], "b": {"c/d": 2, "h": "a value long enough to keep patching inside"}, "g": [4]}
+    ops = json_patch(old, new)
+    assert apply_patch(old, ops) == new
+    assert {"op": "replace", "path": "/b/c~1d", "value": 2} in ops
+    assert json_patch(new, new) == []
+    # Rewriting every item is sent as one replace of the list
+    assert json_patch({"x": [1, 2, 3]}, {"x": [4, 5, 6]}) == [{"op": "replace", "path": "/x", "value": [4, 5, 6]}]
+
+
+def test_edits_patch_to_full_chart(client):
+    # (fields, scope, patch expected empty)
+    edits = [
+        ({"hour": 11}, "hour", False),
+        ({"hour": 12}, "hour", True),             # same 時辰
+        ({"gender": "male"}, "none", True),
+        ({"gender": "female"}, "gender", False),
+        ({"as_of": "2030-06-01", "include_liunian": "current"}, "as_of", False),
+        ({"hour": 23, "gender": "male"}, "hour", False),
+        ({"day": 16}, "full", False),
+        ({"year": 2024, "month": 2, "day": 4, "hour": 17}, "full", False),  # 立春 16:27
+        ({"hour": 15}, "hour", False),            # before 立春: other month and year pillars
+    ]
+    with client.websocket_connect("/ws/chart") as ws:
+        ws.send_json(BIRTH)
+        first = ws.receive_json()
+        assert first["type"] == "chart"
+        chart, request = first["chart"], dict(BIRTH)
+        assert chart == client.post("/api/bazi", json=request).json()
+
+        for fields, scope, empty in edits:
+            ws.send_json(fields)
+            message = ws.receive_json()
+            assert (message["type"], message["scope"]) == ("patch", scope), fields
+            assert (message["patch"] == []) == empty, fields
+            request.update(fields)
+            chart = apply_patch(chart, message["patch"])
+            assert chart == client.post("/api/bazi", json=request).json(), fields
+
+
+def test_invalid_message_keeps_state(client):
+    with client.websocket_connect("/ws/chart") as ws:
+        ws.send_json(BIRTH)
+        ws.receive_json()
+        ws.send_json({"hour": 24})
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["error"] == "Invalid input"
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"month": 2, "day": 30})
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_json({"hour": 9})
+        message = ws.receive_json()
+        assert (message["scope"], message["patch"]) == ("none", [])
@@ -0,0 +1,73 @@
+"""Natal chart cache: LRU bounds, counters, frozen entries, same charts as uncached."""
+
+import pickle
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from bazi.bazi_calculator import BaziCalculator
+from bazi.natal_cache import FrozenDict, NatalCache, freeze_with_size
+
+
+def test_lru_eviction_and_counters():
+    cache = NatalCache(max_entries=2, max_bytes=0)
+    cache.put("a", {"x": [1]})
+    cache.put("b", {"x": [2]})
+    assert cache.get("a") == {"x": [1]}
+    cache.put("c", {"x": [3]})  # evicts b, the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("c") == {"x": [3]}
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1, 1)
+    assert cache.clear() == 2 and cache.stats()["bytes"] == 0
+
+
+def test_memory_bound():
+    size = freeze_with_size({"x": list(range(100))})[1]
+    cache = NatalCache(max_entries=100, max_bytes=size * 3)
+    for key in range(5):
+        cache.put(key, {"x": list(range(100))})
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] <= size * 3
+
+
+def test_entries_are_frozen_but_plain_for_readers():
+    frozen = NatalCache(max_entries=1, max_bytes=0).put("k", {"a": [{"b": 1}]})
+    with pytest.raises(TypeError):
+        frozen["a"].append(2)
+    with pytest.raises(TypeError):
+        frozen["a"][0]["b"] = 2
+    assert frozen == {"a": [{"b": 1}]}
+    assert isinstance(pickle.loads(pickle.dumps(frozen)), FrozenDict)
+
+
+def test_cached_charts_match_uncached():
+    cache = NatalCache(max_entries=64, max_bytes=0)
+    cached = BaziCalculator(natal_cache=cache)
+    plain = BaziCalculator()
+    as_of = date(2026, 1, 1)
+    inputs = [
+        dict(year=1990, month=5, day=15, hour=10),
+        dict(year=1990, month=4, day=21, hour=8, is_lunar=True, gender="female"),
+        dict(year=2020, month=2, day=4, hour=23),
+    ]
+    for _ in range(2):
+        for args in inputs:
+            assert cached.calculate_bazi(**args, as_of=as_of) == plain.calculate_bazi(**args, as_of=as_of)
+    assert cache.stats()["hits"] == len(inputs)
+
+
+def test_admin_clear_requires_token(monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+        assert client.delete("/api/admin/cache/natal").status_code == 403
+
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        assert client.delete("/api/admin/cache/natal", headers={"X-Admin-Token": "nope"}).status_code == 403
+        response = client.delete("/api/admin/cache/natal", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200 and "cleared" in response.json()
+        assert client.get("/health/cache").json()["entries"] == 0
@@ -0,0 +1,35 @@
+"""Pillar detail table: every record matches the per-call functions and is frozen."""
+
+import pytest
+
+from bazi.bazi_functions import gan_zhi_he, get_life_stage, get_nayin, get_ten_deity, is_ku
+from bazi.ganzhi_codes import GAN, HIDDEN_STEMS, HIDDEN_WEIGHTS, JIAZI
+from bazi.pillar_details import PILLAR_DETAILS
+
+
+def test_table_matches_functions():
+    assert len(PILLAR_DETAILS) == 600
+    for day_master in range(10):
+        for pillar in range(60):
+            gan, zhi = pillar % 10, pillar % 12
+            detail = PILLAR_DETAILS[day_master * 60 + pillar]
+            hidden = [(GAN[h], get_ten_deity(day_master, h)) for h in HIDDEN_STEMS[zhi]]
+
+            assert detail.pillar["ganzhi"] == detail.cell["ganzhi"] == JIAZI[pillar]
+            assert detail.pillar["ten_deity"] == detail.cell["gan_ten_deity"] == get_ten_deity(day_master, gan)
+            assert detail.pillar["zhi_ten_deity"] == get_life_stage(day_master, zhi)
+            assert detail.cell["zhi_ten_deity"] == hidden[0][1]
+            assert [(h["gan"], h["ten_deity"]) for h in detail.pillar["hidden_stems"]] == hidden
+            assert [(h["gan"], h["ten_deity"]) for h in detail.cell["hidden_stems"]] == hidden
+            assert [h["strength"] for h in detail.weighted_hidden_stems] == list(HIDDEN_WEIGHTS[zhi])
+            assert detail.pillar["nayin"] == detail.cell["nayin"] == get_nayin(pillar)
+            assert detail.pillar["harmony"] == gan_zhi_he(gan, zhi)
+            assert detail.pillar["is_treasury"] == is_ku(zhi)
+
+
+def test_records_are_frozen():
+    detail = PILLAR_DETAILS[0]
+    with pytest.raises(TypeError):
+        detail.pillar["shensha"] = []
+    with pytest.raises(TypeError):
+        detail.cell["hidden_stems"].append({})
@@ -0,0 +1,85 @@
+"""Pillar table vs lunar_python.
+
+Builds a small table covering 1990-01-01..04-10 (小寒, 立春 and 清明 fall in
+it) and checks the lookup path hour by hour. The full-range check lives in
+`scripts/build_pillar_table.py --verify`.
+"""
+
+import importlib.util
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from bazi.bazi_calculator import BaziCalculator
+from bazi.pillar_table import HEADER, PillarTable, open_pillar_table
+
+_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "build_pillar_table.py")
+_spec = importlib.util.spec_from_file_location("build_pillar_table", _SCRIPT)
+build_pillar_table = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(build_pillar_table)
+
+DAYS = 100
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("pillars") / "pillar_table.bin")
+    build_pillar_table.build(1990, 1990, path, num_days=DAYS)
+    t = PillarTable(path)
+    yield t
+    t.close()
+
+
+def test_every_hour_matches_lunar_python(table):
+    fallbacks = 0
+    for i in range(DAYS):
+        d = date(1990, 1, 1) + timedelta(days=i)
+        for hour in range(24):
+            got = table.lookup(d.year, d.month, d.day, hour)
+            if got is None:
+                fallbacks += 1
+                continue
+            assert tuple(got) == build_pillar_table.reference_slot(d.year, d.month, d.day, hour)
+    # 清明 falls between 09:00 and 10:00 on 1990-04-05, splitting the 巳 slot;
+    # 小寒 and 立春 land between slot boundaries and split nothing.
+    assert table.lookup(1990, 4, 5, 9) is None
+    assert table.lookup(1990, 4, 5, 10) is None
+    assert fallbacks == 2
+
+
+def test_off_table_dates_return_none(table):
+    assert table.lookup(1989, 12, 31, 12) is None
+    assert table.lookup(1990, 4, 11, 12) is None
+
+
+def test_calculator_output_identical_with_and_without_table(table):
+    with_table = BaziCalculator(pillar_table=table)
+    without = BaziCalculator()
+    for d in (date(1990, 1, 3), date(1990, 1, 5), date(1990, 2, 4), date(1990, 4, 5)):
+        for hour in (0, 7, 9, 10, 23):
+            for gender in ("male", "female"):
+                args = dict(year=d.year, month=d.month, day=d.day, hour=hour, gender=gender)
+                assert with_table.calculate_bazi(**args) == without.calculate_bazi(**args)
+
+
+def test_verify_checks_dayun_from_slots(table, capsys):
+    assert build_pillar_table.verify(table.path) == 0
+    assert "0 mismatches" in capsys.readouterr().out
+
+
+def test_missing_table_is_optional(tmp_path):
+    assert open_pillar_table(str(tmp_path / "absent.bin")) is None
+
+
+@pytest.mark.parametrize("field", [1, 2])  # format version, lunar_python release
+def test_stale_table_is_ignored(table, tmp_path, field):
+    assert open_pillar_table(table.path) is not None
+    with open(table.path, "rb") as f:
+        data = bytearray(f.read())
+    header = list(HEADER.unpack_from(data, 0))
+    header[field] ^= 1
+    HEADER.pack_into(data, 0, *header)
+    stale = tmp_path / "stale.bin"
+    stale.write_bytes(bytes(data))
+    assert open_pillar_table(str(stale)) is None
@@ -0,0 +1,158 @@
+"""Birth-time rectification: profiles vs iztro's horoscope, scores vs their hits."""
+
+import datetime
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from lunar_python import Solar
+
+from app.api.deps import get_ziwei_calculator
+from app.main import app
+from app.services import rectify_service
+from bazi import rectify
+from bazi.date_search import LI_CHUN, jie_days
+from bazi.ganzhi_codes import JIAZI_CODE, ZHI_CODE
+from bazi.pillar_table import open_pillar_table, slot_hours
+from bazi.rectify import (
+    BAZI_RULES, DAYUN_WEIGHT, EVENT_KINDS, JIAO_YUN, POSITION_NAMES, ZIWEI_WEIGHTS, event_years, score_candidates,
+)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def _events(seed, count, birth):
+    rng = random.Random(seed)
+    return [
+        {"date": birth + datetime.timedelta(days=rng.randrange(200, 25000)), "kind": rng.choice(EVENT_KINDS)}
+        for _ in range(count)
+    ]
+
+
+def test_candidate_slots():
+    assert rectify_service.candidate_slots(None, None) == list(range(13))
+    assert rectify_service.candidate_slots(9, 12) == [5, 6]
+    # Wrapping past midnight: 亥, 晚子, 早子, 丑
+    assert rectify_service.candidate_slots(22, 1) == [0, 1, 11, 12]
+
+
+def test_ziwei_scopes_match_horoscope():
+    rng = random.Random(17)
+    ziwei = get_ziwei_calculator()
+    for _ in range(30):
+        birth = datetime.date(rng.randrange(1950, 2005), rng.randrange(1, 13), rng.randrange(1, 29))
+        slot, gender = rng.randrange(12), rng.choice(["male", "female"])
+        _, profile = rectify_service._slot_profile(birth.year, birth.month, birth.day, slot, False, False, gender)
+        event = birth + datetime.timedelta(days=rng.randrange(100, 30000))
+        horoscope = ziwei.calculate(
+            birth.year, birth.month, birth.day, slot_hours(slot)[0], gender=gender, horoscope_date=event.isoformat()
+        )["horoscope"]
+        _, (lunar_year,) = event_years([event])
+        age = lunar_year - profile.lunar_year + 1
+        assert horoscope["nominal_age"] == age
+        assert profile.decadal_branch[age] == ZHI_CODE[horoscope["decadal"]["earthly_branch"]]
+        assert (lunar_year - 4) % 12 == ZHI_CODE[horoscope["yearly"]["earthly_branch"]]
+
+
+def _event_dates(seed):
+    """Random days plus the days around 立春 and 春節 2024 and around the year-change window"""
+    rng = random.Random(seed)
+    dates = [datetime.date(1900, 1, 1) + datetime.timedelta(days=rng.randrange(73000)) for _ in range(200)]
+    dates += [datetime.date(2024, 2, day) for day in range(3, 12)]
+    dates += [
+        datetime.date(year, month, day)
+        for year in (1901, 1985, 2100) for month, day in ((1, 20), (1, 21), (2, 20), (2, 21))
+    ]
+    return dates
+
+
+def _reference_years(d):
+    lunar = Solar.fromYmdHms(d.year, d.month, d.day, 12, 0, 0).getLunar()
+    year_pillar = JIAZI_CODE[lunar.getYearInGanZhiExact()]
+    return (d.year if year_pillar == (d.year - 4) % 60 else d.year - 1), lunar.getYear()
+
+
+def test_event_years_match_lunar_python():
+    dates = _event_dates(4) + [datetime.date.fromordinal(jie_days(year)[LI_CHUN]) for year in range(1990, 2000)]
+    pillar_years, lunar_years = event_years(dates)
+    assert list(zip(pillar_years, lunar_years)) == [_reference_years(d) for d in dates]
+
+
+def test_event_years_convert_only_li_chun_days(monkeypatch):
+    converted = []
+
+    class CountingSolar:
+        @staticmethod
+        def fromYmdHms(*args):
+            converted.append(args[:3])
+            return Solar.fromYmdHms(*args)
+
+    monkeypatch.setattr(rectify, "Solar", CountingSolar)
+    li_chun = datetime.date.fromordinal(jie_days(2024)[LI_CHUN])
+    event_years([datetime.date(2024, 1, 1) + datetime.timedelta(days=n) for n in range(91)])
+    assert converted == [(2024, li_chun.month, li_chun.day)]
+
+
+def test_event_years_from_table_match_lunar_python():
+    table = open_pillar_table()
+    if table is None:
+        pytest.skip("pillar table not built")
+    dates = _event_dates(4)
+    assert all((a == b).all() for a, b in zip(event_years(dates, table), event_years(dates)))
+
+
+def _score_from_hits(kind, hits):
+    bazi = ziwei = 0.0
+    for hit in hits:
+        if hit == "交運":
+            bazi += JIAO_YUN[kind]
+        elif hit[:2] in ("流年", "大運") and hit[-2:] in POSITION_NAMES:
+            weight = BAZI_RULES[kind][hit[2:-2]][POSITION_NAMES.index(hit[-2:])]
+            bazi += weight * (DAYUN_WEIGHT if hit.startswith("大運") else 1)
+        else:
+            scope, rest = hit[:2], hit[2:]
+            ziwei += ZIWEI_WEIGHTS[scope][0 if rest.startswith("命宮") else 1]
+    return bazi, ziwei
+
+
+def test_scores_match_hits_and_per_candidate_scoring():
+    birth = datetime.date(1990, 5, 15)
+    profiles = [rectify_service._slot_profile(1990, 5, 15, slot, False, False, "female")[1] for slot in range(13)]
+    events = _events(5, 60, birth)
+    dates, kinds = [e["date"] for e in events], [e["kind"] for e in events]
+    scores = score_candidates(profiles, dates, kinds)
+    for c, profile in enumerate(profiles):
+        alone = score_candidates([profile], dates, kinds)
+        assert (alone.bazi[0] == scores.bazi[c]).all() and (alone.ziwei[0] == scores.ziwei[c]).all()
+        for e, kind in enumerate(kinds):
+            assert _score_from_hits(kind, scores.hits[c][e]) == pytest.approx((scores.bazi[c, e], scores.ziwei[c, e]))
+
+
+def test_endpoint_ranks_candidates(client):
+    body = {
+        "year": 1990, "month": 5, "day": 15, "gender": "male",
+        "events": [{"date": e["date"].isoformat(), "kind": e["kind"]} for e in _events(9, 50, datetime.date(1990, 5, 15))],
+    }
+    r = client.post("/api/rectify", json=body)
+    assert r.status_code == 200
+    candidates = r.json()["candidates"]
+    assert len(candidates) == 13
+    assert [c["score"] for c in candidates] == sorted((c["score"] for c in candidates), reverse=True)
+    assert all(len(c["events"]) == 50 for c in candidates)
+    assert sum(c["late_zi"] for c in candidates) == 1
+
+    r = client.post("/api/rectify", json={**body, "hour_start": 9, "hour_end": 12})
+    assert [c["zhi"] for c in r.json()["candidates"]] in (["巳", "午"], ["午", "巳"])
+
+
+def test_endpoint_errors(client):
+    body = {"year": 1990, "month": 5, "day": 15, "events": [{"date": "1985-01-01", "kind": "career"}]}
+    r = client.post("/api/rectify", json=body)
+    assert r.status_code == 400
+    assert r.json()["error"] == "Invalid input"
+
+    r = client.post("/api/rectify", json={**body, "hour_start": 9})
+    assert r.status_code == 422
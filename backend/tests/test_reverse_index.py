@@ -0,0 +1,116 @@
+"""Reverse index vs lunar_python and vs the index-free scan.
+
+Builds an index of 1990-1991 and checks every chart in it both ways. The
+whole-range check lives in `scripts/build_reverse_index.py --verify`.
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from lunar_python import Solar
+
+from app.api.deps import get_calculator
+from app.main import app
+from bazi.bazi_calculator import BaziCalculator
+from bazi.ganzhi_codes import GAN_CODE, ZHI_CODE
+from bazi.reverse_index import (
+    HEADER, KEYS, ReverseIndex, chart_key, compute_entries, decode, open_reverse_index, scan, write_reverse_index,
+)
+
+FIRST, LAST = 1990, 1991
+
+
+def _pillars(d, hour):
+    ba = Solar.fromYmdHms(d.year, d.month, d.day, hour, 0, 0).getLunar().getEightChar()
+    gans = tuple(GAN_CODE[g] for g in (ba.getYearGan(), ba.getMonthGan(), ba.getDayGan(), ba.getTimeGan()))
+    zhis = tuple(ZHI_CODE[z] for z in (ba.getYearZhi(), ba.getMonthZhi(), ba.getDayZhi(), ba.getTimeZhi()))
+    return gans, zhis
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("reverse") / "reverse_index.bin")
+    write_reverse_index(path, FIRST, LAST, *compute_entries(FIRST, LAST))
+    ix = ReverseIndex(path)
+    yield ix
+    ix.close()
+
+
+def test_sampled_hours_are_found(index):
+    rng = random.Random(15)
+    days = (date(LAST, 12, 31) - date(FIRST, 1, 1)).days + 1
+    # Random hours, plus every hour around 立春 1990 (4 February, 10:14)
+    hours = [(date(FIRST, 1, 1) + timedelta(days=rng.randrange(days)), rng.randrange(24)) for _ in range(300)]
+    hours += [(date(1990, 2, 4), hour) for hour in range(24)]
+    for d, hour in hours:
+        gans, zhis = _pillars(d, hour)
+        slots = index.lookup(gans, zhis)
+        assert any(slot.date == d and hour in slot.hours for slot in slots), (d, hour)
+        for slot in slots:
+            assert all(_pillars(slot.date, h) == (gans, zhis) for h in slot.hours)
+
+
+def test_index_covers_every_hour_once(index):
+    first = date(FIRST, 1, 1)
+    hours = [(slot.date, hour) for key in range(KEYS) for entry in index.entries(key)
+             for slot in [decode(entry, first)] for hour in slot.hours]
+    days = (date(LAST, 12, 31) - first).days + 1
+    assert len(hours) == len(set(hours)) == days * 24
+
+
+def test_scan_matches_index(index):
+    keys, _ = compute_entries(FIRST, LAST)
+    for key in random.Random(3).sample(sorted(set(keys.tolist())), 40):
+        slot = decode(index.entries(key)[0], date(FIRST, 1, 1))
+        d, hour = slot.date, slot.hours[0]
+        gans, zhis = _pillars(d, hour)
+        assert chart_key(gans, zhis) == key
+        assert scan(gans, zhis, FIRST, LAST) == index.lookup(gans, zhis)
+
+
+def test_late_zi_hour_and_impossible_charts(index):
+    # 23:00 keeps the day pillar but takes the next day's 子 hour stem
+    gans, zhis = _pillars(date(1990, 5, 15), 23)
+    assert [slot.hours for slot in index.lookup(gans, zhis) if slot.date == date(1990, 5, 15)] == [(23,)]
+    # 甲 year with a 甲 month stem breaks 五虎遁
+    assert chart_key((0, 0, 0, 0), (0, 2, 0, 0)) is None
+    assert index.lookup((0, 0, 0, 0), (0, 2, 0, 0)) == []
+
+
+@pytest.mark.parametrize("with_index", [True, False])
+def test_calculator_and_endpoint(index, monkeypatch, with_index):
+    # The endpoint answers from the index in-process, or scans on the compute pool
+    monkeypatch.setattr(get_calculator(), "reverse_index", index if with_index else None)
+    calculator = BaziCalculator()
+    result = calculator.reverse_lookup("庚午", "辛巳", "庚辰", "辛巳")
+    assert {"solar_date": date(1990, 5, 15), "hours": [9, 10]} in result["slots"]
+    with pytest.raises(ValueError):
+        calculator.reverse_lookup("甲丑", "辛巳", "庚辰", "辛巳")
+
+    with TestClient(app) as client:
+        body = client.get("/api/bazi/reverse", params={"pillars": "庚午,辛巳,庚辰,辛巳"}).json()
+        assert {"solar_date": "1990-05-15", "hours": [9, 10]} in body["slots"]
+        assert body["total"] == len(body["slots"])
+
+        response = client.get("/api/bazi/reverse", params={"pillars": "庚午辛巳庚辰"})
+        assert response.status_code == 400
+        assert response.json()["error"] == "Invalid pillars"
+
+
+def test_missing_index_is_optional(tmp_path):
+    assert open_reverse_index(str(tmp_path / "absent.bin")) is None
+
+
+@pytest.mark.parametrize("field", [1, 2])  # format version, lunar_python release
+def test_stale_index_is_ignored(index, tmp_path, field):
+    assert open_reverse_index(index.path) is not None
+    with open(index.path, "rb") as f:
+        data = bytearray(f.read())
+    header = list(HEADER.unpack_from(data, 0))
+    header[field] ^= 1
+    HEADER.pack_into(data, 0, *header)
+    stale = tmp_path / "stale.bin"
+    stale.write_bytes(bytes(data))
+    assert open_reverse_index(str(stale)) is None
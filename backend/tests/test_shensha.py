@@ -0,0 +1,57 @@
+"""The compiled shensha tables must reproduce the rule interpreter exactly."""
+
+from bazi.bazi_functions import (
+    apply_shensha_other_rules,
+    apply_shensha_rules,
+    apply_shensha_rules_with_certain_pillar,
+    apply_xiao_er_guan_sha_rules,
+)
+from bazi.ganzhi_codes import GAN, JIAZI, ZHI
+from bazi.shensha import PILLARS, natal_shensha, pillar_shensha
+
+
+def valid_charts():
+    """Every (year, month, day, hour) stem/branch combination the calendar allows."""
+    for year in range(60):
+        year_gan, year_zhi = year % 10, year % 12
+        for k in range(12):
+            # 五虎遁: the 寅 month stem follows from the year stem
+            month_gan, month_zhi = (year_gan % 5 * 2 + 2 + k) % 10, (k + 2) % 12
+            for day in range(60):
+                day_gan, day_zhi = day % 10, day % 12
+                for hour_zhi in range(12):
+                    # 五鼠遁: the 子 hour stem follows from the day stem
+                    hour_gan = (day_gan % 5 * 2 + hour_zhi) % 10
+                    yield (
+                        (year_gan, month_gan, day_gan, hour_gan),
+                        (year_zhi, month_zhi, day_zhi, hour_zhi),
+                    )
+
+
+def interpret(data, is_child):
+    """BaziCalculator._get_shansha as it was before the rules were compiled."""
+    shensha = {p: [] for p in PILLARS}
+    shensha = apply_shensha_rules(shensha, data)
+    shensha = apply_shensha_other_rules(shensha, data)
+    if is_child:
+        shensha = apply_xiao_er_guan_sha_rules(shensha, data)
+    return {p: list(dict.fromkeys(shensha[p])) for p in PILLARS}
+
+
+def test_compiled_rules_match_interpreter_for_every_chart():
+    count = 0
+    for gans, zhis in valid_charts():
+        data = {
+            "gan": {p: GAN[g] for p, g in zip(PILLARS, gans)},
+            "zhi": {p: ZHI[z] for p, z in zip(PILLARS, zhis)},
+        }
+        assert natal_shensha(gans, zhis, True) == interpret(data, True), (gans, zhis)
+        assert natal_shensha(gans, zhis, False) == interpret(data, False), (gans, zhis)
+
+        # A different extra 大運/流年 pillar for each chart, so every natal
+        # year/month/day combination meets twelve of the sixty
+        extra = count % 60
+        expected = apply_shensha_rules_with_certain_pillar(data, {"gan": JIAZI[extra][0], "zhi": JIAZI[extra][1]})
+        assert pillar_shensha(gans, zhis, extra % 10, extra % 12) == expected, (gans, zhis, extra)
+        count += 1
+    assert count == 518400
@@ -0,0 +1,58 @@
+"""紫微斗數 chart cache and POST /api/ziwei/horoscope."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ziwei import ziwei_calculator
+from app.ziwei.ziwei_calculator import ZiweiCalculator
+from bazi.natal_cache import NatalCache
+
+BIRTH = {"year": 1990, "month": 5, "day": 15, "hour": 9}
+DATES = ["2026-03-01", "2031-07-15"]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_cached_charts_match_and_build_once(monkeypatch):
+    plain = ZiweiCalculator()
+    cached = ZiweiCalculator(natal_cache=NatalCache(max_entries=8, max_bytes=0))
+    builds = []
+    real_by_solar = ziwei_calculator.by_solar
+
+    def counting_by_solar(*args, **kwargs):
+        builds.append(args)
+        return real_by_solar(*args, **kwargs)
+
+    monkeypatch.setattr(ziwei_calculator, "by_solar", counting_by_solar)
+    for date in DATES:
+        expected = plain.calculate(**BIRTH, horoscope_date=date)
+        assert cached.calculate(**BIRTH, horoscope_date=date) == expected
+        assert cached.horoscopes(**BIRTH, dates=[date]) == [expected["horoscope"]]
+    assert len(builds) == len(DATES) + 1  # plain builds per call; cached once
+
+    # Language and fix_leap are part of the key
+    cached.calculate(**BIRTH, language="en-US")
+    assert cached.natal_cache.stats()["entries"] == 2
+
+
+def test_horoscope_endpoint(client):
+    response = client.post("/api/ziwei/horoscope", json={**BIRTH, "dates": DATES})
+    assert response.status_code == 200
+    horoscopes = response.json()["horoscopes"]
+    assert len(horoscopes) == len(DATES)
+    for date, horoscope in zip(DATES, horoscopes):
+        chart = client.post("/api/ziwei", json={**BIRTH, "horoscope_date": date}).json()
+        assert horoscope == chart["horoscope"]
+
+
+@pytest.mark.parametrize("body, status", [
+    ({**BIRTH, "dates": []}, 422),
+    ({**BIRTH, "dates": ["2026-01-01"] * 367}, 400),
+    ({**BIRTH, "day": 31, "month": 2, "dates": DATES}, 400),
+])
+def test_horoscope_endpoint_rejects(client, body, status):
+    assert client.post("/api/ziwei/horoscope", json=body).status_code == status
@@ -0,0 +1,80 @@
+"""POST /api/ziwei/timeline: each scope once, entries matching per-date horoscopes."""
+
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ziwei.ziwei_calculator import TIMELINE_LAYERS, ZiweiCalculator
+
+BIRTH = {"year": 1990, "month": 5, "day": 15, "hour": 9}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def _in_force(entries, date):
+    """The last entry starting on or before `date`."""
+    starts = [datetime.date.fromisoformat(entry["solar_date"]) for entry in entries]
+    return entries[max(i for i, start in enumerate(starts) if start <= date)]
+
+
+@pytest.mark.parametrize("granularity, start, end", [
+    # 2023 has a leap second month, which iztro-py splits at its 16th
+    ("monthly", datetime.date(2023, 1, 10), datetime.date(2023, 6, 30)),
+    ("yearly", datetime.date(2019, 6, 1), datetime.date(2031, 3, 1)),
+    ("daily", datetime.date(2026, 2, 10), datetime.date(2026, 3, 5)),
+])
+def test_timeline_matches_horoscope_on_every_day(granularity, start, end):
+    calc = ZiweiCalculator()
+    timeline = calc.timeline(**BIRTH, start=start, end=end, granularity=granularity)
+    layers = TIMELINE_LAYERS[granularity]
+    assert set(timeline["scopes"]) == set(layers)
+    entries = timeline["entries"]
+    assert entries[0]["solar_date"] == start.isoformat()
+
+    # Consecutive entries differ, and each scope is listed once per run
+    for before, after in zip(entries, entries[1:]):
+        assert any(before[layer] != after[layer] for layer in layers)
+    for layer in layers:
+        assert [e[layer] for e in entries] == sorted(e[layer] for e in entries)
+
+    step = 1 if granularity == "daily" else 5
+    for n in range(0, (end - start).days + 1, step):
+        date = start + datetime.timedelta(days=n)
+        horoscope = calc.calculate(**BIRTH, horoscope_date=date.isoformat())["horoscope"]
+        entry = _in_force(entries, date)
+        for layer in layers:
+            assert timeline["scopes"][layer][entry[layer]] == horoscope[layer], (date, layer)
+
+
+def test_decade_shares_one_decadal_scope():
+    timeline = ZiweiCalculator().timeline(
+        **BIRTH, start=datetime.date(2020, 1, 1), end=datetime.date(2029, 12, 31), granularity="monthly"
+    )
+    assert len(timeline["scopes"]["decadal"]) <= 2
+    assert len(timeline["scopes"]["yearly"]) == 11
+    assert len(timeline["entries"]) == len(timeline["scopes"]["monthly"])
+
+
+def test_endpoint(client):
+    body = {**BIRTH, "start": "2020-01-01", "end": "2029-12-31", "granularity": "monthly"}
+    response = client.post("/api/ziwei/timeline", json=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["granularity"] == "monthly"
+    assert data["entries"][0]["decadal"] == 0 and data["entries"][0]["daily"] is None
+
+
+@pytest.mark.parametrize("changes, status", [
+    ({"end": "2019-01-01"}, 422),
+    ({"granularity": "hourly"}, 422),
+    ({"granularity": "daily"}, 400),
+    ({"day": 31, "month": 2}, 400),
+])
+def test_endpoint_rejects(client, changes, status):
+    body = {**BIRTH, "start": "2020-01-01", "end": "2029-12-31", "granularity": "yearly", **changes}
+    assert client.post("/api/ziwei/timeline", json=body).status_code == status